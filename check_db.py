@@ -1,43 +1,48 @@
 #!/usr/bin/env python3
 """Check database content for debugging."""
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
-from config.settings import settings
+from config.settings import make_engine
+
+# Engine and session factory live for the whole process so repeated
+# check_database() calls reuse the same connection pool.
+_engine = make_engine(query_cache_size=1200)
+_Session = sessionmaker(bind=_engine, expire_on_commit=False)
+
+# Statements are constant, so build them once and let the compiled cache reuse them
+_COUNTS_QUERY = text(
+    "SELECT "
+    "(SELECT COUNT(*) FROM documents), "
+    "(SELECT COUNT(*) FROM extracted_information), "
+    "(SELECT COUNT(*) FROM extracted_information WHERE feedback_motivation IS NOT NULL AND feedback_motivation != '[]'), "
+    "(SELECT COUNT(*) FROM extracted_information WHERE risks_concerns IS NOT NULL AND risks_concerns != '[]')"
+)
+_SAMPLE_DOCS_QUERY = text('SELECT employee_name, file_path FROM documents LIMIT 3').execution_options(stream_results=True, yield_per=1)
+_SAMPLE_FEEDBACK_QUERY = text("SELECT substr(feedback_motivation, 1, 200) AS preview FROM extracted_information WHERE feedback_motivation IS NOT NULL AND feedback_motivation != '[]' LIMIT 2").execution_options(stream_results=True, yield_per=1)
 
 def check_database():
-    engine = create_engine(settings.database_url)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    session = _Session()
 
     try:
-        # Check document count
-        doc_count = session.execute(text('SELECT COUNT(*) FROM documents')).scalar()
+        # Fetch all diagnostic counts in a single round-trip
+        doc_count, extracted_count, feedback_count, risks_count = session.execute(_COUNTS_QUERY).one()
         print(f'Documents in database: {doc_count}')
-
-        # Check extracted info count
-        extracted_count = session.execute(text('SELECT COUNT(*) FROM extracted_information')).scalar()
         print(f'Extracted information records: {extracted_count}')
-
-        # Check if we have any feedback_motivation data
-        feedback_count = session.execute(text("SELECT COUNT(*) FROM extracted_information WHERE feedback_motivation IS NOT NULL AND feedback_motivation != '[]'")).scalar()
         print(f'Records with feedback data: {feedback_count}')
 
         # Sample some data
         if doc_count > 0:
             print('\nSample documents:')
-            docs = session.execute(text('SELECT employee_name, file_path FROM documents LIMIT 3')).fetchall()
-            for doc in docs:
+            for doc in session.execute(_SAMPLE_DOCS_QUERY):
                 print(f'  - {doc.employee_name}: {doc.file_path}')
 
         if feedback_count > 0:
             print('\nSample feedback data:')
-            feedback = session.execute(text("SELECT feedback_motivation FROM extracted_information WHERE feedback_motivation IS NOT NULL AND feedback_motivation != '[]' LIMIT 2")).fetchall()
-            for f in feedback:
-                print(f'  - {f.feedback_motivation[:200]}...')
+            for f in session.execute(_SAMPLE_FEEDBACK_QUERY):
+                print(f'  - {f.preview}...')
         
         # Check risks_concerns data
-        risks_count = session.execute(text("SELECT COUNT(*) FROM extracted_information WHERE risks_concerns IS NOT NULL AND risks_concerns != '[]'")).scalar()
         print(f'\nRecords with risks/concerns data: {risks_count}')
 
     finally:
@@ -1,20 +1,72 @@
 # HR AI Configuration
+import json
 import os
+import sys
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
-from pydantic_settings import BaseSettings
-from pydantic import field_validator
-from typing import List, Optional
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union, get_args, get_origin
 from dotenv import load_dotenv
 
+try:
+    from ahocorasick import Automaton
+except ImportError:  # pyahocorasick is optional; fall back to substring scans
+    Automaton = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; SQLAlchemy falls back to the json module
+    orjson = None
+
 # Get the project root directory (parent of config directory)
 PROJECT_ROOT = Path(__file__).parent.parent
 
-# Load environment variables from .env file
-env_path = PROJECT_ROOT / ".env"
-if env_path.exists():
-    load_dotenv(env_path)
+# Keyword list fields and the category each one reports
+KEYWORD_CATEGORIES = {
+    "meeting_keywords_en": "meeting",
+    "meeting_keywords_ru": "meeting",
+    "training_keywords": "training",
+    "feedback_keywords": "feedback",
+    "hr_process_keywords": "hr_process",
+    "community_keywords": "community",
+    "location_keywords": "location",
+}
+
+@lru_cache(maxsize=4)
+def _build_keyword_automaton(table: Tuple[Tuple[str, FrozenSet[str]], ...]):
+    """Compile (keyword, categories) pairs into a single Aho-Corasick automaton."""
+    if Automaton is None or not table:
+        return None
+    automaton = Automaton()
+    for keyword, categories in table:
+        automaton.add_word(keyword, (keyword, categories))
+    automaton.make_automaton()
+    return automaton
+
+def _parse_list(value: str) -> List[str]:
+    """Parse a list setting from a JSON array or a comma-separated string."""
+    if value.strip().startswith('['):
+        return json.loads(value)
+    return [item.strip() for item in value.split(',') if item.strip()]
 
-class Settings(BaseSettings):
+def _parse_env_value(value: str, annotation: Any) -> Any:
+    """Convert a raw environment string to the type declared on the settings field."""
+    if get_origin(annotation) is Union:  # Optional[X]
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if get_origin(annotation) is list:
+        return _parse_list(value)
+    if annotation is bool:
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if annotation in (int, float):
+        return annotation(value)
+    return value
+
+# dataclass(slots=True) needs Python 3.10+; older versions get a regular class.
+# Hand-written __slots__ would clash with the field defaults stored on the class
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
+class Settings:
     # Application settings
     app_name: str = "HR AI Development Plan Analyzer"
     app_version: str = "1.0.0"
@@ -26,7 +78,7 @@ class Settings(BaseSettings):
     
     # Document settings
     docs_directory: str = "docs"
-    supported_formats: List[str] = [".docx", ".doc", ".pdf"]
+    supported_formats: List[str] = field(default_factory=lambda: [".docx", ".doc", ".pdf"])
     
     # Google Drive settings
     enable_google_drive: bool = False
@@ -40,10 +92,19 @@ class Settings(BaseSettings):
     model_name: str = "gpt-3.5-turbo"
     max_tokens: int = 2000
     temperature: float = 0.3
+    openai_json_mode: bool = True  # JSON-only responses; needs a model with JSON mode support
+    openai_max_concurrent_requests: int = 8  # Requests in flight across all analysis threads
+    openai_max_retries: int = 5  # Retries with backoff on rate limits (429) and server errors
     
     # Database settings
     database_url: str = "sqlite:///hr_ai.db"
     
+    # Cache of AI analysis results keyed by document text hash
+    enable_analysis_cache: bool = True
+    analysis_cache_path: str = "analysis_cache.db"
+    analysis_cache_max_entries: int = 20000  # Rows kept per cache table; 0 = unbounded
+    analysis_cache_max_age_days: int = 180  # Unused entries older than this are deleted; 0 = keep
+    
     # Analysis settings
     analysis_schedule_cron: str = "0 9 * * 1"  # Every Monday at 9 AM
     confidence_threshold: float = 0.7
@@ -56,62 +117,204 @@ class Settings(BaseSettings):
     smtp_port: int = 587
     smtp_username: Optional[str] = None
     smtp_password: Optional[str] = None
-    hr_email_recipients: List[str] = []
-    
-    @field_validator('hr_email_recipients', mode='before')
-    @classmethod
-    def parse_email_recipients(cls, v):
-        if isinstance(v, str):
-            if v.strip():
-                return [email.strip() for email in v.split(',') if email.strip()]
-            else:
-                return []
-        return v
+    hr_email_recipients: List[str] = field(default_factory=list)
     
     # Language settings
     default_language: str = "en"
-    supported_languages: List[str] = ["en", "ru"]
+    supported_languages: List[str] = field(default_factory=lambda: ["en", "ru"])
     
     # Meeting detection settings
-    meeting_keywords_en: List[str] = [
+    meeting_keywords_en: List[str] = field(default_factory=lambda: [
         "meeting", "checkpoint", "review", "discussion", 
         "conversation", "call", "session", "talked", "discussed"
-    ]
-    meeting_keywords_ru: List[str] = [
+    ])
+    meeting_keywords_ru: List[str] = field(default_factory=lambda: [
         "встреча", "обсуждение", "разговор", "созвон", 
         "беседа", "чекпоинт", "ревью", "обговорили"
-    ]
+    ])
     
     # Extraction keywords for different categories
-    training_keywords: List[str] = [
+    training_keywords: List[str] = field(default_factory=lambda: [
         "обучение", "сертификат", "курс", "workshop", "training", 
         "certification", "course", "masterclass", "митап", "meetup"
-    ]
+    ])
     
-    feedback_keywords: List[str] = [
+    feedback_keywords: List[str] = field(default_factory=lambda: [
         "satisfaction", "удовлетворен", "мотивация", "усталость", 
         "выгорание", "дискомфорт", "отношение к компании"
-    ]
+    ])
     
-    hr_process_keywords: List[str] = [
+    hr_process_keywords: List[str] = field(default_factory=lambda: [
         "собеседование", "interview", "assessment", "ассессмент", 
         "HR", "процесс", "предложение"
-    ]
+    ])
     
-    community_keywords: List[str] = [
+    community_keywords: List[str] = field(default_factory=lambda: [
         "комьюнити", "community", "инициатива", "мероприятие", 
         "форум", "forum", "viva engage"
-    ]
+    ])
     
-    location_keywords: List[str] = [
+    location_keywords: List[str] = field(default_factory=lambda: [
         "локация", "location", "релокация", "relocation", 
         "местоположение", "переезд"
-    ]
+    ])
+    
+    # (keyword lists, table, automaton) built by _keyword_index(); not a setting
+    _keyword_cache: Optional[Tuple[Any, ...]] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def keyword_automaton(self):
+        """
+        Aho-Corasick automaton over all keyword lists, values are (keyword, categories).
+        
+        Returns None when pyahocorasick is not installed.
+        """
+        return self._keyword_index()[1]
+    
+    def match_keyword_categories(self, text: str) -> Set[str]:
+        """Return keyword categories (meeting, training, ...) mentioned in text."""
+        text_lower = text.lower()
+        table, automaton = self._keyword_index()
+        
+        hits = set()
+        if automaton is not None:
+            for _, (_, categories) in automaton.iter(text_lower):
+                hits.update(categories)
+        else:
+            for keyword, categories in table:
+                if keyword in text_lower:
+                    hits.update(categories)
+        return hits
+    
+    def _keyword_index(self) -> Tuple[Tuple[Tuple[str, FrozenSet[str]], ...], Any]:
+        """
+        Return (keyword table, automaton), built once per instance.
+        
+        They are rebuilt when a keyword list is replaced (e.g. patched in tests);
+        lists edited in place are not detected.
+        """
+        lists = tuple(getattr(self, field_name) for field_name in KEYWORD_CATEGORIES)
+        cache = self._keyword_cache
+        if cache is None or any(cached is not current for cached, current in zip(cache[0], lists)):
+            table = self._keyword_table()
+            cache = (lists, table, _build_keyword_automaton(table))
+            self._keyword_cache = cache
+        return cache[1], cache[2]
+    
+    def _keyword_table(self) -> Tuple[Tuple[str, FrozenSet[str]], ...]:
+        """Flatten keyword lists into hashable (keyword, categories) pairs."""
+        table: Dict[str, Set[str]] = {}
+        for field_name, category in KEYWORD_CATEGORIES.items():
+            for keyword in getattr(self, field_name):
+                table.setdefault(keyword.lower(), set()).add(category)
+        return tuple((keyword, frozenset(categories)) for keyword, categories in table.items())
     
-    class Config:
-        env_file = str(PROJECT_ROOT / ".env")
-        case_sensitive = False
-        extra = "ignore"  # Allow extra fields in .env
+    @classmethod
+    def _from_env(cls) -> "Settings":
+        """Build settings from environment variables (names are case-insensitive)."""
+        environ = {key.lower(): value for key, value in os.environ.items()}
+        values = {}
+        for settings_field in fields(cls):
+            if not settings_field.init:
+                continue
+            raw = environ.get(settings_field.name)
+            if raw is not None:
+                values[settings_field.name] = _parse_env_value(raw, settings_field.type)
+        return cls(**values)
+    
+    def validate(self) -> "Settings":
+        """Return a copy type-checked by pydantic (optional, not used on the hot path)."""
+        from pydantic import TypeAdapter
+        values = {
+            settings_field.name: getattr(self, settings_field.name)
+            for settings_field in fields(self) if settings_field.init
+        }
+        return TypeAdapter(Settings).validate_python(values)
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the global settings instance, creating it on first use."""
+    # Load environment variables from .env file
+    env_path = PROJECT_ROOT / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+    return Settings._from_env()
+
+def __getattr__(name: str):
+    # Global settings instance, built lazily on first `settings` access
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Global settings instance
-settings = Settings()
\ No newline at end of file
+# SQLite pragmas applied once per pooled connection
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+def _orjson_dumps(value: Any) -> str:
+    """Serialize a JSON column value with orjson (dict keys need not be strings, as with json)."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+def make_engine(database_url: Optional[str] = None, **kwargs):
+    """
+    Create a SQLAlchemy engine for the configured database.
+    
+    File-backed SQLite databases get a small connection pool with WAL-mode
+    pragmas applied on connect, so the database file is opened once per pool
+    slot instead of once per session. All SQLite engines let SQLAlchemy
+    control BEGIN so nested transactions (savepoints) behave correctly.
+    JSON columns are (de)serialized with orjson when it is installed.
+    
+    Args:
+        database_url: Database URL (defaults to settings.database_url)
+        **kwargs: Extra arguments passed to create_engine
+        
+    Returns:
+        SQLAlchemy Engine
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import QueuePool
+    
+    if orjson is not None:
+        kwargs.setdefault("json_serializer", _orjson_dumps)
+        kwargs.setdefault("json_deserializer", orjson.loads)
+    
+    url = database_url or get_settings().database_url
+    if not url.startswith("sqlite"):
+        return create_engine(url, **kwargs)
+    
+    is_memory = ":memory:" in url or url.rstrip("/") == "sqlite:"
+    if is_memory:
+        engine = create_engine(url, **kwargs)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=QueuePool,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            connect_args={"check_same_thread": False},
+            **kwargs
+        )
+    
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite
+        dbapi_connection.isolation_level = None
+        if is_memory:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _begin_sqlite_transaction(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    return engine
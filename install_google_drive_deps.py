@@ -19,16 +19,18 @@ def install_google_drive_deps():
     print("🚀 Installing Google Drive Integration Dependencies")
     print("=" * 55)
     
-    for dep in dependencies:
-        print(f"Installing {dep}...")
-        try:
-            subprocess.check_call([
-                sys.executable, '-m', 'pip', 'install', dep
-            ])
-            print(f"✅ {dep} installed successfully")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install {dep}: {e}")
-            return False
+    print(f"Installing {', '.join(dependencies)}...")
+    try:
+        # Single pip run resolves all dependencies together; skip pip's
+        # version self-check and progress rendering
+        subprocess.check_call([
+            sys.executable, '-m', 'pip',
+            '--disable-pip-version-check', '--no-input',
+            'install', '--no-color', '--prefer-binary', *dependencies
+        ])
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed to install dependencies: {e}")
+        return False
     
     print("\n✅ All Google Drive dependencies installed successfully!")
     print("\nNext steps:")
@@ -6,7 +6,11 @@ import sys
 import os
 import argparse
 import asyncio
+import atexit
+import functools
 import logging
+import logging.handlers
+import queue
 from pathlib import Path
 
 # Add src to Python path
@@ -18,15 +22,21 @@ from hr_ai.schedulers.weekly_scheduler import WeeklyScheduler
 from hr_ai.notifications.notifier import NotificationManager
 from config.settings import settings
 
-# Setup logging
+# Setup logging: callers only enqueue records, a background listener
+# thread writes them to the log file and console
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hr_ai.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler('hr_ai.log', delay=True),
+    logging.StreamHandler()
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 def run_analysis():
@@ -63,13 +73,15 @@ def run_scheduler():
         results = scheduler.run_manual_analysis()
         print(f"📊 Результаты анализа: {results}")
         
-        # Start scheduler
-        scheduler.start()
-        print("✅ Планировщик запущен. Нажмите Ctrl+C для остановки.")
+        async def _serve():
+            # Start scheduler inside the running loop and keep it alive
+            scheduler.start()
+            print("✅ Планировщик запущен. Нажмите Ctrl+C для остановки.")
+            await asyncio.Event().wait()
         
         # Keep running
         try:
-            asyncio.get_event_loop().run_forever()
+            asyncio.run(_serve())
         except KeyboardInterrupt:
             print("\n🛑 Остановка планировщика...")
             
@@ -94,8 +106,7 @@ def test_notifications():
     # Send test notification
     if any(results.values()):
         try:
-            loop = asyncio.get_event_loop()
-            success = loop.run_until_complete(
+            success = asyncio.run(
                 notifier.send_instant_alert(
                     employee_name="Тестовый сотрудник",
                     alert_type="system_test",
@@ -114,7 +125,9 @@ def setup_environment():
     print("🔧 Проверка конфигурации...")
     
     # Check if .env file exists
-    if not Path(".env").exists():
+    try:
+        os.stat(".env")
+    except FileNotFoundError:
         print("⚠️ Файл .env не найден. Создаем из примера...")
         try:
             import shutil
@@ -124,9 +137,15 @@ def setup_environment():
             print(f"❌ Ошибка создания .env: {str(e)}")
             return False
     
-    # Check docs directory
+    # Check docs directory and count documents in a single directory pass
     docs_path = Path(settings.docs_directory)
-    if not docs_path.exists():
+    try:
+        with os.scandir(docs_path) as entries:
+            doc_files = [
+                entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(('.docx', '.doc'))
+            ]
+    except FileNotFoundError:
         print(f"⚠️ Папка документов не найдена: {docs_path}")
         try:
             docs_path.mkdir(parents=True, exist_ok=True)
@@ -134,9 +153,8 @@ def setup_environment():
         except Exception as e:
             print(f"❌ Ошибка создания папки: {str(e)}")
             return False
+        doc_files = []
     
-    # Check for documents
-    doc_files = list(docs_path.glob("*.docx")) + list(docs_path.glob("*.doc"))
     print(f"📄 Найдено документов: {len(doc_files)}")
     
     # Check AI configuration
@@ -159,15 +177,21 @@ def setup_environment():
     print("✅ Проверка конфигурации завершена\n")
     return True
 
-def main():
-    """Main entry point."""
+COMMANDS = ("web", "analyze", "schedule", "test-notifications", "setup")
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser once per process."""
     parser = argparse.ArgumentParser(description="HR AI - Система анализа планов индивидуального развития")
-    parser.add_argument("command", choices=["web", "analyze", "schedule", "test-notifications", "setup"], 
+    parser.add_argument("command", choices=COMMANDS, 
                        help="Команда для выполнения")
     parser.add_argument("--port", type=int, default=settings.port, help="Порт для веб-сервера")
     parser.add_argument("--host", default=settings.host, help="Хост для веб-сервера")
-    
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main entry point."""
+    args = _build_parser().parse_args()
     
     print("🤖 HR AI - Система анализа планов индивидуального развития")
     print("=" * 60)
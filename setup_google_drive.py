@@ -9,6 +9,14 @@ import json
 from pathlib import Path
 from config.settings import settings
 
+# Environment variables reported by check_environment()
+GOOGLE_DRIVE_ENV_VARS = (
+    'ENABLE_GOOGLE_DRIVE',
+    'GOOGLE_CREDENTIALS_FILE',
+    'GOOGLE_DRIVE_FOLDER_ID',
+    'GOOGLE_TOKEN_FILE'
+)
+
 def setup_google_drive():
     """Setup Google Drive integration."""
     print("🚀 HR AI - Google Drive Integration Setup")
@@ -103,16 +111,9 @@ def check_environment():
     """Check current environment setup."""
     print("\n🔍 Environment Check:")
     
-    env_vars = [
-        'ENABLE_GOOGLE_DRIVE',
-        'GOOGLE_CREDENTIALS_FILE', 
-        'GOOGLE_DRIVE_FOLDER_ID',
-        'GOOGLE_TOKEN_FILE'
-    ]
-    
-    for var in env_vars:
-        value = os.getenv(var, 'Not set')
-        print(f"  {var}: {value}")
+    env = os.environ
+    for var in GOOGLE_DRIVE_ENV_VARS:
+        print(f"  {var}: {env.get(var, 'Not set')}")
     
     # Check if .env file exists
     env_path = Path('.env')
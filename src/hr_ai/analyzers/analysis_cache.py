@@ -0,0 +1,243 @@
+"""
+Content-addressed cache for AI analysis results.
+Avoids repeating OpenAI calls for documents whose text has already been analyzed.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+import logging
+
+from .text_analyzer import MeetingAnalysis, ExtractedInformation
+
+try:
+    from blake3 import blake3 as _content_hasher
+except ImportError:
+    _content_hasher = hashlib.sha256
+
+logger = logging.getLogger(__name__)
+
+# Tables bounded by AnalysisCache; each row records when it was stored or last
+# reused (stored_at) and the text hash of the document it belongs to (text_hash)
+CACHE_TABLES = ('analysis_cache', 'response_cache')
+
+# Share of max_entries a table may grow past the cap before it is trimmed back;
+# each trim walks max_entries index entries, so writes pay for it in turns
+EVICTION_SLACK = 0.1
+
+class AnalysisCache:
+    """SQLite-backed cache of meeting/extraction results keyed by document text hash."""
+    
+    def __init__(self, path: str, analyzer_version: str,
+                 max_entries: Optional[int] = None, max_age_days: Optional[float] = None):
+        """
+        Open (or create) the cache database.
+        
+        Args:
+            path: Path to the SQLite cache file
+            analyzer_version: Prompt/model version; part of every cache key so
+                prompt or model changes never return stale results
+            max_entries: Rows kept per table; the least recently stored go first
+            max_age_days: Rows not stored or reused for this long are deleted
+        """
+        self.analyzer_version = analyzer_version
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        # Plain sqlite3 keeps lookups free of ORM overhead; the connection is
+        # shared between analysis worker threads behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "content_hash TEXT PRIMARY KEY, "
+            "analyzer_version TEXT NOT NULL, "
+            "meeting_json TEXT NOT NULL, "
+            "extracted_json TEXT NOT NULL, "
+            "stored_at REAL NOT NULL DEFAULT 0, "
+            "text_hash TEXT)"
+        )
+        # Raw OpenAI responses per request, for documents whose text changed
+        # only outside the parts a request looks at
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "request_hash TEXT PRIMARY KEY, "
+            "response TEXT NOT NULL, "
+            "stored_at REAL NOT NULL DEFAULT 0, "
+            "text_hash TEXT)"
+        )
+        for table in CACHE_TABLES:
+            self._add_bookkeeping_columns(table)
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_stored_at ON {table} (stored_at)")
+        self._conn.commit()
+        # Running row counts per table, so puts don't count the table to enforce the cap
+        self._row_counts = {table: self._count_rows(table) for table in CACHE_TABLES}
+    
+    def _count_rows(self, table: str) -> int:
+        """Count the rows of a cache table."""
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def _add_bookkeeping_columns(self, table: str) -> None:
+        """Add stored_at/text_hash to tables created by older versions."""
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if 'stored_at' not in columns:
+            # Rows from before the columns existed count as oldest and are evicted first
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+        if 'text_hash' not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN text_hash TEXT")
+    
+    @staticmethod
+    def text_hash(full_text: str) -> str:
+        """Hash document text the same way as Document.text_hash."""
+        return _content_hasher(full_text.encode('utf-8')).hexdigest()
+    
+    def content_hash(self, full_text: str) -> str:
+        """Hash document text together with the analyzer version."""
+        hasher = _content_hasher()
+        hasher.update(self.analyzer_version.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(full_text.encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def get(self, content_hash: str) -> Optional[Tuple[MeetingAnalysis, ExtractedInformation]]:
+        """Return cached results for a content hash, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT meeting_json, extracted_json FROM analysis_cache WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        try:
+            return (
+                MeetingAnalysis.model_validate_json(row[0]),
+                ExtractedInformation.model_validate_json(row[1])
+            )
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable analysis cache entry {content_hash[:8]}...: {e}")
+            return None
+    
+    def put(self, content_hash: str, meeting_analysis: MeetingAnalysis, extracted_info: ExtractedInformation,
+            text_hash: Optional[str] = None) -> None:
+        """Store results for a content hash, replacing any previous entry."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(content_hash, analyzer_version, meeting_json, extracted_json, stored_at, text_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    content_hash,
+                    self.analyzer_version,
+                    meeting_analysis.model_dump_json(),
+                    extracted_info.model_dump_json(),
+                    time.time(),
+                    text_hash
+                )
+            )
+            self._row_counts['analysis_cache'] += 1
+            self._evict('analysis_cache')
+            self._conn.commit()
+    
+    def request_hash(self, request: Dict[str, Any]) -> str:
+        """Hash OpenAI request arguments together with the analyzer version."""
+        hasher = _content_hasher()
+        hasher.update(self.analyzer_version.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(json.dumps(request, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def get_response(self, request_hash: str, text_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Return the stored response for a request hash, or None on a miss.
+        
+        A hit is handed over to the requesting document (text_hash) and counts
+        as freshly stored, so responses still in use are not evicted or pruned.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM response_cache WHERE request_hash = ?",
+                (request_hash,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE response_cache SET stored_at = ?, text_hash = COALESCE(?, text_hash) "
+                    "WHERE request_hash = ?",
+                    (time.time(), text_hash, request_hash)
+                )
+                self._conn.commit()
+        return row[0] if row else None
+    
+    def put_response(self, request_hash: str, response: str, text_hash: Optional[str] = None) -> None:
+        """Store the response for a request hash, replacing any previous entry."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (request_hash, response, stored_at, text_hash) "
+                "VALUES (?, ?, ?, ?)",
+                (request_hash, response, time.time(), text_hash)
+            )
+            self._row_counts['response_cache'] += 1
+            self._evict('response_cache')
+            self._conn.commit()
+    
+    def _evict(self, table: str) -> None:
+        """
+        Delete rows past the age limit and trim tables grown past the row cap (lock held).
+        
+        The age check is a range seek on the stored_at index. The cap is enforced
+        lazily: a table may exceed max_entries by EVICTION_SLACK before it is
+        trimmed back to the max_entries most recently stored rows.
+        """
+        if self.max_age_days is not None:
+            self._row_counts[table] -= self._conn.execute(
+                f"DELETE FROM {table} WHERE stored_at < ?",
+                (time.time() - self.max_age_days * 86400,)
+            ).rowcount
+        if self.max_entries is None:
+            return
+        # Replacing an existing row also increments the running count, so it can
+        # only run ahead of the table; the recount after a trim corrects it
+        if self._row_counts[table] > self.max_entries + max(1, int(self.max_entries * EVICTION_SLACK)):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE stored_at <= "
+                f"(SELECT stored_at FROM {table} ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._row_counts[table] = self._count_rows(table)
+    
+    def prune(self, live_text_hashes: Iterable[str]) -> int:
+        """
+        Delete entries whose document text is no longer stored.
+        
+        Args:
+            live_text_hashes: Text hashes of the current documents (Document.text_hash)
+            
+        Returns:
+            Number of deleted rows
+        """
+        deleted = 0
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS live_text_hashes (text_hash TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM live_text_hashes")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO live_text_hashes VALUES (?)",
+                ((text_hash,) for text_hash in live_text_hashes)
+            )
+            for table in CACHE_TABLES:
+                table_deleted = self._conn.execute(
+                    f"DELETE FROM {table} WHERE text_hash IS NULL "
+                    f"OR text_hash NOT IN (SELECT text_hash FROM live_text_hashes)"
+                ).rowcount
+                self._row_counts[table] -= table_deleted
+                deleted += table_deleted
+            self._conn.execute("DELETE FROM live_text_hashes")
+            self._conn.commit()
+        return deleted
+    
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
@@ -3,35 +3,103 @@ Main HR analysis engine that coordinates document parsing, AI analysis, and resu
 """
 
 import hashlib
+import mmap
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
 import logging
 
-from sqlalchemy import create_engine
+from sqlalchemy import and_, case, delete, func, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker
 
-from config.settings import settings
-from ..parsers.enhanced_document_parser import EnhancedDocumentParser
-from ..parsers.document_parser import DocumentParseError
-from ..analyzers.text_analyzer import TextAnalyzer, MeetingAnalysis, ExtractedInformation
-from ..models.database import Base, Document, Employee, MeetingAnalysis as MeetingAnalysisDB, ExtractedInformation as ExtractedInformationDB
+from config.settings import settings, make_engine
+from ..models.database import EXTRACTED_FIELDS, prepare_database, extracted_item_rows, Document, Employee, MeetingAnalysis as MeetingAnalysisDB, ExtractedInformation as ExtractedInformationDB, ExtractedItem as ExtractedItemDB
+
+try:
+    from blake3 import blake3 as _content_hasher
+except ImportError:  # blake3 is optional; SHA-256 uses hardware SHA extensions where present
+    _content_hasher = hashlib.sha256
+
+# Parsers and the OpenAI client are imported on first use (see the
+# document_parser / text_analyzer properties) to keep CLI startup fast
+if TYPE_CHECKING:
+    from ..analyzers.analysis_cache import AnalysisCache
+    from ..analyzers.text_analyzer import TextAnalyzer, MeetingAnalysis, ExtractedInformation
+    from ..parsers.enhanced_document_parser import EnhancedDocumentParser
 
 logger = logging.getLogger(__name__)
 
+# Files larger than this are hashed from a memory map in one update() call
+MMAP_HASH_THRESHOLD = 1024 * 1024
+
+# Paths per IN (...) query when preloading documents (SQLite variable limit)
+PRELOAD_BATCH_SIZE = 500
+
+# Analyzed documents per transaction in the batch analyze loops
+COMMIT_BATCH_SIZE = 100
+
+# Worker threads for parsing and AI calls; both are mostly I/O-bound
+ANALYSIS_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+# Training item statuses reported as requests in the analysis summary
+TRAINING_REQUEST_STATUSES = ('planned', 'interested')
+
+# Rows fetched per round-trip when streaming summary queries
+SUMMARY_FETCH_SIZE = 500
+
 class HRAnalyzer:
     """Main coordinator for HR document analysis."""
     
     def __init__(self, database_url: str = None):
         self.database_url = database_url or settings.database_url
-        self.engine = create_engine(self.database_url)
-        Base.metadata.create_all(self.engine)
+        self.engine = make_engine(self.database_url)
+        prepare_database(self.engine)
         
-        Session = sessionmaker(bind=self.engine)
+        # Keep loaded rows usable after commit so preloaded documents are not re-fetched
+        Session = sessionmaker(bind=self.engine, expire_on_commit=False)
         self.session = Session()
         
-        self.document_parser = EnhancedDocumentParser(settings.docs_directory)
-        self.text_analyzer = TextAnalyzer()
+        # Settings read on every stored document, resolved once
+        self._analysis_method = 'ai' if settings.openai_api_key else 'fallback'
+        self._extraction_method = 'ai' if settings.openai_api_key else 'keyword'
+        self._confidence_threshold = settings.confidence_threshold
+    
+    @cached_property
+    def document_parser(self) -> 'EnhancedDocumentParser':
+        """Document parser, created on first use."""
+        from ..parsers.enhanced_document_parser import EnhancedDocumentParser
+        return EnhancedDocumentParser(settings.docs_directory)
+    
+    @cached_property
+    def text_analyzer(self) -> 'TextAnalyzer':
+        """AI text analyzer, created on first use."""
+        from ..analyzers.text_analyzer import TextAnalyzer
+        return TextAnalyzer(response_cache=self.analysis_cache)
+    
+    @cached_property
+    def _extraction_executor(self) -> ThreadPoolExecutor:
+        """Pool for extraction requests issued alongside meeting analysis requests."""
+        # Separate from the per-document pool so a worker never waits on its own pool
+        return ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='hr-extract')
+    
+    @cached_property
+    def analysis_cache(self) -> Optional['AnalysisCache']:
+        """Cache of AI results, or None when AI analysis is not active."""
+        # Cache only AI results; the fallback analysis is cheap to recompute.
+        # The text analyzer has an OpenAI client exactly when an API key is set
+        if not (settings.enable_analysis_cache and settings.openai_api_key):
+            return None
+        from ..analyzers.analysis_cache import AnalysisCache
+        from ..analyzers.text_analyzer import TextAnalyzer
+        return AnalysisCache(
+            settings.analysis_cache_path,
+            f"{TextAnalyzer.VERSION}:{settings.model_name}",
+            max_entries=settings.analysis_cache_max_entries or None,
+            max_age_days=settings.analysis_cache_max_age_days or None
+        )
     
     def analyze_all_documents(self, force_reanalyze: bool = False) -> Dict[str, Any]:
         """
@@ -60,13 +128,18 @@ class HRAnalyzer:
             'hr_attention_required': []
         }
         
-        for file_info in files_info:
-            try:
-                logger.info(f"Processing file: {file_info['file_path']}")
-                result = self.analyze_document(file_info['file_path'], force_reanalyze)
-                if result:
+        file_paths = [file_info['file_path'] for file_info in files_info]
+        
+        with self.session.no_autoflush:
+            for file_path, result, error in self._analyze_files(file_paths, force_reanalyze):
+                if error is not None:
+                    logger.error(f"Error analyzing {file_path}: {str(error)}")
+                    results['errors'] += 1
+                elif result:
                     logger.info(f"Successfully analyzed: {result['employee_name']}")
                     results['processed'] += 1
+                    if results['processed'] % COMMIT_BATCH_SIZE == 0:
+                        self.session.commit()
                     if result.get('new_analysis'):
                         results['new_analyses'] += 1
                     else:
@@ -80,73 +153,313 @@ class HRAnalyzer:
                     if result.get('requires_hr_attention'):
                         results['hr_attention_required'].append({
                             'employee': result.get('employee_name'),
-                            'file': file_info['file_path'],
+                            'file': file_path,
                             'reason': result.get('attention_reason')
                         })
                 else:
-                    logger.info(f"Skipped (already processed): {file_info['file_path']}")
-                        
-            except Exception as e:
-                logger.error(f"Error analyzing {file_info['file_path']}: {str(e)}")
-                results['errors'] += 1
+                    logger.info(f"Skipped (already processed): {file_path}")
+            
+            self.session.commit()
+        
+        self._prune_analysis_cache()
         
         logger.info(f"Analysis complete: {results}")
         return results
     
-    def analyze_document(self, file_path: str, force_reanalyze: bool = False) -> Optional[Dict[str, Any]]:
+    def analyze_document(self, file_path: str, force_reanalyze: bool = False,
+                         existing_docs: Optional[Dict[str, Document]] = None,
+                         commit: bool = True) -> Optional[Dict[str, Any]]:
         """
         Analyze a single document.
         
         Args:
             file_path: Path to the document
             force_reanalyze: Force reanalysis even if unchanged
+            existing_docs: Preloaded documents keyed by file path (see _preload_docs)
+            commit: Commit immediately; if False, writes go into a savepoint and
+                the caller commits the batch
             
         Returns:
             Analysis results or None if skipped
         """
+        if existing_docs is not None:
+            existing_doc = existing_docs.get(file_path)
+        else:
+            existing_doc = self.session.query(Document).filter_by(file_path=file_path).first()
+        
+        doc_state = self._document_state(existing_doc)
+        file_stat = self._stat_file(file_path)
+        if not force_reanalyze and self._analyze_fast_skip(file_path, doc_state, file_stat):
+            return None
+        
+        analysis = self._parse_and_analyze(file_path, doc_state, force_reanalyze, file_stat)
+        if analysis is None:
+            return None
+        return self._persist_analysis(analysis, existing_doc, commit)
+    
+    def _analyze_files(self, file_paths: List[str], force_reanalyze: bool):
+        """
+        Analyze files concurrently and persist each result on the calling thread.
+        
+        Unchanged files are skipped on the calling thread from a stat() alone;
+        only the rest go to a thread pool for parsing and AI calls. The
+        SQLAlchemy session is only used from the thread consuming this generator.
+        
+        Yields:
+            (file_path, result or None, exception or None); skipped files first,
+            then the rest in completion order
+        """
+        existing_docs = self._preload_docs(file_paths)
+        parsed_at = datetime.now()
+        
+        pending = []
+        for path in file_paths:
+            doc_state = self._document_state(existing_docs.get(path))
+            file_stat = self._stat_file(path)
+            if not force_reanalyze and self._analyze_fast_skip(path, doc_state, file_stat):
+                existing_doc = existing_docs.pop(path, None)
+                if existing_doc is not None:
+                    self.session.expunge(existing_doc)
+                yield path, None, None
+            else:
+                pending.append((path, doc_state, file_stat))
+        
+        if not pending:
+            return
+        
+        # Create the lazy parser/analyzer/cache/pool here rather than racing in the workers
+        self.analysis_cache
+        if self.text_analyzer.client:
+            self._extraction_executor
+        
+        # The Google Drive client is not thread-safe
+        max_workers = 1 if getattr(self.document_parser, 'use_google_drive', False) else ANALYSIS_WORKERS
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._parse_and_analyze, path, doc_state, force_reanalyze, file_stat): path
+                for path, doc_state, file_stat in pending
+            }
+            for future in as_completed(futures):
+                file_path = futures[future]
+                existing_doc = existing_docs.pop(file_path, None)
+                try:
+                    analysis = future.result()
+                    result = None
+                    if analysis is not None:
+                        result = self._persist_analysis(analysis, existing_doc, commit=False, parsed_at=parsed_at)
+                except Exception as e:
+                    yield file_path, None, e
+                else:
+                    yield file_path, result, None
+                finally:
+                    # Its changes are flushed into the transaction by now; detach the
+                    # document so the identity map doesn't grow with the batch
+                    if existing_doc is not None:
+                        self.session.expunge(existing_doc)
+    
+    def _document_state(self, existing_doc: Optional[Document]) -> Optional[Dict[str, Any]]:
+        """Snapshot the change-detection fields of a stored document for worker threads."""
+        if existing_doc is None:
+            return None
+        return {
+            'file_hash': existing_doc.file_hash,
+            'text_hash': existing_doc.text_hash,
+            'file_size': existing_doc.file_size,
+            'file_modified': existing_doc.file_modified
+        }
+    
+    def _stat_file(self, file_path: str) -> Optional[os.stat_result]:
+        """Stat a document, or return None if it is not a local file (e.g. gdrive://)."""
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+    
+    def _analyze_fast_skip(self, file_path: str, doc_state: Optional[Dict[str, Any]],
+                           file_stat: Optional[os.stat_result]) -> bool:
+        """
+        Check whether a stored document is unchanged from its size and mtime alone.
+        
+        This is the common case in repeated batch runs; it avoids parsing,
+        hashing and the text analyzer entirely.
+        """
+        if doc_state is None or file_stat is None:
+            return False
+        if (
+            file_stat.st_size == doc_state['file_size']
+            and datetime.fromtimestamp(file_stat.st_mtime) == doc_state['file_modified']
+        ):
+            logger.info(f"Document unchanged (size/mtime), skipping: {file_path}")
+            return True
+        return False
+    
+    def _parse_and_analyze(self, file_path: str, doc_state: Optional[Dict[str, Any]],
+                           force_reanalyze: bool,
+                           file_stat: Optional[os.stat_result]) -> Optional[Dict[str, Any]]:
+        """
+        Parse and analyze a document without touching the database session.
+        
+        Callers check _analyze_fast_skip first.
+        
+        Args:
+            file_path: Path to the document
+            doc_state: Stored change-detection fields (see _document_state), or None
+            force_reanalyze: Force reanalysis even if unchanged
+            file_stat: Result of _stat_file for the document
+            
+        Returns:
+            Parsed data and analysis results, or None if the document is unchanged.
+            If only the file changed but its text did not, the analysis results
+            are omitted and the stored ones are reused.
+        """
+        from ..parsers.document_parser import DocumentParseError
+        
         try:
             # Parse the document
             document_data = self.document_parser.parse_document(file_path)
             
             # Check if document has changed or needs reanalysis
             file_hash = self._calculate_file_hash(file_path)
-            existing_doc = self.session.query(Document).filter_by(file_path=file_path).first()
             
-            if existing_doc and existing_doc.file_hash == file_hash and not force_reanalyze:
+            if doc_state and doc_state['file_hash'] == file_hash and not force_reanalyze:
                 logger.info(f"Document unchanged, skipping: {file_path} (hash: {file_hash[:8]}...)")
                 return None
             
-            # Store or update document in database
-            doc_record = self._store_document(document_data, file_hash, existing_doc)
-            
-            # Perform AI analysis
-            meeting_analysis = self.text_analyzer.analyze_meeting_occurrence(document_data)
-            extracted_info = self.text_analyzer.extract_structured_information(document_data)
-            
-            # Store analysis results
-            self._store_meeting_analysis(doc_record.id, meeting_analysis)
-            self._store_extracted_information(doc_record.id, extracted_info)
+            analysis = {
+                'document_data': document_data,
+                'file_hash': file_hash,
+                'text_hash': _content_hasher(document_data['full_text'].encode('utf-8')).hexdigest(),
+                'file_size': file_stat.st_size if file_stat else os.path.getsize(file_path),
+                'file_modified': (
+                    datetime.fromtimestamp(file_stat.st_mtime) if file_stat
+                    else datetime.fromisoformat(document_data['file_modified'])
+                )
+            }
             
-            self.session.commit()
+            if doc_state and doc_state['text_hash'] == analysis['text_hash'] and not force_reanalyze:
+                # Re-saved without text changes: only the file metadata needs updating
+                logger.info(f"Document text unchanged, reusing analysis: {file_path}")
+                return analysis
             
-            return {
-                'document_id': doc_record.id,
-                'employee_name': document_data['employee_name'],
-                'meeting_occurred': meeting_analysis.meeting_occurred,
-                'requires_hr_attention': meeting_analysis.requires_hr_attention,
-                'attention_reason': self._get_attention_reason(meeting_analysis, extracted_info),
-                'new_analysis': existing_doc is None,
-                'confidence_score': meeting_analysis.confidence_score
-            }
+            analysis['meeting_analysis'], analysis['extracted_info'] = self._run_text_analysis(document_data)
+            return analysis
             
         except DocumentParseError as e:
             logger.error(f"Parse error for {file_path}: {str(e)}")
             raise
         except Exception as e:
             logger.error(f"Analysis error for {file_path}: {str(e)}")
-            self.session.rollback()
             raise
     
+    def _run_text_analysis(self, document_data: Dict[str, Any]):
+        """Run AI analysis, reusing cached results for identical document text."""
+        content_hash = None
+        if self.analysis_cache is not None:
+            full_text = document_data.get('full_text', '')
+            content_hash = self.analysis_cache.content_hash(full_text)
+            cached = self.analysis_cache.get(content_hash)
+            if cached is not None:
+                logger.info(f"Analysis cache hit for {document_data['file_path']}")
+                return cached
+        
+        # Perform AI analysis
+        if self.text_analyzer.client:
+            # Both calls are HTTP-bound: run the extraction request while this
+            # thread waits on the meeting analysis
+            extraction = self._extraction_executor.submit(
+                self.text_analyzer.extract_structured_information_with_status, document_data
+            )
+            meeting_analysis, meeting_final = self.text_analyzer.analyze_meeting_occurrence_with_status(document_data)
+            extracted_info, extraction_final = extraction.result()
+        else:
+            meeting_analysis, meeting_final = self.text_analyzer.analyze_meeting_occurrence_with_status(document_data)
+            extracted_info, extraction_final = self.text_analyzer.extract_structured_information_with_status(document_data)
+        
+        # Fallbacks after an API error are retried on the next run instead of cached
+        if content_hash is not None and meeting_final and extraction_final:
+            self.analysis_cache.put(
+                content_hash, meeting_analysis, extracted_info,
+                text_hash=self.analysis_cache.text_hash(full_text)
+            )
+        
+        return meeting_analysis, extracted_info
+    
+    def _prune_analysis_cache(self) -> None:
+        """Drop cached AI results of document texts that are no longer stored."""
+        # Don't open the cache just to prune it
+        analysis_cache = self.__dict__.get('analysis_cache')
+        if analysis_cache is None:
+            return
+        live_text_hashes = self.session.query(Document.text_hash).filter(
+            Document.text_hash.isnot(None)
+        ).yield_per(SUMMARY_FETCH_SIZE)
+        deleted = analysis_cache.prune(text_hash for text_hash, in live_text_hashes)
+        if deleted:
+            logger.info(f"Pruned {deleted} analysis cache entries of removed or edited documents")
+    
+    def _persist_analysis(self, analysis: Dict[str, Any], existing_doc: Optional[Document],
+                          commit: bool = True, parsed_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Store a document and its analysis results.
+        
+        Args:
+            analysis: Output of _parse_and_analyze
+            existing_doc: Stored document to update, or None to create one
+            commit: Commit immediately; if False, writes go into a savepoint
+            parsed_at: Timestamp shared by a batch; defaults to now
+            
+        Returns:
+            Analysis results summary
+        """
+        document_data = analysis['document_data']
+        meeting_analysis = analysis.get('meeting_analysis')
+        extracted_info = analysis.get('extracted_info')
+        parsed_at = parsed_at or datetime.now()
+        
+        savepoint = None if commit else self.session.begin_nested()
+        try:
+            if meeting_analysis is None:
+                # Text unchanged: refresh file metadata and reuse the stored analysis
+                document_id = self._update_document_metadata(analysis, existing_doc, parsed_at)
+                meeting_analysis, extracted_info = self._load_stored_analysis(document_id)
+                if meeting_analysis is None:
+                    # Nothing stored to reuse (e.g. an earlier run failed part-way)
+                    meeting_analysis, extracted_info = self._run_text_analysis(document_data)
+                    self._store_meeting_analysis(document_id, meeting_analysis)
+                    self._store_extracted_information(document_id, extracted_info)
+            else:
+                # Store or update document in database
+                document_id = self._store_document(analysis, existing_doc, parsed_at)
+                
+                # Store analysis results
+                self._store_meeting_analysis(document_id, meeting_analysis)
+                self._store_extracted_information(document_id, extracted_info)
+            
+            if savepoint is not None:
+                savepoint.commit()
+            else:
+                self.session.commit()
+            
+        except Exception as e:
+            logger.error(f"Analysis error for {document_data['file_path']}: {str(e)}")
+            if savepoint is not None:
+                # Only discard this document's writes, keep the rest of the batch
+                savepoint.rollback()
+            else:
+                self.session.rollback()
+            raise
+        
+        return {
+            'document_id': document_id,
+            'employee_name': document_data['employee_name'],
+            'meeting_occurred': meeting_analysis.meeting_occurred,
+            'requires_hr_attention': meeting_analysis.requires_hr_attention,
+            'attention_reason': self._get_attention_reason(meeting_analysis, extracted_info),
+            'new_analysis': existing_doc is None,
+            'confidence_score': meeting_analysis.confidence_score
+        }
+    
     def analyze_recent_documents(self, days: int = 7) -> Dict[str, Any]:
         """
         Analyze only documents modified in the last N days.
@@ -159,14 +472,15 @@ class HRAnalyzer:
         """
         recent_files = self.document_parser.get_recently_modified_files(days)
         
+        now = datetime.now()
         if not recent_files:
             logger.info(f"No documents modified in the last {days} days")
             return {
                 'total_files': 0,
                 'processed': 0,
                 'errors': 0,
-                'period_start': (datetime.now() - timedelta(days=days)).isoformat(),
-                'period_end': datetime.now().isoformat()
+                'period_start': (now - timedelta(days=days)).isoformat(),
+                'period_end': now.isoformat()
             }
         
         logger.info(f"Analyzing {len(recent_files)} recently modified documents")
@@ -180,15 +494,19 @@ class HRAnalyzer:
             'meetings_detected': 0,
             'meetings_missed': 0,
             'hr_attention_required': [],
-            'period_start': (datetime.now() - timedelta(days=days)).isoformat(),
-            'period_end': datetime.now().isoformat()
+            'period_start': (now - timedelta(days=days)).isoformat(),
+            'period_end': now.isoformat()
         }
         
-        for file_path in recent_files:
-            try:
-                result = self.analyze_document(file_path, force_reanalyze=False)
-                if result:
+        with self.session.no_autoflush:
+            for file_path, result, error in self._analyze_files(recent_files, force_reanalyze=False):
+                if error is not None:
+                    logger.error(f"Error analyzing {file_path}: {str(error)}")
+                    results['errors'] += 1
+                elif result:
                     results['processed'] += 1
+                    if results['processed'] % COMMIT_BATCH_SIZE == 0:
+                        self.session.commit()
                     if result.get('new_analysis'):
                         results['new_analyses'] += 1
                     else:
@@ -206,10 +524,8 @@ class HRAnalyzer:
                             'reason': result.get('attention_reason'),
                             'confidence': result.get('confidence_score')
                         })
-                        
-            except Exception as e:
-                logger.error(f"Error analyzing {file_path}: {str(e)}")
-                results['errors'] += 1
+            
+            self.session.commit()
         
         return results
     
@@ -226,20 +542,27 @@ class HRAnalyzer:
         """
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        # Query recent documents
-        query = self.session.query(Document).filter(Document.parsed_at >= cutoff_date)
+        # Recent documents, shared by every query below
+        doc_filters = [Document.parsed_at >= cutoff_date]
         if employee_name:
-            query = query.filter(Document.employee_name.ilike(f"%{employee_name}%"))
+            doc_filters.append(Document.employee_name.ilike(f"%{employee_name}%"))
+        
+        # Document and meeting counts in a single aggregate query
+        total_documents, meetings_total, meetings_occurred = self.session.query(
+            func.count(Document.id),
+            func.count(MeetingAnalysisDB.id),
+            func.coalesce(func.sum(case((MeetingAnalysisDB.meeting_occurred.is_(True), 1), else_=0)), 0)
+        ).outerjoin(MeetingAnalysisDB, MeetingAnalysisDB.document_id == Document.id).filter(*doc_filters).one()
         
-        documents = query.all()
+        employees = self.session.query(Document.employee_name).filter(*doc_filters).distinct().yield_per(SUMMARY_FETCH_SIZE)
         
         summary = {
             'period_days': days,
-            'total_documents': len(documents),
-            'employees': set(),
-            'meetings_total': 0,
-            'meetings_occurred': 0,
-            'meetings_missed': 0,
+            'total_documents': total_documents,
+            'employees': [name for name, in employees],
+            'meetings_total': meetings_total,
+            'meetings_occurred': meetings_occurred,
+            'meetings_missed': meetings_total - meetings_occurred,
             'hr_attention_cases': [],
             'key_insights': {
                 'training_requests': [],
@@ -248,72 +571,103 @@ class HRAnalyzer:
             }
         }
         
-        for doc in documents:
-            summary['employees'].add(doc.employee_name)
-            
-            # Get meeting analysis
-            meeting_analysis = self.session.query(MeetingAnalysisDB).filter_by(document_id=doc.id).first()
-            if meeting_analysis:
-                summary['meetings_total'] += 1
-                if meeting_analysis.meeting_occurred:
-                    summary['meetings_occurred'] += 1
-                else:
-                    summary['meetings_missed'] += 1
-                
-                if meeting_analysis.requires_hr_attention:
-                    summary['hr_attention_cases'].append({
-                        'employee': doc.employee_name,
-                        'type': 'missed_meeting',
-                        'confidence': meeting_analysis.confidence_score,
-                        'evidence': meeting_analysis.evidence
-                    })
-            
-            # Get extracted information for insights
-            extracted_info = self.session.query(ExtractedInformationDB).filter_by(document_id=doc.id).first()
-            if extracted_info:
-                # Training insights
-                if extracted_info.training_development:
-                    for item in extracted_info.training_development:
-                        if item.get('status') in ['planned', 'interested']:
-                            summary['key_insights']['training_requests'].append({
-                                'employee': doc.employee_name,
-                                'content': item.get('content'),
-                                'category': item.get('category')
-                            })
-                
-                # Feedback concerns
-                if extracted_info.feedback_motivation:
-                    for item in extracted_info.feedback_motivation:
-                        if item.get('sentiment') == 'negative':
-                            summary['key_insights']['feedback_concerns'].append({
-                                'employee': doc.employee_name,
-                                'content': item.get('content'),
-                                'context': item.get('context', '')[:100]
-                            })
-                
-                # Relocation plans
-                if extracted_info.location_relocation:
-                    for item in extracted_info.location_relocation:
-                        if 'relocation' in item.get('category', '').lower():
-                            summary['key_insights']['relocation_plans'].append({
-                                'employee': doc.employee_name,
-                                'content': item.get('content'),
-                                'context': item.get('context', '')[:100]
-                            })
-        
-        summary['employees'] = list(summary['employees'])
+        # Only load evidence for cases that need attention
+        attention_rows = self.session.query(
+            Document.employee_name, MeetingAnalysisDB.confidence_score, MeetingAnalysisDB.evidence
+        ).join(MeetingAnalysisDB, MeetingAnalysisDB.document_id == Document.id).filter(
+            *doc_filters, MeetingAnalysisDB.requires_hr_attention.is_(True)
+        ).order_by(Document.id).yield_per(SUMMARY_FETCH_SIZE)
+        
+        for doc_employee, confidence_score, evidence in attention_rows:
+            summary['hr_attention_cases'].append({
+                'employee': doc_employee,
+                'type': 'missed_meeting',
+                'confidence': confidence_score,
+                'evidence': evidence
+            })
+        
+        # Insights come from the flattened items in one pass: each branch of the
+        # OR is an indexed (field, status/sentiment) probe, and context is
+        # truncated in SQL so long passages are never transferred
+        insight_rows = self.session.query(
+            ExtractedItemDB.field,
+            Document.employee_name,
+            ExtractedItemDB.content,
+            ExtractedItemDB.category,
+            func.substr(func.coalesce(ExtractedItemDB.context, ''), 1, 100)
+        ).join(ExtractedItemDB, ExtractedItemDB.document_id == Document.id).filter(
+            *doc_filters,
+            or_(
+                and_(ExtractedItemDB.field == 'training_development',
+                     ExtractedItemDB.status.in_(TRAINING_REQUEST_STATUSES)),
+                and_(ExtractedItemDB.field == 'feedback_motivation',
+                     ExtractedItemDB.sentiment == 'negative'),
+                and_(ExtractedItemDB.field == 'location_relocation',
+                     func.lower(ExtractedItemDB.category).contains('relocation'))
+            )
+        ).order_by(Document.id, ExtractedItemDB.id).yield_per(SUMMARY_FETCH_SIZE)
+        
+        key_insights = summary['key_insights']
+        for field, doc_employee, content, category, context in insight_rows:
+            if field == 'training_development':
+                key_insights['training_requests'].append({
+                    'employee': doc_employee,
+                    'content': content,
+                    'category': category
+                })
+            elif field == 'feedback_motivation':
+                key_insights['feedback_concerns'].append({
+                    'employee': doc_employee,
+                    'content': content,
+                    'context': context
+                })
+            else:
+                key_insights['relocation_plans'].append({
+                    'employee': doc_employee,
+                    'content': content,
+                    'context': context
+                })
+        
         return summary
     
+    def _preload_docs(self, file_paths: List[str]) -> Dict[str, Document]:
+        """Load existing documents for the given paths with batched IN queries."""
+        existing_docs = {}
+        for i in range(0, len(file_paths), PRELOAD_BATCH_SIZE):
+            batch = file_paths[i:i + PRELOAD_BATCH_SIZE]
+            for doc in self.session.query(Document).filter(Document.file_path.in_(batch)):
+                existing_docs[doc.file_path] = doc
+        return existing_docs
+    
     def _calculate_file_hash(self, file_path: str) -> str:
-        """Calculate MD5 hash of file for change detection."""
-        hash_md5 = hashlib.md5()
+        """Calculate BLAKE3 (or SHA-256) hash of file for change detection."""
         with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+            if os.fstat(f.fileno()).st_size > MMAP_HASH_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher = _content_hasher()
+                    hasher.update(mapped)
+                    return hasher.hexdigest()
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                return hashlib.file_digest(f, _content_hasher).hexdigest()
+            # Small files are read and hashed in one call
+            hasher = _content_hasher()
+            hasher.update(f.read())
+            return hasher.hexdigest()
     
-    def _store_document(self, document_data: Dict[str, Any], file_hash: str, existing_doc: Document = None) -> Document:
-        """Store or update document in database."""
+    def _store_document(self, analysis: Dict[str, Any], existing_doc: Optional[Document],
+                        parsed_at: datetime) -> int:
+        """
+        Store or update document in database.
+        
+        Args:
+            analysis: Output of _parse_and_analyze
+            existing_doc: Stored document to update, or None to create one
+            parsed_at: Parse timestamp to record
+            
+        Returns:
+            ID of the stored document
+        """
+        document_data = analysis['document_data']
         if existing_doc:
             # Update existing document
             existing_doc.full_text = document_data['full_text']
@@ -321,75 +675,140 @@ class HRAnalyzer:
             existing_doc.tables = document_data['tables']
             existing_doc.dates_found = document_data['dates_found']
             existing_doc.meeting_sections = document_data['meeting_sections']
-            existing_doc.file_hash = file_hash
-            existing_doc.file_size = os.path.getsize(document_data['file_path'])
-            existing_doc.file_modified = datetime.fromisoformat(document_data['file_modified'])
-            existing_doc.parsed_at = datetime.now()
-            return existing_doc
-        else:
-            # Create new document record
-            doc = Document(
-                file_path=document_data['file_path'],
-                employee_name=document_data['employee_name'],
-                full_text=document_data['full_text'],
-                sections=document_data['sections'],
-                tables=document_data['tables'],
-                dates_found=document_data['dates_found'],
-                meeting_sections=document_data['meeting_sections'],
-                file_hash=file_hash,
-                file_size=os.path.getsize(document_data['file_path']),
-                file_modified=datetime.fromisoformat(document_data['file_modified']),
-                parsed_at=datetime.now()
-            )
+            existing_doc.text_hash = analysis['text_hash']
+            return self._update_document_metadata(analysis, existing_doc, parsed_at)
+        
+        values = {
+            'file_path': document_data['file_path'],
+            'employee_name': document_data['employee_name'],
+            'full_text': document_data['full_text'],
+            'sections': document_data['sections'],
+            'tables': document_data['tables'],
+            'dates_found': document_data['dates_found'],
+            'meeting_sections': document_data['meeting_sections'],
+            'file_hash': analysis['file_hash'],
+            'text_hash': analysis['text_hash'],
+            'file_size': analysis['file_size'],
+            'file_modified': analysis['file_modified'],
+            'parsed_at': parsed_at
+        }
+        
+        if not self.engine.dialect.insert_returning:
+            doc = Document(**values)
             self.session.add(doc)
             self.session.flush()  # Get the ID
-            return doc
+            return doc.id
+        
+        # INSERT ... RETURNING gets the ID in the same statement, without
+        # flushing the rest of the session's pending changes
+        return self.session.execute(
+            insert(Document).values(**values).returning(Document.id)
+        ).scalar_one()
     
-    def _store_meeting_analysis(self, document_id: int, analysis: MeetingAnalysis) -> None:
-        """Store meeting analysis results."""
-        # Remove existing analysis for this document
-        self.session.query(MeetingAnalysisDB).filter_by(document_id=document_id).delete()
-        
-        # Add new analysis
-        db_analysis = MeetingAnalysisDB(
-            document_id=document_id,
-            meeting_occurred=analysis.meeting_occurred,
-            confidence_score=analysis.confidence_score,
-            evidence=analysis.evidence,
-            planned_date=analysis.planned_date,
-            actual_date=analysis.actual_date,
-            meeting_type=analysis.meeting_type,
-            requires_hr_attention=analysis.requires_hr_attention,
-            analysis_method='ai' if settings.openai_api_key else 'fallback'
+    def _update_document_metadata(self, analysis: Dict[str, Any], existing_doc: Document,
+                                  parsed_at: datetime) -> int:
+        """Update the file metadata of a stored document and return its ID."""
+        existing_doc.file_hash = analysis['file_hash']
+        existing_doc.file_size = analysis['file_size']
+        existing_doc.file_modified = analysis['file_modified']
+        existing_doc.parsed_at = parsed_at
+        return existing_doc.id
+    
+    def _load_stored_analysis(self, document_id: int):
+        """
+        Load the stored meeting analysis and extracted information of a document.
+        
+        Returns:
+            Tuple of (MeetingAnalysis, ExtractedInformation), or (None, None) if
+            either is not stored
+        """
+        from ..analyzers.text_analyzer import MeetingAnalysis, ExtractedInformation
+        
+        row = self.session.query(MeetingAnalysisDB, ExtractedInformationDB).join(
+            ExtractedInformationDB, ExtractedInformationDB.document_id == MeetingAnalysisDB.document_id
+        ).filter(MeetingAnalysisDB.document_id == document_id).one_or_none()
+        if row is None:
+            return None, None
+        
+        # Stored values were validated when they were first stored
+        stored_meeting, stored_info = row
+        meeting_analysis = MeetingAnalysis.model_construct(
+            meeting_occurred=stored_meeting.meeting_occurred,
+            confidence_score=stored_meeting.confidence_score,
+            evidence=stored_meeting.evidence or [],
+            planned_date=stored_meeting.planned_date,
+            actual_date=stored_meeting.actual_date,
+            meeting_type=stored_meeting.meeting_type,
+            requires_hr_attention=bool(stored_meeting.requires_hr_attention)
         )
-        self.session.add(db_analysis)
+        extracted_info = ExtractedInformation.model_construct(**{
+            field: getattr(stored_info, field) or [] for field in EXTRACTED_FIELDS
+        })
+        return meeting_analysis, extracted_info
+    
+    def _store_meeting_analysis(self, document_id: int, analysis: 'MeetingAnalysis') -> None:
+        """Store meeting analysis results."""
+        self._upsert_by_document(MeetingAnalysisDB, {
+            'document_id': document_id,
+            'meeting_occurred': analysis.meeting_occurred,
+            'confidence_score': analysis.confidence_score,
+            'evidence': analysis.evidence,
+            'planned_date': analysis.planned_date,
+            'actual_date': analysis.actual_date,
+            'meeting_type': analysis.meeting_type,
+            'requires_hr_attention': analysis.requires_hr_attention,
+            'analyzed_at': datetime.utcnow(),
+            'analysis_method': self._analysis_method
+        })
     
-    def _store_extracted_information(self, document_id: int, extracted_info: ExtractedInformation) -> None:
+    def _store_extracted_information(self, document_id: int, extracted_info: 'ExtractedInformation') -> None:
         """Store extracted information."""
-        # Remove existing extracted info for this document
-        self.session.query(ExtractedInformationDB).filter_by(document_id=document_id).delete()
-        
-        # Add new extracted information
-        db_extracted = ExtractedInformationDB(
-            document_id=document_id,
-            training_development=extracted_info.training_development,
-            feedback_motivation=extracted_info.feedback_motivation,
-            hr_processes=extracted_info.hr_processes,
-            community_engagement=extracted_info.community_engagement,
-            location_relocation=extracted_info.location_relocation,
-            risks_concerns=extracted_info.risks_concerns,
-            extraction_method='ai' if settings.openai_api_key else 'keyword'
+        self._upsert_by_document(ExtractedInformationDB, {
+            'document_id': document_id,
+            'training_development': extracted_info.training_development,
+            'feedback_motivation': extracted_info.feedback_motivation,
+            'hr_processes': extracted_info.hr_processes,
+            'community_engagement': extracted_info.community_engagement,
+            'location_relocation': extracted_info.location_relocation,
+            'risks_concerns': extracted_info.risks_concerns,
+            'extracted_at': datetime.utcnow(),
+            'extraction_method': self._extraction_method
+        })
+        
+        # Replace the flattened items used by the summary queries
+        self.session.execute(delete(ExtractedItemDB).where(ExtractedItemDB.document_id == document_id))
+        extracted = {field: getattr(extracted_info, field) for field in EXTRACTED_FIELDS}
+        rows = extracted_item_rows(document_id, extracted)
+        if rows:
+            self.session.execute(insert(ExtractedItemDB), rows)
+    
+    def _upsert_by_document(self, model, values: Dict[str, Any]) -> None:
+        """Insert or replace the row for values['document_id'] in a single statement."""
+        dialect_name = self.engine.dialect.name
+        if dialect_name == 'sqlite':
+            stmt = sqlite.insert(model).values(**values)
+        elif dialect_name == 'postgresql':
+            stmt = postgresql.insert(model).values(**values)
+        else:
+            # No native upsert: replace the existing row
+            self.session.query(model).filter_by(document_id=values['document_id']).delete()
+            self.session.add(model(**values))
+            return
+        
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['document_id'],
+            set_={key: stmt.excluded[key] for key in values if key != 'document_id'}
         )
-        self.session.add(db_extracted)
+        self.session.execute(stmt)
     
-    def _get_attention_reason(self, meeting_analysis: MeetingAnalysis, extracted_info: ExtractedInformation) -> str:
+    def _get_attention_reason(self, meeting_analysis: 'MeetingAnalysis', extracted_info: 'ExtractedInformation') -> str:
         """Determine why this case requires HR attention."""
         reasons = []
         
         if meeting_analysis.requires_hr_attention:
             if not meeting_analysis.meeting_occurred:
                 reasons.append("Possible missed meeting")
-            if meeting_analysis.confidence_score < settings.confidence_threshold:
+            if meeting_analysis.confidence_score < self._confidence_threshold:
                 reasons.append("Low confidence analysis")
         
         # Check for risk indicators in extracted information
@@ -399,11 +818,7 @@ class HRAnalyzer:
                 reasons.append(f"Multiple risk indicators ({risk_count})")
         
         # Check for negative feedback
-        negative_feedback = [
-            item for item in extracted_info.feedback_motivation 
-            if item.get('sentiment') == 'negative'
-        ]
-        if negative_feedback:
+        if any(item.get('sentiment') == 'negative' for item in extracted_info.feedback_motivation or ()):
             reasons.append("Negative feedback detected")
         
         return "; ".join(reasons) if reasons else "Requires review"
@@ -440,4 +855,11 @@ class HRAnalyzer:
     
     def close(self):
         """Close database session."""
-        self.session.close()
\ No newline at end of file
+        self.session.close()
+        # Don't open the cache just to close it
+        analysis_cache = self.__dict__.get('analysis_cache')
+        if analysis_cache is not None:
+            analysis_cache.close()
+        extraction_executor = self.__dict__.get('_extraction_executor')
+        if extraction_executor is not None:
+            extraction_executor.shutdown()
\ No newline at end of file
@@ -2,34 +2,102 @@
 Recommendation engine for generating development suggestions based on IDP analysis.
 """
 
+import copy
 import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict, Counter
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Any, Tuple
+from collections import defaultdict, Counter, OrderedDict
 import logging
 
-import openai
-from openai import OpenAI
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import Text, case, cast, func, or_
 
-from config.settings import settings
-from ..models.database import Document, ExtractedInformation, MeetingAnalysis
+from config.settings import settings, make_engine
+from ..models.database import Document, ExtractedItem, MeetingAnalysis, prepare_database
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+try:
+    from ahocorasick import Automaton
+except ImportError:  # pyahocorasick is optional; fall back to substring scans
+    Automaton = None
 
 logger = logging.getLogger(__name__)
 
+# Feedback themes and the keywords that signal them
+THEME_KEYWORDS = {
+    'обучение': ['обучение', 'курс', 'сертификат', 'тренинг'],
+    'коммуникация': ['общение', 'коммуникация', 'обратная связь'],
+    'процессы': ['процесс', 'workflow', 'автоматизация'],
+    'нагрузка': ['нагрузка', 'перегрузка', 'усталость', 'время'],
+    'команда': ['команда', 'коллектив', 'сотрудничество'],
+    'развитие': ['развитие', 'рост', 'карьера', 'навыки']
+}
+
+# Relocation destinations (lowercase match -> display name), in priority order
+RELOCATION_CITIES = {
+    'алматы': 'Алматы',
+    'ташкент': 'Ташкент',
+    'москва': 'Москва',
+    'тбилиси': 'Тбилиси',
+    'ереван': 'Ереван',
+    'бишкек': 'Бишкек'
+}
+
+_RELOCATION_CITY_RE = re.compile('|'.join(map(re.escape, RELOCATION_CITIES)))
+
+# Words of risk item contents; merged items join their matches with '; '
+_RISK_WORD_RE = re.compile(r'\w+')
+
+def _build_theme_automaton():
+    """Compile all theme keywords into one Aho-Corasick automaton (None without pyahocorasick)."""
+    if Automaton is None:
+        return None
+    automaton = Automaton()
+    for theme, theme_keywords in THEME_KEYWORDS.items():
+        for keyword in theme_keywords:
+            automaton.add_word(keyword, theme)
+    automaton.make_automaton()
+    return automaton
+
+_THEME_AUTOMATON = _build_theme_automaton()
+
+# Generated results are reused while the analyzed documents are unchanged
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL = timedelta(hours=1)
+
+# Rows fetched per round-trip when streaming extracted items
+ITEM_FETCH_SIZE = 1000
+
+# Employees analyzed concurrently by generate_bulk_employee_recommendations
+BULK_WORKERS = 8
+
 class RecommendationEngine:
     """Generate recommendations for employee development and company improvements."""
     
     def __init__(self):
-        self.engine = create_engine(settings.database_url)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
-        
-        if settings.openai_api_key:
-            self.client = OpenAI(api_key=settings.openai_api_key)
-        else:
-            self.client = None
+        self.engine = make_engine(settings.database_url)
+        # Aggregation reads extracted_items, which may not exist or be filled yet
+        prepare_database(self.engine)
+        # Thread-local sessions, so bulk generation can query from worker threads
+        self.session = scoped_session(sessionmaker(bind=self.engine))
+        
+        # (method, args) -> (data version, generated at, result), least recently used first
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+    
+    @cached_property
+    def client(self) -> Optional['OpenAI']:
+        """OpenAI client, created on first use (None without an API key)."""
+        if not settings.openai_api_key:
+            return None
+        from openai import OpenAI
+        return OpenAI(api_key=settings.openai_api_key)
     
     def generate_employee_recommendations(self, employee_name: str, months_back: int = 12) -> Dict[str, Any]:
         """
@@ -45,35 +113,46 @@ class RecommendationEngine:
         try:
             # Get employee's historical data
             cutoff_date = datetime.now() - timedelta(days=months_back * 30)
-            
-            documents = self.session.query(Document, ExtractedInformation).outerjoin(
-                ExtractedInformation, Document.id == ExtractedInformation.document_id
-            ).filter(
+            doc_filters = [
                 Document.employee_name.ilike(f"%{employee_name}%"),
                 Document.parsed_at >= cutoff_date
-            ).all()
+            ]
+            
+            # End the previous read transaction so the data version sees newly analyzed documents
+            self.session.rollback()
+            data_points, last_parsed_at = self.session.query(
+                func.count(Document.id), func.max(Document.parsed_at)
+            ).filter(*doc_filters).one()
             
-            if not documents:
+            if not data_points:
                 return {
                     'employee_name': employee_name,
                     'recommendations': [],
                     'message': 'Недостаточно данных для анализа'
                 }
             
+            cache_key = ('employee', employee_name, months_back)
+            data_version = (data_points, last_parsed_at)
+            cached = self._get_cached_result(cache_key, data_version)
+            if cached is not None:
+                return cached
+            
             # Analyze patterns
-            patterns = self._analyze_employee_patterns(documents)
+            patterns = self._analyze_employee_patterns(doc_filters)
             
             # Generate recommendations
             recommendations = self._generate_individual_recommendations(patterns, employee_name)
             
-            return {
+            result = {
                 'employee_name': employee_name,
                 'analysis_period_months': months_back,
-                'data_points': len(documents),
+                'data_points': data_points,
                 'patterns': patterns,
                 'recommendations': recommendations,
                 'generated_at': datetime.now().isoformat()
             }
+            self._store_cached_result(cache_key, data_version, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating employee recommendations: {str(e)}")
@@ -83,6 +162,31 @@ class RecommendationEngine:
                 'recommendations': []
             }
     
+    def generate_bulk_employee_recommendations(self, employee_names: List[str], months_back: int = 12) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate recommendations for several employees concurrently.
+        
+        Args:
+            employee_names: Names of the employees
+            months_back: How many months of data to analyze
+            
+        Returns:
+            Recommendations keyed by employee name, in input order
+        """
+        names = list(dict.fromkeys(employee_names))
+        if len(names) <= 1:
+            return {name: self.generate_employee_recommendations(name, months_back) for name in names}
+        
+        def generate(name: str) -> Dict[str, Any]:
+            try:
+                return self.generate_employee_recommendations(name, months_back)
+            finally:
+                # Release the worker thread's session along with the task
+                self.session.remove()
+        
+        with ThreadPoolExecutor(max_workers=min(BULK_WORKERS, len(names))) as executor:
+            return dict(zip(names, executor.map(generate, names)))
+    
     def generate_company_insights(self, months_back: int = 6) -> Dict[str, Any]:
         """
         Generate company-wide insights and improvement recommendations.
@@ -95,35 +199,45 @@ class RecommendationEngine:
         """
         try:
             cutoff_date = datetime.now() - timedelta(days=months_back * 30)
+            doc_filters = [Document.parsed_at >= cutoff_date]
             
-            # Get all recent data
-            documents = self.session.query(Document, ExtractedInformation, MeetingAnalysis).outerjoin(
-                ExtractedInformation, Document.id == ExtractedInformation.document_id
-            ).outerjoin(
-                MeetingAnalysis, Document.id == MeetingAnalysis.document_id
-            ).filter(Document.parsed_at >= cutoff_date).all()
+            # End the previous read transaction so the data version sees newly analyzed documents
+            self.session.rollback()
+            total_documents, total_employees, last_parsed_at = self.session.query(
+                func.count(Document.id),
+                func.count(func.distinct(Document.employee_name)),
+                func.max(Document.parsed_at)
+            ).filter(*doc_filters).one()
             
-            if not documents:
+            if not total_documents:
                 return {
                     'insights': [],
                     'recommendations': [],
                     'message': 'Недостаточно данных для анализа'
                 }
             
+            cache_key = ('company', months_back)
+            data_version = (total_documents, last_parsed_at)
+            cached = self._get_cached_result(cache_key, data_version)
+            if cached is not None:
+                return cached
+            
             # Analyze company-wide patterns
-            insights = self._analyze_company_patterns(documents)
+            insights = self._analyze_company_patterns(doc_filters)
             
             # Generate system recommendations
             recommendations = self._generate_system_recommendations(insights)
             
-            return {
+            result = {
                 'analysis_period_months': months_back,
-                'total_employees': len(set(doc.employee_name for doc, _, _ in documents)),
-                'total_documents': len(documents),
+                'total_employees': total_employees,
+                'total_documents': total_documents,
                 'insights': insights,
                 'recommendations': recommendations,
                 'generated_at': datetime.now().isoformat()
             }
+            self._store_cached_result(cache_key, data_version, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating company insights: {str(e)}")
@@ -133,8 +247,42 @@ class RecommendationEngine:
                 'recommendations': []
             }
     
-    def _analyze_employee_patterns(self, documents: List[Tuple]) -> Dict[str, Any]:
-        """Analyze patterns for a specific employee."""
+    def _get_cached_result(self, cache_key: Tuple, data_version: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Return a previously generated result if it is fresh and its documents are unchanged.
+        
+        Args:
+            cache_key: Method name and arguments of the request
+            data_version: Document count and latest parsed_at in the analyzed range;
+                re-analysis bumps parsed_at and new documents bump the count
+            
+        Returns:
+            Cached result, or None on a miss
+        """
+        with self._result_cache_lock:
+            entry = self._result_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            cached_version, generated_at, result = entry
+            if cached_version != data_version or datetime.now() - generated_at > RESULT_CACHE_TTL:
+                del self._result_cache[cache_key]
+                return None
+            
+            self._result_cache.move_to_end(cache_key)
+        # Deep copy so callers editing the result (or its nested lists) don't alter the cache
+        return copy.deepcopy(result)
+    
+    def _store_cached_result(self, cache_key: Tuple, data_version: Tuple, result: Dict[str, Any]) -> None:
+        """Remember a generated result, evicting the least recently used entry when full."""
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = (data_version, datetime.now(), copy.deepcopy(result))
+            self._result_cache.move_to_end(cache_key)
+            if len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+    
+    def _analyze_employee_patterns(self, doc_filters: List[Any]) -> Dict[str, Any]:
+        """Analyze patterns for a specific employee's documents (matched by doc_filters)."""
         patterns = {
             'training_interests': [],
             'consistent_themes': [],
@@ -144,53 +292,40 @@ class RecommendationEngine:
             'growth_areas': []
         }
         
-        training_items = []
-        feedback_items = []
-        meeting_consistency = []
-        
-        for doc, extracted_info in documents:
-            if extracted_info:
-                # Collect training interests
-                if extracted_info.training_development:
-                    training_items.extend(extracted_info.training_development)
-                
-                # Collect feedback patterns
-                if extracted_info.feedback_motivation:
-                    feedback_items.extend(extracted_info.feedback_motivation)
-                
-                # Check for risk indicators
-                if extracted_info.risks_concerns:
-                    patterns['risk_factors'].extend([
-                        item.get('content', '') for item in extracted_info.risks_concerns
-                    ])
-            
-            # Meeting consistency (you'd need to add this analysis)
-            # This is a simplified version
-            meeting_consistency.append(1 if 'meeting occurred' in str(doc.sections) else 0)
+        # Risk indicators and feedback texts, collected in one pass over the items
+        feedback_texts = []
+        for field, content in self._iter_items(doc_filters, ('risks_concerns', 'feedback_motivation')):
+            if field == 'risks_concerns':
+                patterns['risk_factors'].append(content)
+            else:
+                feedback_texts.append(content)
+        
+        # Meeting consistency (you'd need to add this analysis)
+        # This is a simplified version, averaged in SQL so sections never leave the database
+        meeting_consistency = self.session.query(
+            func.avg(case((self._json_contains(Document.sections, 'meeting occurred'), 1.0), else_=0.0))
+        ).filter(*doc_filters).scalar()
         
         # Analyze training patterns
-        if training_items:
-            categories = [item.get('category', '') for item in training_items]
-            category_counts = Counter(categories)
-            patterns['training_interests'] = [
-                {'category': cat, 'frequency': count} 
-                for cat, count in category_counts.most_common(5)
-            ]
+        patterns['training_interests'] = [
+            {'category': cat, 'frequency': count}
+            for cat, count in self._top_training_categories(doc_filters, '', 5)
+        ]
         
         # Analyze feedback themes
-        if feedback_items:
+        all_feedback = ' '.join(feedback_texts)
+        if all_feedback:
             # Simple keyword analysis for themes
-            all_feedback = ' '.join([item.get('content', '') for item in feedback_items])
             patterns['consistent_themes'] = self._extract_themes(all_feedback)
         
         # Meeting consistency score
-        if meeting_consistency:
-            patterns['meeting_consistency'] = sum(meeting_consistency) / len(meeting_consistency)
+        if meeting_consistency is not None:
+            patterns['meeting_consistency'] = meeting_consistency
         
         return patterns
     
-    def _analyze_company_patterns(self, documents: List[Tuple]) -> Dict[str, Any]:
-        """Analyze company-wide patterns."""
+    def _analyze_company_patterns(self, doc_filters: List[Any]) -> Dict[str, Any]:
+        """Analyze company-wide patterns over the documents matched by doc_filters."""
         insights = {
             'common_training_requests': [],
             'recurring_feedback_themes': [],
@@ -200,59 +335,50 @@ class RecommendationEngine:
             'hr_process_improvements': []
         }
         
-        all_training = []
-        all_feedback = []
-        all_risks = []
-        all_relocations = []
-        all_hr_processes = []
-        meeting_data = []
-        
-        for doc, extracted_info, meeting_analysis in documents:
-            if extracted_info:
-                if extracted_info.training_development:
-                    all_training.extend(extracted_info.training_development)
-                if extracted_info.feedback_motivation:
-                    all_feedback.extend(extracted_info.feedback_motivation)
-                if extracted_info.risks_concerns:
-                    all_risks.extend(extracted_info.risks_concerns)
-                if extracted_info.location_relocation:
-                    all_relocations.extend(extracted_info.location_relocation)
-                if extracted_info.hr_processes:
-                    all_hr_processes.extend(extracted_info.hr_processes)
-            
-            if meeting_analysis:
-                meeting_data.append(meeting_analysis.meeting_occurred)
-        
         # Analyze training requests
-        if all_training:
-            training_categories = [item.get('category', 'unknown') for item in all_training]
-            category_counts = Counter(training_categories)
-            insights['common_training_requests'] = [
-                {'category': cat, 'requests': count}
-                for cat, count in category_counts.most_common(10)
-            ]
+        insights['common_training_requests'] = [
+            {'category': cat, 'requests': count}
+            for cat, count in self._top_training_categories(doc_filters, 'unknown', 10)
+        ]
+        
+        # Negative feedback, risks and relocations in one pass over the items;
+        # relocation cities are counted as the rows stream in
+        negative_texts = []
+        risk_texts = []
+        location_counts = Counter()
+        for field, content in self._iter_items(
+            doc_filters,
+            ('feedback_motivation', 'risks_concerns', 'location_relocation'),
+            or_(ExtractedItem.field != 'feedback_motivation', ExtractedItem.sentiment == 'negative')
+        ):
+            if field == 'feedback_motivation':
+                negative_texts.append(content)
+            elif field == 'risks_concerns':
+                risk_texts.append(content)
+            else:
+                # Extract location names (simplified); one regex scan per item,
+                # the first city in RELOCATION_CITIES wins if several are mentioned
+                found = set(_RELOCATION_CITY_RE.findall(content.lower()))
+                if found:
+                    city = next(city for city in RELOCATION_CITIES if city in found)
+                    location_counts[RELOCATION_CITIES[city]] += 1
         
         # Analyze feedback themes
-        if all_feedback:
-            negative_feedback = [
-                item for item in all_feedback 
-                if item.get('sentiment') == 'negative'
-            ]
-            if negative_feedback:
-                insights['recurring_feedback_themes'] = self._extract_themes(
-                    ' '.join([item.get('content', '') for item in negative_feedback])
-                )
+        negative_feedback = ' '.join(negative_texts)
+        if negative_feedback:
+            insights['recurring_feedback_themes'] = self._extract_themes(negative_feedback)
         
         # Meeting compliance
-        if meeting_data:
-            insights['meeting_compliance'] = sum(meeting_data) / len(meeting_data)
-        
-        # Risk patterns
-        if all_risks:
-            risk_keywords = []
-            for risk in all_risks:
-                risk_keywords.extend(risk.get('content', '').lower().split())
-            risk_counter = Counter(risk_keywords)
+        meeting_compliance = self.session.query(
+            func.avg(case((MeetingAnalysis.meeting_occurred.is_(True), 1.0), else_=0.0))
+        ).join(Document, Document.id == MeetingAnalysis.document_id).filter(*doc_filters).scalar()
+        if meeting_compliance is not None:
+            insights['meeting_compliance'] = meeting_compliance
+        
+        # Risk patterns; one lower() and one word scan over the joined text run in C
+        # instead of per item, and count "усталость; стресс" as two plain words
+        risk_counter = Counter(_RISK_WORD_RE.findall(' '.join(risk_texts).lower()))
+        if risk_counter:
             insights['risk_patterns'] = [
                 {'keyword': word, 'frequency': count}
                 for word, count in risk_counter.most_common(10)
@@ -260,19 +386,7 @@ class RecommendationEngine:
             ]
         
         # Relocation trends
-        if all_relocations:
-            locations = []
-            for reloc in all_relocations:
-                content = reloc.get('content', '').lower()
-                # Extract location names (simplified)
-                if 'алматы' in content:
-                    locations.append('Алматы')
-                elif 'ташкент' in content:
-                    locations.append('Ташкент')
-                elif 'москва' in content:
-                    locations.append('Москва')
-            
-            location_counts = Counter(locations)
+        if location_counts:
             insights['relocation_trends'] = [
                 {'location': loc, 'mentions': count}
                 for loc, count in location_counts.items()
@@ -280,6 +394,35 @@ class RecommendationEngine:
         
         return insights
     
+    def _json_contains(self, column, needle: str):
+        """Case-sensitive substring test on the serialized JSON of a column."""
+        if self.engine.dialect.name == 'sqlite':
+            # LIKE is case-insensitive on SQLite
+            return func.instr(column, needle) > 0
+        return cast(column, Text).contains(needle)
+    
+    def _item_query(self, doc_filters: List[Any], fields: Tuple[str, ...], *columns):
+        """Query extracted items of the given fields for the documents matched by doc_filters."""
+        return self.session.query(*columns).select_from(ExtractedItem).join(
+            Document, Document.id == ExtractedItem.document_id
+        ).filter(*doc_filters, ExtractedItem.field.in_(fields))
+    
+    def _iter_items(self, doc_filters: List[Any], fields: Tuple[str, ...], *criteria) -> Iterator[Tuple[str, str]]:
+        """Stream (field, content) of the matching extracted items, in document order."""
+        rows = self._item_query(
+            doc_filters, fields, ExtractedItem.field, func.coalesce(ExtractedItem.content, '')
+        ).filter(*criteria).order_by(ExtractedItem.document_id, ExtractedItem.id).yield_per(ITEM_FETCH_SIZE)
+        for field, content in rows:
+            yield field, content
+    
+    def _top_training_categories(self, doc_filters: List[Any], default: str, limit: int) -> List[Tuple[str, int]]:
+        """Most frequent training categories, counted in SQL (ties keep first-seen order)."""
+        category = func.coalesce(ExtractedItem.category, default)
+        count = func.count(ExtractedItem.id)
+        return self._item_query(doc_filters, ('training_development',), category, count).group_by(
+            category
+        ).order_by(count.desc(), func.min(ExtractedItem.id)).limit(limit).all()
+    
     def _generate_individual_recommendations(self, patterns: Dict[str, Any], employee_name: str) -> List[Dict[str, Any]]:
         """Generate personalized recommendations for an employee."""
         recommendations = []
@@ -403,11 +546,12 @@ class RecommendationEngine:
         # Relocation support recommendations
         relocation_trends = insights.get('relocation_trends', [])
         if relocation_trends:
+            relocation_mentions = [f"{r['location']} ({r['mentions']} упоминаний)" for r in relocation_trends]
             recommendations.append({
                 'type': 'employee_support',
                 'priority': 'medium',
                 'title': 'Поддержка процессов релокации',
-                'description': f"Планы релокации: {', '.join([f'{r[\"location\"]} ({r[\"mentions\"]} упоминаний)' for r in relocation_trends])}",
+                'description': f"Планы релокации: {', '.join(relocation_mentions)}",
                 'action_items': [
                     "Создать гид по релокации для популярных направлений",
                     "Установить контакты с HR в других офисах",
@@ -421,20 +565,15 @@ class RecommendationEngine:
         """Extract common themes from text using simple keyword analysis."""
         # This is a simplified implementation
         # In a real system, you might use more sophisticated NLP
+        text_lower = text.lower()
         
-        keywords = {
-            'обучение': ['обучение', 'курс', 'сертификат', 'тренинг'],
-            'коммуникация': ['общение', 'коммуникация', 'обратная связь'],
-            'процессы': ['процесс', 'workflow', 'автоматизация'],
-            'нагрузка': ['нагрузка', 'перегрузка', 'усталость', 'время'],
-            'команда': ['команда', 'коллектив', 'сотрудничество'],
-            'развитие': ['развитие', 'рост', 'карьера', 'навыки']
-        }
+        if _THEME_AUTOMATON is not None:
+            # One pass over the text finds every keyword of every theme
+            found = {theme for _, theme in _THEME_AUTOMATON.iter(text_lower)}
+            return [theme for theme in THEME_KEYWORDS if theme in found]
         
-        text_lower = text.lower()
         found_themes = []
-        
-        for theme, theme_keywords in keywords.items():
+        for theme, theme_keywords in THEME_KEYWORDS.items():
             if any(keyword in text_lower for keyword in theme_keywords):
                 found_themes.append(theme)
         
@@ -445,38 +584,39 @@ class RecommendationEngine:
         try:
             cutoff_date = datetime.now() - timedelta(days=days_back)
             
-            # Get recent documents
-            documents = self.session.query(Document, ExtractedInformation).outerjoin(
-                ExtractedInformation, Document.id == ExtractedInformation.document_id
-            ).filter(Document.parsed_at >= cutoff_date).all()
+            doc_filters = [Document.parsed_at >= cutoff_date]
             
-            # Quick analysis
-            employees_analyzed = set(doc.employee_name for doc, _ in documents)
+            # Quick analysis; only the first ten employee names are ever reported
+            total_documents, employees_with_data = self.session.query(
+                func.count(Document.id), func.count(func.distinct(Document.employee_name))
+            ).filter(*doc_filters).one()
+            employees_analyzed = [
+                name for name, in self.session.query(Document.employee_name).filter(*doc_filters).distinct().limit(10)
+            ]
             
             # Count different types of insights
-            training_mentions = 0
-            risk_mentions = 0
-            relocation_mentions = 0
-            
-            for doc, extracted_info in documents:
-                if extracted_info:
-                    if extracted_info.training_development:
-                        training_mentions += len(extracted_info.training_development)
-                    if extracted_info.risks_concerns:
-                        risk_mentions += len(extracted_info.risks_concerns)
-                    if extracted_info.location_relocation:
-                        relocation_mentions += len(extracted_info.location_relocation)
+            mention_counts = dict(
+                self.session.query(ExtractedItem.field, func.count(ExtractedItem.id)).join(
+                    Document, Document.id == ExtractedItem.document_id
+                ).filter(
+                    *doc_filters,
+                    ExtractedItem.field.in_(['training_development', 'risks_concerns', 'location_relocation'])
+                ).group_by(ExtractedItem.field)
+            )
+            training_mentions = mention_counts.get('training_development', 0)
+            risk_mentions = mention_counts.get('risks_concerns', 0)
+            relocation_mentions = mention_counts.get('location_relocation', 0)
             
             return {
                 'period_days': days_back,
-                'employees_with_data': len(employees_analyzed),
-                'total_documents': len(documents),
+                'employees_with_data': employees_with_data,
+                'total_documents': total_documents,
                 'insights': {
                     'training_mentions': training_mentions,
                     'risk_indicators': risk_mentions,
                     'relocation_discussions': relocation_mentions
                 },
-                'top_employees_for_attention': list(employees_analyzed)[:10],
+                'top_employees_for_attention': employees_analyzed,
                 'generated_at': datetime.now().isoformat()
             }
             
@@ -486,4 +626,4 @@ class RecommendationEngine:
     
     def close(self):
         """Close database session."""
-        self.session.close()
\ No newline at end of file
+        self.session.remove()
\ No newline at end of file
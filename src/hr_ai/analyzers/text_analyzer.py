@@ -5,8 +5,10 @@ Uses OpenAI GPT models for intelligent content extraction and analysis.
 
 import json
 import re
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Pattern, Tuple
 import logging
 
 import openai
@@ -15,8 +17,198 @@ from pydantic import BaseModel, Field
 
 from config.settings import settings
 
+if TYPE_CHECKING:
+    from .analysis_cache import AnalysisCache
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; its decode errors subclass json.JSONDecodeError
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+def _compile_pattern_table(table: Dict[str, List[str]]) -> Dict[str, List[Pattern]]:
+    """Compile a category -> regex list table, case-insensitively."""
+    return {
+        category: [re.compile(pattern, re.IGNORECASE) for pattern in pattern_list]
+        for category, pattern_list in table.items()
+    }
+
+@lru_cache(maxsize=8)
+def _keyword_patterns(keywords: Tuple[str, ...]) -> List[Tuple[str, Pattern]]:
+    """Compile whole-word, case-insensitive patterns for a keyword list (cached per list)."""
+    return [(keyword, re.compile(rf'\b{re.escape(keyword)}\b', re.IGNORECASE)) for keyword in keywords]
+
+# Whole-word keyword spans keyed by lowercased keyword (see _keyword_spans)
+KeywordSpans = Dict[str, List[Tuple[int, int]]]
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Whether a regex \\b would match at index (word/non-word transition)."""
+    before = index > 0 and (text[index - 1].isalnum() or text[index - 1] == '_')
+    after = index < len(text) and (text[index].isalnum() or text[index] == '_')
+    return before != after
+
+def _keyword_spans(text: str) -> Optional[KeywordSpans]:
+    """
+    Whole-word spans of every settings keyword in text, keyed by lowercased keyword.
+    
+    The text is lowercased and scanned once, so callers matching several keyword
+    lists compute the spans once and pass them to _find_keywords. Returns None
+    when pyahocorasick is not installed or lowercasing changes the text length,
+    because offsets in the lowercased text must line up with the original for
+    slicing.
+    """
+    automaton = settings.keyword_automaton
+    if automaton is None:
+        return None
+    text_lower = text.lower()
+    if len(text_lower) != len(text):
+        return None
+    
+    # Boundaries are checked per hit, like the regex \b on both ends
+    spans: KeywordSpans = {}
+    for end_index, (keyword, _) in automaton.iter(text_lower):
+        start = end_index - len(keyword) + 1
+        if _is_word_boundary(text, start) and _is_word_boundary(text, end_index + 1):
+            spans.setdefault(keyword, []).append((start, end_index + 1))
+    return spans
+
+def _find_keywords(text: str, keywords: List[str], spans: Optional[KeywordSpans]) -> List[Tuple[str, int, int]]:
+    """
+    Find whole-word, case-insensitive keyword mentions.
+    
+    Args:
+        text: Text to scan
+        keywords: Keyword list from settings, in reporting order
+        spans: _keyword_spans(text); None falls back to one regex scan per keyword
+        
+    Returns:
+        (keyword, start, end) spans grouped by keyword in list order, as one
+        regex scan per keyword would report them
+    """
+    if spans is None:
+        return [
+            (keyword, match.start(), match.end())
+            for keyword, pattern in _keyword_patterns(tuple(keywords))
+            for match in pattern.finditer(text)
+        ]
+    
+    return [(keyword, start, end) for keyword in keywords for start, end in spans.get(keyword.lower(), ())]
+
+def _merged_matches(text: str, patterns: List[Pattern], window: int) -> List[Tuple[str, str]]:
+    """
+    Find pattern matches, merging those whose context windows overlap.
+    
+    Args:
+        text: Text to scan
+        patterns: Compiled patterns of one category
+        window: Characters of context kept on each side of a match
+        
+    Returns:
+        (content, context) per merged span in text order; content joins the
+        distinct match texts of the span
+    """
+    matches = sorted(
+        (match.start(), match.end(), match.group())
+        for pattern in patterns
+        for match in pattern.finditer(text)
+    )
+    
+    merged = []
+    for start, end, content in matches:
+        if merged and start - window <= merged[-1][1] + window:
+            last = merged[-1]
+            # Matches sort by start, so one ending inside the span lies within an earlier match
+            if end > last[1]:
+                last[1] = end
+                last[2].append(content)
+        else:
+            merged.append([start, end, [content]])
+    
+    results = []
+    for start, end, contents in merged:
+        distinct = {}
+        for content in contents:
+            distinct.setdefault(content.lower(), content)
+        context = text[max(0, start - window):min(len(text), end + window)].strip()
+        results.append(('; '.join(distinct.values()), context))
+    
+    return results
+
+# Patterns for the locally extracted categories, compiled once at import.
+# Interview, assessment and process improvement mentions
+HR_PROCESS_PATTERNS = _compile_pattern_table({
+    'interview_participation': [
+        r'собеседован\w*', r'interview\w*', r'участ\w* в собеседовани\w*',
+        r'проводить\s+собеседовани\w*', r'conduct\s+interview\w*'
+    ],
+    'assessment_participation': [
+        r'ассессмент\w*', r'assessment\w*', r'техническ\w*\s+оценк\w*',
+        r'technical\s+assessment\w*'
+    ],
+    'process_improvement': [
+        r'предложени\w*\s+по\s+улучшени\w*', r'improvement\s+suggest\w*',
+        r'процесс\w*\s+улучшени\w*', r'process\s+improvement\w*'
+    ],
+    'hr_mentions': [
+        r'HR\s+\w*', r'отдел\s+кадр\w*', r'обсудить\s+с\s+\w*\s*(Марией|Тимофеем)',
+        r'связаться\s+с\s+HR'
+    ]
+})
+
+# Community engagement mentions
+COMMUNITY_PATTERNS = _compile_pattern_table({
+    'forum_participation': [
+        r'VVT\s+Forum', r'форум\w*', r'выступ\w*\s+на\s+форум\w*',
+        r'участ\w*\s+в\s+форум\w*'
+    ],
+    'meetup_participation': [
+        r'митап\w*', r'meetup\w*', r'мастер-класс\w*', r'workshop\w*'
+    ],
+    'community_proposals': [
+        r'предложени\w*\s+по\s+комьюнити', r'community\s+suggest\w*',
+        r'улучшени\w*\s+сообществ\w*'
+    ],
+    'viva_engage': [
+        r'Viva\s+Engage', r'публикаци\w*\s+в\s+сообществ\w*',
+        r'posting\s+in\s+communities'
+    ]
+})
+
+# Location and relocation mentions
+LOCATION_PATTERNS = _compile_pattern_table({
+    'current_location': [
+        r'текущ\w*\s+местоположени\w*', r'current\s+location',
+        r'город\s+\w+', r'city\s+\w+', r'страна\s+\w+'
+    ],
+    'relocation_plans': [
+        r'релокаци\w*', r'relocation', r'план\w*\s+на\s+переезд',
+        r'планиру\w*\s+релокаци\w*', r'planning\s+to\s+relocate'
+    ],
+    'location_mentions': [
+        r'Алматы', r'Ташкент', r'Москва', r'Казахстан', r'Узбекистан',
+        r'Kazakhstan', r'Uzbekistan'
+    ]
+})
+
+# Meeting analysis skips the API when the heuristic reports at least this much
+# evidence and every listed meeting section (empty ones included) has this much content
+CLEAR_MEETING_MIN_EVIDENCE = 3
+CLEAR_MEETING_MIN_CHARS = 200
+CLEAR_MEETING_CONFIDENCE = 0.85
+
+# Section content that suggests a recent meeting
+MEETING_SIGNAL_RE = re.compile(r'checkpoint|review|2025|2024', re.IGNORECASE)
+
+# Risk and concern indicators
+RISK_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'усталость', r'выгорани\w*', r'перегрузк\w*', r'стресс',
+    r'дискомфорт', r'проблем\w*', r'недовольств\w*',
+    r'burnout', r'stress', r'overwhelm\w*', r'concern\w*',
+    r'uncomfortable', r'dissatisf\w*'
+]]
+
 class MeetingAnalysis(BaseModel):
     """Structure for meeting analysis results."""
     meeting_occurred: bool = Field(description="Whether a meeting actually took place")
@@ -39,12 +231,28 @@ class ExtractedInformation(BaseModel):
 class TextAnalyzer:
     """AI-powered text analyzer for IDP documents."""
     
-    def __init__(self):
+    # Bump when prompts or parsing change so cached AI results are invalidated
+    VERSION = "7"
+    
+    def __init__(self, response_cache: Optional['AnalysisCache'] = None):
+        """
+        Initialize the analyzer.
+        
+        Args:
+            response_cache: Store of OpenAI responses keyed by request, so a request
+                repeated for an edited document (e.g. unchanged meeting sections)
+                is answered without calling the API
+        """
+        self.response_cache = response_cache
+        # Shared by every thread using this analyzer (document workers and the
+        # extraction pool), so the API sees a fixed number of requests at most
+        self._request_slots = threading.BoundedSemaphore(max(1, settings.openai_max_concurrent_requests))
         if not settings.openai_api_key:
             logger.warning("OpenAI API key not configured. AI analysis will be limited.")
             self.client = None
         else:
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            # The client backs off exponentially (honouring Retry-After) on 429s
+            self.client = OpenAI(api_key=settings.openai_api_key, max_retries=settings.openai_max_retries)
     
     def analyze_meeting_occurrence(self, document_data: Dict[str, Any]) -> MeetingAnalysis:
         """
@@ -56,8 +264,27 @@ class TextAnalyzer:
         Returns:
             MeetingAnalysis object with meeting status and evidence
         """
+        return self.analyze_meeting_occurrence_with_status(document_data)[0]
+    
+    def analyze_meeting_occurrence_with_status(self, document_data: Dict[str, Any]) -> Tuple[MeetingAnalysis, bool]:
+        """
+        Analyze whether a meeting occurred, reporting whether the result is final.
+        
+        Args:
+            document_data: Parsed document data from DocumentParser
+            
+        Returns:
+            Tuple of (MeetingAnalysis, final); final is False when an API error or
+            an unusable response was replaced by a fallback result, which must not
+            be cached
+        """
         if not self.client:
-            return self._fallback_meeting_analysis(document_data)
+            return self._fallback_meeting_analysis(document_data), True
+        
+        # Clearly documented meetings don't need the model to confirm them
+        fallback = self._fallback_meeting_analysis(document_data)
+        if self._is_clear_meeting(document_data, fallback):
+            return fallback.model_copy(update={'confidence_score': CLEAR_MEETING_CONFIDENCE}), True
         
         try:
             # Prepare context for AI analysis
@@ -66,7 +293,8 @@ class TextAnalyzer:
             
             prompt = self._create_meeting_analysis_prompt(context)
             
-            response = self.client.chat.completions.create(
+            response_content, cache_key = self._chat_completion(
+                document_data.get('full_text', ''),
                 model=settings.model_name,
                 messages=[
                     {"role": "system", "content": self._get_meeting_analysis_system_prompt()},
@@ -76,12 +304,20 @@ class TextAnalyzer:
                 temperature=settings.temperature
             )
             
-            result = self._parse_meeting_analysis_response(response.choices[0].message.content)
-            return result
+            try:
+                result = self._load_meeting_analysis(response_content)
+            except Exception:
+                result = None
+            if result is None:
+                # Unusable responses are not remembered; report them as before
+                return self._parse_meeting_analysis_response(response_content), False
+            
+            self._remember_response(cache_key, response_content)
+            return result, True
             
         except Exception as e:
             logger.error(f"Error in AI meeting analysis: {str(e)}")
-            return self._fallback_meeting_analysis(document_data)
+            return fallback, False
     
     def extract_structured_information(self, document_data: Dict[str, Any]) -> ExtractedInformation:
         """
@@ -93,28 +329,42 @@ class TextAnalyzer:
         Returns:
             ExtractedInformation object with categorized insights
         """
+        return self.extract_structured_information_with_status(document_data)[0]
+    
+    def extract_structured_information_with_status(self, document_data: Dict[str, Any]) -> Tuple[ExtractedInformation, bool]:
+        """
+        Extract structured information, reporting whether the result is final.
+        
+        Args:
+            document_data: Parsed document data
+            
+        Returns:
+            Tuple of (ExtractedInformation, final); final is False when an API error
+            or an unusable response was replaced by keyword extraction
+        """
         if not self.client:
-            return self._fallback_information_extraction(document_data)
+            return self._fallback_information_extraction(document_data), True
         
         try:
             full_text = document_data.get('full_text', '')
             sections = document_data.get('sections', {})
             
-            # Analyze each category separately for better accuracy
-            categories = {
-                'training_development': self._analyze_training_development(full_text, sections),
-                'feedback_motivation': self._analyze_feedback_motivation(full_text, sections),
-                'hr_processes': self._analyze_hr_processes(full_text, sections),
-                'community_engagement': self._analyze_community_engagement(full_text, sections),
-                'location_relocation': self._analyze_location_relocation(full_text, sections),
-                'risks_concerns': self._analyze_risks_concerns(full_text, sections)
-            }
+            # Training and feedback come from one OpenAI request that sends the
+            # text once; the other categories are extracted locally with patterns
+            training_development, feedback_motivation, final = self._analyze_training_and_feedback(full_text)
             
-            return ExtractedInformation(**categories)
+            return ExtractedInformation(
+                training_development=training_development,
+                feedback_motivation=feedback_motivation,
+                hr_processes=self._analyze_hr_processes(full_text, sections),
+                community_engagement=self._analyze_community_engagement(full_text, sections),
+                location_relocation=self._analyze_location_relocation(full_text, sections),
+                risks_concerns=self._analyze_risks_concerns(full_text, sections)
+            ), final
             
         except Exception as e:
             logger.error(f"Error in AI information extraction: {str(e)}")
-            return self._fallback_information_extraction(document_data)
+            return self._fallback_information_extraction(document_data), False
     
     def _extract_meeting_sections(self, document_data: Dict[str, Any]) -> List[str]:
         """Extract sections that likely contain meeting information."""
@@ -122,16 +372,20 @@ class TextAnalyzer:
         meeting_sections = document_data.get('meeting_sections', [])
         
         relevant_content = []
+        added_sections = set()
         
         # Focus on sections identified as meeting-related
         for section_name in meeting_sections:
-            if section_name in sections:
+            if section_name in sections and section_name not in added_sections:
+                added_sections.add(section_name)
                 relevant_content.extend(sections[section_name])
         
-        # Also check for recent date sections
+        # Also check for recent date sections; a section is included only once
         for section_name, content in sections.items():
-            section_text = ' '.join(content).lower()
-            if any(keyword in section_text for keyword in ['checkpoint', 'review', '2025', '2024']):
+            if section_name in added_sections:
+                continue
+            if any(MEETING_SIGNAL_RE.search(line) for line in content):
+                added_sections.add(section_name)
                 relevant_content.extend(content)
         
         return relevant_content
@@ -157,10 +411,10 @@ class TextAnalyzer:
     
     def _create_meeting_analysis_prompt(self, context: str) -> str:
         """Create prompt for meeting analysis."""
+        # Instructions first and document content last, so the unchanging prefix
+        # can be served from OpenAI's prompt cache
         return f"""
-Analyze the following Individual Development Plan (IDP) content to determine if scheduled meetings actually occurred.
-
-{context}
+Analyze the Individual Development Plan (IDP) content below to determine if scheduled meetings actually occurred.
 
 Please analyze:
 1. Were there planned meetings that should have happened?
@@ -184,6 +438,9 @@ Respond in JSON format with the structure:
     "meeting_type": "checkpoint/review/other or null",
     "requires_hr_attention": boolean
 }}
+
+IDP content:
+{context}
 """
     
     def _get_meeting_analysis_system_prompt(self) -> str:
@@ -205,18 +462,24 @@ Red flags for missed meetings:
 
 Be objective and provide clear reasoning for your conclusions."""
     
-    def _analyze_training_development(self, full_text: str, sections: Dict[str, List[str]]) -> List[Dict[str, str]]:
-        """Extract training and development information."""
-        if not self.client:
-            return self._keyword_extract_training(full_text)
+    def _analyze_training_and_feedback(self, full_text: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]], bool]:
+        """
+        Extract training/development and feedback/motivation items with one OpenAI request.
         
+        Args:
+            full_text: Document text
+            
+        Returns:
+            Tuple of (training_development, feedback_motivation, final); when the
+            request fails or its response is unusable both lists come from keyword
+            extraction and final is False
+        """
         try:
+            # Static instructions lead and the document text comes last (prompt caching)
             prompt = f"""
-Extract training and development information from this IDP content:
-
-{full_text[:3000]}  # Limit text length
+Extract training/development and feedback/motivation information from the IDP content below.
 
-Find information about:
+For training and development, find information about:
 - Certifications obtained or planned
 - Courses completed or desired
 - Workshop participation or interest
@@ -224,64 +487,7 @@ Find information about:
 - Knowledge sharing activities
 - Skill development goals
 
-Return as JSON array of objects with:
-- "category": type of activity
-- "content": the specific information
-- "status": planned/completed/interested
-- "context": surrounding text for verification
-"""
-            
-            response = self.client.chat.completions.create(
-                model=settings.model_name,
-                messages=[
-                    {"role": "system", "content": "Extract training and development information from HR documents."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.3
-            )
-            
-            response_content = response.choices[0].message.content
-            if not response_content or not response_content.strip():
-                logger.warning("Empty response from OpenAI for training analysis")
-                return self._keyword_extract_training(full_text)
-            
-            try:
-                # Handle markdown code blocks
-                if response_content.strip().startswith('```json'):
-                    # Extract JSON from markdown code block
-                    json_start = response_content.find('```json') + 7
-                    json_end = response_content.rfind('```')
-                    if json_end > json_start:
-                        response_content = response_content[json_start:json_end].strip()
-                elif response_content.strip().startswith('```'):
-                    # Handle generic code blocks
-                    lines = response_content.strip().split('\n')
-                    if len(lines) > 2:
-                        response_content = '\n'.join(lines[1:-1])
-                
-                result = json.loads(response_content)
-                return result if isinstance(result, list) else []
-            except json.JSONDecodeError as json_err:
-                logger.warning(f"Invalid JSON response from OpenAI: {response_content[:100]}...")
-                return self._keyword_extract_training(full_text)
-            
-        except Exception as e:
-            logger.error(f"Error in training analysis: {str(e)}")
-            return self._keyword_extract_training(full_text)
-    
-    def _analyze_feedback_motivation(self, full_text: str, sections: Dict[str, List[str]]) -> List[Dict[str, str]]:
-        """Extract feedback and motivation insights."""
-        if not self.client:
-            return self._keyword_extract_feedback(full_text)
-        
-        try:
-            prompt = f"""
-Extract feedback and motivation insights from this IDP content:
-
-{full_text[:3000]}
-
-Find information about:
+For feedback and motivation, find information about:
 - Job satisfaction levels and changes
 - Attitude towards the company
 - Stress, burnout, or overload mentions
@@ -289,51 +495,108 @@ Find information about:
 - Comfort/discomfort issues
 - Work-life balance concerns
 
-Return as JSON array of objects with:
-- "category": satisfaction/motivation/concern/etc
-- "content": the specific insight
-- "sentiment": positive/negative/neutral
-- "context": surrounding text
+Return as a JSON object with two arrays:
+- "training_development": objects with "category" (type of activity), "content" (the specific
+  information), "status" (planned/completed/interested) and "context" (surrounding text for verification)
+- "feedback_motivation": objects with "category" (satisfaction/motivation/concern/etc), "content"
+  (the specific insight), "sentiment" (positive/negative/neutral) and "context" (surrounding text)
+
+IDP content:
+{full_text[:3000]}
 """
             
-            response = self.client.chat.completions.create(
+            response_content, cache_key = self._chat_completion(
+                full_text,
                 model=settings.model_name,
                 messages=[
-                    {"role": "system", "content": "Extract feedback and motivation insights from HR documents."},
+                    {"role": "system", "content": "Extract training, development, feedback and motivation information from HR documents."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=1000,
+                max_tokens=2000,
                 temperature=0.3
             )
             
-            response_content = response.choices[0].message.content
             if not response_content or not response_content.strip():
-                logger.warning("Empty response from OpenAI for feedback analysis")
-                return self._keyword_extract_feedback(full_text)
+                logger.warning("Empty response from OpenAI for training/feedback analysis")
+                return (*self._keyword_extract_training_and_feedback(full_text), False)
             
             try:
-                # Handle markdown code blocks
-                if response_content.strip().startswith('```json'):
-                    # Extract JSON from markdown code block
-                    json_start = response_content.find('```json') + 7
-                    json_end = response_content.rfind('```')
-                    if json_end > json_start:
-                        response_content = response_content[json_start:json_end].strip()
-                elif response_content.strip().startswith('```'):
-                    # Handle generic code blocks
-                    lines = response_content.strip().split('\n')
-                    if len(lines) > 2:
-                        response_content = '\n'.join(lines[1:-1])
-                
-                result = json.loads(response_content)
-                return result if isinstance(result, list) else []
-            except json.JSONDecodeError as json_err:
+                result = _json_loads(self._strip_code_fence(response_content))
+            except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON response from OpenAI: {response_content[:100]}...")
-                return self._keyword_extract_feedback(full_text)
+                return (*self._keyword_extract_training_and_feedback(full_text), False)
+            
+            if not isinstance(result, dict):
+                logger.warning(f"Unexpected JSON response from OpenAI: {response_content[:100]}...")
+                return (*self._keyword_extract_training_and_feedback(full_text), False)
+            
+            self._remember_response(cache_key, response_content)
+            training = result.get('training_development')
+            feedback = result.get('feedback_motivation')
+            return (
+                training if isinstance(training, list) else [],
+                feedback if isinstance(feedback, list) else [],
+                True
+            )
             
         except Exception as e:
-            logger.error(f"Error in feedback analysis: {str(e)}")
-            return self._keyword_extract_feedback(full_text)
+            logger.error(f"Error in training/feedback analysis: {str(e)}")
+            return (*self._keyword_extract_training_and_feedback(full_text), False)
+    
+    def _chat_completion(self, full_text: str, **request) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+        """
+        Run a chat completion, reusing the stored response of an identical request.
+        
+        Args:
+            full_text: Text of the document the request is made for; stored
+                responses are pruned with their document
+            **request: Arguments for chat.completions.create
+            
+        Returns:
+            Tuple of (response content, cache key); the key is None for stored
+            responses and otherwise lets the caller remember the response once it
+            has parsed successfully
+        """
+        if settings.openai_json_mode:
+            # JSON mode guarantees a syntactically valid JSON object in the response
+            request['response_format'] = {"type": "json_object"}
+        
+        if self.response_cache is None:
+            return self._create_completion(request), None
+        
+        request_hash = self.response_cache.request_hash(request)
+        text_hash = self.response_cache.text_hash(full_text)
+        cached = self.response_cache.get_response(request_hash, text_hash)
+        if cached is not None:
+            return cached, None
+        
+        return self._create_completion(request), (request_hash, text_hash)
+    
+    def _create_completion(self, request: Dict[str, Any]) -> Optional[str]:
+        """Call the API, waiting for a free request slot first."""
+        with self._request_slots:
+            return self.client.chat.completions.create(**request).choices[0].message.content
+    
+    def _remember_response(self, cache_key: Optional[Tuple[str, str]], response_content: str) -> None:
+        """Store a freshly received response for reuse by identical requests."""
+        if cache_key is not None:
+            request_hash, text_hash = cache_key
+            self.response_cache.put_response(request_hash, response_content, text_hash)
+    
+    def _strip_code_fence(self, response_content: str) -> str:
+        """Return the body of a markdown code block, or the text unchanged."""
+        if response_content.strip().startswith('```json'):
+            # Extract JSON from markdown code block
+            json_start = response_content.find('```json') + 7
+            json_end = response_content.rfind('```')
+            if json_end > json_start:
+                return response_content[json_start:json_end].strip()
+        elif response_content.strip().startswith('```'):
+            # Handle generic code blocks
+            lines = response_content.strip().split('\n')
+            if len(lines) > 2:
+                return '\n'.join(lines[1:-1])
+        return response_content
     
     def _analyze_hr_processes(self, full_text: str, sections: Dict[str, List[str]]) -> List[Dict[str, str]]:
         """Extract HR processes and proposals."""
@@ -341,39 +604,15 @@ Return as JSON array of objects with:
             # Look for interview, assessment, and process improvement mentions
             hr_items = []
             
-            patterns = {
-                'interview_participation': [
-                    r'собеседован\w*', r'interview\w*', r'участ\w* в собеседовани\w*',
-                    r'проводить\s+собеседовани\w*', r'conduct\s+interview\w*'
-                ],
-                'assessment_participation': [
-                    r'ассессмент\w*', r'assessment\w*', r'техническ\w*\s+оценк\w*',
-                    r'technical\s+assessment\w*'
-                ],
-                'process_improvement': [
-                    r'предложени\w*\s+по\s+улучшени\w*', r'improvement\s+suggest\w*',
-                    r'процесс\w*\s+улучшени\w*', r'process\s+improvement\w*'
-                ],
-                'hr_mentions': [
-                    r'HR\s+\w*', r'отдел\s+кадр\w*', r'обсудить\s+с\s+\w*\s*(Марией|Тимофеем)',
-                    r'связаться\s+с\s+HR'
-                ]
-            }
-            
-            for category, pattern_list in patterns.items():
-                for pattern in pattern_list:
-                    matches = re.finditer(pattern, full_text, re.IGNORECASE)
-                    for match in matches:
-                        start = max(0, match.start() - 50)
-                        end = min(len(full_text), match.end() + 50)
-                        context = full_text[start:end].strip()
-                        
-                        hr_items.append({
-                            'category': category,
-                            'content': match.group(),
-                            'status': 'mentioned',
-                            'context': context
-                        })
+            for category, pattern_list in HR_PROCESS_PATTERNS.items():
+                # Clustered mentions share one item instead of near-identical contexts
+                for content, context in _merged_matches(full_text, pattern_list, 50):
+                    hr_items.append({
+                        'category': category,
+                        'content': content,
+                        'status': 'mentioned',
+                        'context': context
+                    })
             
             return hr_items
             
@@ -386,38 +625,15 @@ Return as JSON array of objects with:
         try:
             community_items = []
             
-            patterns = {
-                'forum_participation': [
-                    r'VVT\s+Forum', r'форум\w*', r'выступ\w*\s+на\s+форум\w*',
-                    r'участ\w*\s+в\s+форум\w*'
-                ],
-                'meetup_participation': [
-                    r'митап\w*', r'meetup\w*', r'мастер-класс\w*', r'workshop\w*'
-                ],
-                'community_proposals': [
-                    r'предложени\w*\s+по\s+комьюнити', r'community\s+suggest\w*',
-                    r'улучшени\w*\s+сообществ\w*'
-                ],
-                'viva_engage': [
-                    r'Viva\s+Engage', r'публикаци\w*\s+в\s+сообществ\w*',
-                    r'posting\s+in\s+communities'
-                ]
-            }
-            
-            for category, pattern_list in patterns.items():
-                for pattern in pattern_list:
-                    matches = re.finditer(pattern, full_text, re.IGNORECASE)
-                    for match in matches:
-                        start = max(0, match.start() - 50)
-                        end = min(len(full_text), match.end() + 50)
-                        context = full_text[start:end].strip()
-                        
-                        community_items.append({
-                            'category': category,
-                            'content': match.group(),
-                            'status': 'mentioned',
-                            'context': context
-                        })
+            for category, pattern_list in COMMUNITY_PATTERNS.items():
+                # Clustered mentions share one item instead of near-identical contexts
+                for content, context in _merged_matches(full_text, pattern_list, 50):
+                    community_items.append({
+                        'category': category,
+                        'content': content,
+                        'status': 'mentioned',
+                        'context': context
+                    })
             
             return community_items
             
@@ -430,24 +646,9 @@ Return as JSON array of objects with:
         try:
             location_items = []
             
-            patterns = {
-                'current_location': [
-                    r'текущ\w*\s+местоположени\w*', r'current\s+location',
-                    r'город\s+\w+', r'city\s+\w+', r'страна\s+\w+'
-                ],
-                'relocation_plans': [
-                    r'релокаци\w*', r'relocation', r'план\w*\s+на\s+переезд',
-                    r'планиру\w*\s+релокаци\w*', r'planning\s+to\s+relocate'
-                ],
-                'location_mentions': [
-                    r'Алматы', r'Ташкент', r'Москва', r'Казахстан', r'Узбекистан',
-                    r'Kazakhstan', r'Uzbekistan'
-                ]
-            }
-            
-            for category, pattern_list in patterns.items():
+            for category, pattern_list in LOCATION_PATTERNS.items():
                 for pattern in pattern_list:
-                    matches = re.finditer(pattern, full_text, re.IGNORECASE)
+                    matches = pattern.finditer(full_text)
                     for match in matches:
                         start = max(0, match.start() - 30)
                         end = min(len(full_text), match.end() + 30)
@@ -471,26 +672,14 @@ Return as JSON array of objects with:
         try:
             risk_items = []
             
-            risk_indicators = [
-                r'усталость', r'выгорани\w*', r'перегрузк\w*', r'стресс',
-                r'дискомфорт', r'проблем\w*', r'недовольств\w*',
-                r'burnout', r'stress', r'overwhelm\w*', r'concern\w*',
-                r'uncomfortable', r'dissatisf\w*'
-            ]
-            
-            for pattern in risk_indicators:
-                matches = re.finditer(pattern, full_text, re.IGNORECASE)
-                for match in matches:
-                    start = max(0, match.start() - 100)
-                    end = min(len(full_text), match.end() + 100)
-                    context = full_text[start:end].strip()
-                    
-                    risk_items.append({
-                        'category': 'risk_concern',
-                        'content': match.group(),
-                        'severity': 'medium',  # Could be enhanced with sentiment analysis
-                        'context': context
-                    })
+            # Clustered mentions share one item instead of near-identical contexts
+            for content, context in _merged_matches(full_text, RISK_PATTERNS, 100):
+                risk_items.append({
+                    'category': 'risk_concern',
+                    'content': content,
+                    'severity': 'medium',  # Could be enhanced with sentiment analysis
+                    'context': context
+                })
             
             return risk_items
             
@@ -498,28 +687,24 @@ Return as JSON array of objects with:
             logger.error(f"Error in risk analysis: {str(e)}")
             return []
     
+    def _load_meeting_analysis(self, response_text: str) -> Optional[MeetingAnalysis]:
+        """Parse the JSON object of an AI response; None when it contains none."""
+        # Handle markdown code blocks first
+        clean_text = self._strip_code_fence(response_text)
+        
+        # Try to extract JSON from response
+        json_match = re.search(r'\{.*\}', clean_text, re.DOTALL)
+        if not json_match:
+            return None
+        # Parse and validate in one pass, without an intermediate dict
+        return MeetingAnalysis.model_validate_json(json_match.group())
+    
     def _parse_meeting_analysis_response(self, response_text: str) -> MeetingAnalysis:
         """Parse AI response into MeetingAnalysis object."""
         try:
-            # Handle markdown code blocks first
-            clean_text = response_text
-            if response_text.strip().startswith('```json'):
-                # Extract JSON from markdown code block
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.rfind('```')
-                if json_end > json_start:
-                    clean_text = response_text[json_start:json_end].strip()
-            elif response_text.strip().startswith('```'):
-                # Handle generic code blocks
-                lines = response_text.strip().split('\n')
-                if len(lines) > 2:
-                    clean_text = '\n'.join(lines[1:-1])
-            
-            # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', clean_text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                return MeetingAnalysis(**data)
+            result = self._load_meeting_analysis(response_text)
+            if result is not None:
+                return result
             else:
                 # Fallback parsing
                 return MeetingAnalysis(
@@ -537,6 +722,18 @@ Return as JSON array of objects with:
                 requires_hr_attention=True
             )
     
+    def _is_clear_meeting(self, document_data: Dict[str, Any], fallback: MeetingAnalysis) -> bool:
+        """Whether the heuristic result is unambiguous enough to skip the API."""
+        if len(fallback.evidence) < CLEAR_MEETING_MIN_EVIDENCE:
+            return False
+        
+        # A listed section that is missing or short makes the document ambiguous
+        sections = document_data.get('sections', {})
+        return all(
+            len(' '.join(sections.get(section_name, ())).strip()) >= CLEAR_MEETING_MIN_CHARS
+            for section_name in dict.fromkeys(document_data.get('meeting_sections', []))
+        )
+    
     def _fallback_meeting_analysis(self, document_data: Dict[str, Any]) -> MeetingAnalysis:
         """Fallback meeting analysis when AI is not available."""
         sections = document_data.get('sections', {})
@@ -563,54 +760,60 @@ Return as JSON array of objects with:
     def _fallback_information_extraction(self, document_data: Dict[str, Any]) -> ExtractedInformation:
         """Fallback information extraction using keyword matching."""
         full_text = document_data.get('full_text', '')
+        training, feedback = self._keyword_extract_training_and_feedback(full_text)
         
-        return ExtractedInformation(
-            training_development=self._keyword_extract_training(full_text),
-            feedback_motivation=self._keyword_extract_feedback(full_text),
+        # Every item is built locally from regex matches with string values, so
+        # per-item validation is skipped (AI responses still go through validation)
+        return ExtractedInformation.model_construct(
+            training_development=training,
+            feedback_motivation=feedback,
             hr_processes=self._analyze_hr_processes(full_text, {}),
             community_engagement=self._analyze_community_engagement(full_text, {}),
             location_relocation=self._analyze_location_relocation(full_text, {}),
             risks_concerns=self._analyze_risks_concerns(full_text, {})
         )
     
-    def _keyword_extract_training(self, text: str) -> List[Dict[str, str]]:
-        """Extract training information using keyword matching."""
+    def _keyword_extract_training_and_feedback(self, text: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """Extract training and feedback information with one keyword scan of the text."""
+        spans = _keyword_spans(text)
+        return self._keyword_extract_training(text, spans), self._keyword_extract_feedback(text, spans)
+    
+    def _keyword_extract_training(self, text: str, spans: Optional[KeywordSpans] = None) -> List[Dict[str, str]]:
+        """Extract training information using keyword matching (spans: precomputed _keyword_spans)."""
+        if spans is None:
+            spans = _keyword_spans(text)
         training_items = []
-        training_keywords = settings.training_keywords
-        
-        for keyword in training_keywords:
-            matches = re.finditer(rf'\b{re.escape(keyword)}\b', text, re.IGNORECASE)
-            for match in matches:
-                start = max(0, match.start() - 50)
-                end = min(len(text), match.end() + 50)
-                context = text[start:end].strip()
-                
-                training_items.append({
-                    'category': 'training',
-                    'content': keyword,
-                    'status': 'mentioned',
-                    'context': context
-                })
+        
+        for keyword, match_start, match_end in _find_keywords(text, settings.training_keywords, spans):
+            start = max(0, match_start - 50)
+            end = min(len(text), match_end + 50)
+            context = text[start:end].strip()
+            
+            training_items.append({
+                'category': 'training',
+                'content': keyword,
+                'status': 'mentioned',
+                'context': context
+            })
         
         return training_items
     
-    def _keyword_extract_feedback(self, text: str) -> List[Dict[str, str]]:
-        """Extract feedback information using keyword matching."""
+    def _keyword_extract_feedback(self, text: str, spans: Optional[KeywordSpans] = None) -> List[Dict[str, str]]:
+        """Extract feedback information using keyword matching (spans: precomputed _keyword_spans)."""
+        if spans is None:
+            spans = _keyword_spans(text)
         feedback_items = []
-        feedback_keywords = settings.feedback_keywords
-        
-        for keyword in feedback_keywords:
-            matches = re.finditer(rf'\b{re.escape(keyword)}\b', text, re.IGNORECASE)
-            for match in matches:
-                start = max(0, match.start() - 50)
-                end = min(len(text), match.end() + 50)
-                context = text[start:end].strip()
-                
-                feedback_items.append({
-                    'category': 'feedback',
-                    'content': keyword,
-                    'sentiment': 'neutral',
-                    'context': context
-                })
+        
+        for keyword, match_start, match_end in _find_keywords(text, settings.feedback_keywords, spans):
+            start = max(0, match_start - 50)
+            end = min(len(text), match_end + 50)
+            context = text[start:end].strip()
+            
+            feedback_items.append({
+                'category': 'feedback',
+                'content': keyword,
+                'sentiment': 'neutral',
+                'context': context
+            })
         
         return feedback_items
\ No newline at end of file
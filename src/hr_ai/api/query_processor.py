@@ -2,34 +2,195 @@
 Query processing engine for answering HR questions about IDP data.
 """
 
+import asyncio
+import copy
 import json
+import queue
 import re
+import threading
+from collections import Counter, OrderedDict
+from itertools import islice
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Any, Pattern, Set, Tuple
 import logging
 
 import openai
 from openai import OpenAI
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, and_, or_
+from sqlalchemy.orm import load_only, scoped_session, sessionmaker
+from sqlalchemy import and_, or_, func, exists, insert
 
-from config.settings import settings
-from ..models.database import Document, ExtractedInformation, MeetingAnalysis, QueryLog
+from config.settings import settings, make_engine
+from ..models.database import Document, ExtractedInformation, ExtractedItem, MeetingAnalysis, QueryLog, prepare_database
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; its decode errors subclass json.JSONDecodeError
+    _json_loads = json.loads
+
+try:
+    from ahocorasick import Automaton
+except ImportError:  # pyahocorasick is optional; fall back to substring scans
+    Automaton = None
 
 logger = logging.getLogger(__name__)
 
+# Query keywords per intent, checked in order; the last matching intent wins
+# and every matching intent adds its categories
+INTENT_KEYWORDS = (
+    ('training', ('training_development',),
+     ('обучение', 'training', 'сертификат', 'курс', 'митап', 'workshop')),
+    ('feedback', ('feedback_motivation', 'risks_concerns'),
+     ('удовлетворен', 'satisfaction', 'мотивация', 'выгорание', 'перегрузка',
+      'дискомфорт', 'проблем', 'недовольств', 'стресс', 'комфорт', 'отношение',
+      'нравится', 'не нравится', 'устраивает', 'не устраивает', 'вызывает',
+      'беспокоит', 'волнует', 'тревожит', 'расстраивает', 'огорчает')),
+    ('meetings', ('meetings',),
+     ('встреча', 'meeting', 'пропуск', 'missed', 'checkpoint')),
+    ('relocation', ('location_relocation',),
+     ('релокация', 'relocation', 'переезд', 'локация')),
+    ('hr_processes', ('hr_processes',),
+     ('собеседование', 'interview', 'процесс', 'предложение')),
+)
+
+# Extracted fields each intent reports; documents with no items in them are skipped in SQL
+INTENT_FIELDS = {
+    'training': ('training_development',),
+    'feedback': ('feedback_motivation', 'risks_concerns'),
+    'relocation': ('location_relocation',),
+    'hr_processes': ('hr_processes',),
+}
+
+# Terms that mark an item as a complaint in feedback searches
+FEEDBACK_DISCOMFORT_TERMS = ('дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает', 'беспокоит',
+                             'волнует', 'тревожит', 'расстраивает', 'огорчает', 'не нравится', 'не устраивает')
+
+# Terms that make an item or document relevant to any general search
+GENERAL_DISCOMFORT_TERMS = ('дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает', 'не нравится')
+GENERAL_TEXT_TERMS = ('дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает')
+
+# Extracted categories searched by general queries, with their display labels
+GENERAL_CATEGORIES = (
+    ('feedback_motivation', 'Обратная связь'),
+    ('risks_concerns', 'Риски и проблемы'),
+    ('training_development', 'Обучение и развитие'),
+    ('hr_processes', 'HR процессы'),
+    ('community_engagement', 'Участие в сообществе'),
+    ('location_relocation', 'Локация/Релокация')
+)
+
+# Static instructions for AI query analysis. Kept identical between calls so the
+# request prefix can be served from OpenAI's prompt cache; only the user
+# message carries the query.
+QUERY_ANALYSIS_SYSTEM_PROMPT = """You are an HR AI assistant that analyzes queries about employee development plans.
+
+You receive an HR query and the current keyword-based analysis of it.
+Please enhance the analysis by:
+1. Confirming or correcting the intent classification
+2. Identifying specific information being requested
+3. Extracting any time constraints
+4. Identifying key search terms
+
+Respond in JSON format with:
+{
+    "intent": "training/feedback/meetings/relocation/hr_processes/general",
+    "categories": ["list of relevant categories"],
+    "time_period_days": number or null,
+    "specific_request": "what exactly is being asked",
+    "search_strategy": "how to search the data",
+    "confidence": float (0-1)
+}"""
+
+def _build_intent_automaton():
+    """Compile all intent keywords into one Aho-Corasick automaton (None without pyahocorasick)."""
+    if Automaton is None:
+        return None
+    automaton = Automaton()
+    for _, _, keywords in INTENT_KEYWORDS:
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+_INTENT_AUTOMATON = _build_intent_automaton()
+
+def _batched(rows: Iterable, size: int) -> Iterable[List]:
+    """Split an iterable into lists of at most size items."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _find_intent_keywords(query_lower: str) -> Set[str]:
+    """Intent keywords occurring anywhere in the lowercased query."""
+    if _INTENT_AUTOMATON is None:
+        return {keyword for _, _, keywords in INTENT_KEYWORDS for keyword in keywords if keyword in query_lower}
+    # One pass over the query finds every keyword of every intent, overlaps included
+    return {keyword for _, keyword in _INTENT_AUTOMATON.iter(query_lower)}
+
+# Time expressions (matched against lowercased text, first match wins) -> days
+TIME_PATTERNS = [(re.compile(pattern), converter) for pattern, converter in (
+    (r'за\s+последни[ехй]\s+(\d+)\s+месяц[аеов]*', lambda match: int(match.group(1)) * 30),
+    (r'за\s+последни[ехй]\s+(\d+)\s+недел[иьяю]*', lambda match: int(match.group(1)) * 7),
+    (r'за\s+последни[ехй]\s+(\d+)\s+дн[ейяь]*', lambda match: int(match.group(1))),
+    (r'последни[ехй]\s+(\d+)\s+месяц[аеов]*', lambda match: int(match.group(1)) * 30),
+    (r'последни[ехй]\s+(\d+)\s+недел[иьяю]*', lambda match: int(match.group(1)) * 7),
+    (r'(\d+)\s+месяц[аеов]*', lambda match: int(match.group(1)) * 30),
+    (r'(\d+)\s+недел[иьяю]*', lambda match: int(match.group(1)) * 7),
+    (r'полгода', lambda match: 180),
+    (r'год', lambda match: 365),
+)]
+
+# Capitalized two-word names: Cyrillic (Имя Фамилия), then Latin (Name Surname)
+NAME_PATTERNS = [
+    re.compile(r'[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+'),
+    re.compile(r'[A-Z][a-z]+\s+[A-Z][a-z]+')
+]
+
+# Common words never used as search keywords
+STOP_WORDS = frozenset({
+    'кто', 'что', 'где', 'когда', 'как', 'какие', 'который', 'которая', 'которые',
+    'за', 'последние', 'месяца', 'недели', 'дней', 'года', 'сотрудники', 'сотрудник',
+    'who', 'what', 'where', 'when', 'how', 'which', 'last', 'months', 'weeks', 'days',
+    'years', 'employees', 'employee'
+})
+
+_WORD_RE = re.compile(r'\w+')
+
+# Formatted responses kept for repeated questions while the documents are unchanged
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = timedelta(hours=1)
+
+# Query logs are inserted by a background thread, at most this many rows per commit
+LOG_BATCH_SIZE = 100
+
+# Search rows fetched per round-trip; results are collected as rows stream in
+SEARCH_FETCH_SIZE = 500
+
 class QueryProcessor:
     """Process natural language queries about HR data."""
     
     def __init__(self):
-        self.engine = create_engine(settings.database_url)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        # Pooled engine shared by all requests; each worker thread gets its own session
+        self.engine = make_engine(settings.database_url)
+        # Intent filters read extracted_items, which may not exist or be filled yet
+        prepare_database(self.engine)
+        self.session = scoped_session(sessionmaker(bind=self.engine))
         
         if settings.openai_api_key:
             self.client = OpenAI(api_key=settings.openai_api_key)
         else:
             self.client = None
+        
+        # Normalized query text -> (data version, stored at, formatted response)
+        self._response_cache = OrderedDict()
+        
+        # Query log rows waiting for the writer thread (started on first use)
+        self._log_queue = queue.Queue()
+        self._log_writer = None
+        self._log_writer_lock = threading.Lock()
     
     async def process_query(self, query_text: str) -> Dict[str, Any]:
         """
@@ -44,14 +205,23 @@ class QueryProcessor:
         start_time = datetime.now()
         
         try:
-            # Analyze query to understand intent and parameters
-            query_analysis = await self._analyze_query(query_text)
+            # Repeated questions are answered from the cache until documents change
+            cache_key = ' '.join(query_text.split())
+            data_version = await self._run_db(self._data_version)
+            formatted_response = self._get_cached_response(cache_key, data_version)
             
-            # Execute database search based on query analysis
-            search_results = await self._execute_search(query_analysis)
-            
-            # Format results for display
-            formatted_response = await self._format_response(query_analysis, search_results)
+            if formatted_response is not None:
+                query_analysis = formatted_response['query_analysis']
+            else:
+                # Analyze query to understand intent and parameters
+                query_analysis = await self._analyze_query(query_text)
+                
+                # Execute database search based on query analysis
+                search_results = await self._execute_search(query_analysis)
+                
+                # Format results for display
+                formatted_response = await self._format_response(query_analysis, search_results)
+                self._store_cached_response(cache_key, data_version, formatted_response)
             
             # Log the query
             processing_time = (datetime.now() - start_time).total_seconds()
@@ -69,6 +239,54 @@ class QueryProcessor:
                 'summary': f"Произошла ошибка при обработке запроса: {str(e)}"
             }
     
+    async def _run_db(self, func: Callable, *args) -> Any:
+        """Run blocking database work in a worker thread so the event loop keeps serving requests."""
+        def call():
+            try:
+                return func(*args)
+            finally:
+                # Return the thread's connection to the pool between requests
+                self.session.close()
+        
+        return await asyncio.to_thread(call)
+    
+    def _data_version(self) -> Tuple:
+        """Document count and latest parsed_at; new documents and re-analysis change it."""
+        return tuple(self.session.query(func.count(Document.id), func.max(Document.parsed_at)).one())
+    
+    def _get_cached_response(self, cache_key: str, data_version: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Return a previously formatted response if it is fresh and the documents are unchanged.
+        
+        Args:
+            cache_key: Query text with whitespace normalized
+            data_version: Result of _data_version() for the current request
+            
+        Returns:
+            Cached response with a current timestamp, or None on a miss
+        """
+        entry = self._response_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        cached_version, stored_at, response = entry
+        if cached_version != data_version or datetime.now() - stored_at > RESPONSE_CACHE_TTL:
+            del self._response_cache[cache_key]
+            return None
+        
+        self._response_cache.move_to_end(cache_key)
+        # Deep copy so callers editing nested results don't alter the cache
+        response = copy.deepcopy(response)
+        response['timestamp'] = datetime.now().isoformat()
+        return response
+    
+    def _store_cached_response(self, cache_key: str, data_version: Tuple, response: Dict[str, Any]) -> None:
+        """Remember a formatted response, evicting the least recently used entry when full."""
+        self._response_cache[cache_key] = (data_version, datetime.now(), copy.deepcopy(response))
+        self._response_cache.move_to_end(cache_key)
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
     async def _analyze_query(self, query_text: str) -> Dict[str, Any]:
         """Analyze query to extract intent and parameters."""
         
@@ -86,45 +304,23 @@ class QueryProcessor:
         query_lower = query_text.lower()
         logger.info(f"Analyzing query: '{query_text}' -> '{query_lower}'")
         
-        # Training/development related
-        if any(keyword in query_lower for keyword in ['обучение', 'training', 'сертификат', 'курс', 'митап', 'workshop']):
-            analysis['intent'] = 'training'
-            analysis['categories'].append('training_development')
-        
-        # Feedback/satisfaction related
-        discomfort_keywords = ['удовлетворен', 'satisfaction', 'мотивация', 'выгорание', 'перегрузка', 
-                               'дискомфорт', 'проблем', 'недовольств', 'стресс', 'комфорт', 'отношение', 
-                               'нравится', 'не нравится', 'устраивает', 'не устраивает', 'вызывает',
-                               'беспокоит', 'волнует', 'тревожит', 'расстраивает', 'огорчает']
-        if any(keyword in query_lower for keyword in discomfort_keywords):
-            analysis['intent'] = 'feedback'
-            analysis['categories'].append('feedback_motivation')
-            analysis['categories'].append('risks_concerns')
-            logger.info(f"Detected feedback/discomfort query intent based on keywords: {[k for k in discomfort_keywords if k in query_lower]}")
-        
-        # Meeting related
-        if any(keyword in query_lower for keyword in ['встреча', 'meeting', 'пропуск', 'missed', 'checkpoint']):
-            analysis['intent'] = 'meetings'
-            analysis['categories'].append('meetings')
-        
-        # Relocation related
-        if any(keyword in query_lower for keyword in ['релокация', 'relocation', 'переезд', 'локация']):
-            analysis['intent'] = 'relocation'
-            analysis['categories'].append('location_relocation')
-        
-        # HR processes related
-        if any(keyword in query_lower for keyword in ['собеседование', 'interview', 'процесс', 'предложение']):
-            analysis['intent'] = 'hr_processes'
-            analysis['categories'].append('hr_processes')
+        # Training, feedback/satisfaction, meetings, relocation and HR processes
+        found = _find_intent_keywords(query_lower)
+        for intent, categories, keywords in INTENT_KEYWORDS:
+            matched = [keyword for keyword in keywords if keyword in found]
+            if matched:
+                analysis['intent'] = intent
+                analysis['categories'].extend(categories)
+                logger.info(f"Detected {intent} query intent based on keywords: {matched}")
         
         # Extract time period
-        analysis['time_period'] = self._extract_time_period(query_text)
+        analysis['time_period'] = self._extract_time_period(query_lower)
         
         # Extract employee names (simple pattern matching)
         analysis['employee_names'] = self._extract_employee_names(query_text)
         
         # Extract key search terms
-        analysis['keywords'] = self._extract_keywords(query_text)
+        analysis['keywords'] = self._extract_keywords(query_lower)
         
         # If using AI, enhance analysis but preserve reliable keyword-based intent
         # TEMPORARILY DISABLED TO TEST KEYWORD-BASED ANALYSIS
@@ -152,29 +348,7 @@ class QueryProcessor:
     async def _ai_analyze_query(self, query_text: str, base_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Use AI to enhance query analysis."""
         
-        prompt = f"""
-Analyze this HR query and extract structured information:
-
-Query: "{query_text}"
-
-Current analysis: {json.dumps(base_analysis, ensure_ascii=False)}
-
-Please enhance the analysis by:
-1. Confirming or correcting the intent classification
-2. Identifying specific information being requested
-3. Extracting any time constraints
-4. Identifying key search terms
-
-Respond in JSON format with:
-{{
-    "intent": "training/feedback/meetings/relocation/hr_processes/general",
-    "categories": ["list of relevant categories"],
-    "time_period_days": number or null,
-    "specific_request": "what exactly is being asked",
-    "search_strategy": "how to search the data",
-    "confidence": float (0-1)
-}}
-"""
+        prompt = f'Query: "{query_text}"\n\nCurrent analysis: {json.dumps(base_analysis, ensure_ascii=False)}'
         
         if not self.client:
             return {}
@@ -183,7 +357,7 @@ Respond in JSON format with:
             response = self.client.chat.completions.create(
                 model=settings.model_name,
                 messages=[
-                    {"role": "system", "content": "You are an HR AI assistant that analyzes queries about employee development plans."},
+                    {"role": "system", "content": QUERY_ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
@@ -206,36 +380,20 @@ Respond in JSON format with:
                 if len(lines) > 2:
                     response_content = '\n'.join(lines[1:-1])
             
-            result = json.loads(response_content)
+            result = _json_loads(response_content)
             return result
             
         except Exception as e:
             logger.error(f"AI query analysis error: {str(e)}")
             return {}
     
-    def _extract_time_period(self, query_text: str) -> Optional[int]:
-        """Extract time period in days from query text."""
-        
-        time_patterns = {
-            r'за\s+последни[ехй]\s+(\d+)\s+месяц[аеов]*': lambda x: int(x) * 30,
-            r'за\s+последни[ехй]\s+(\d+)\s+недел[иьяю]*': lambda x: int(x) * 7,
-            r'за\s+последни[ехй]\s+(\d+)\s+дн[ейяь]*': lambda x: int(x),
-            r'последни[ехй]\s+(\d+)\s+месяц[аеов]*': lambda x: int(x) * 30,
-            r'последни[ехй]\s+(\d+)\s+недел[иьяю]*': lambda x: int(x) * 7,
-            r'(\d+)\s+месяц[аеов]*': lambda x: int(x) * 30,
-            r'(\d+)\s+недел[иьяю]*': lambda x: int(x) * 7,
-            r'полгода': lambda x: 180,
-            r'год': lambda x: 365
-        }
-        
-        for pattern, converter in time_patterns.items():
-            match = re.search(pattern, query_text.lower())
+    def _extract_time_period(self, query_lower: str) -> Optional[int]:
+        """Extract time period in days from lowercased query text."""
+        for pattern, converter in TIME_PATTERNS:
+            match = pattern.search(query_lower)
             if match:
                 try:
-                    if pattern in [r'полгода', r'год']:
-                        return converter(None)
-                    else:
-                        return converter(match.group(1))
+                    return converter(match)
                 except (ValueError, IndexError):
                     continue
         
@@ -243,37 +401,23 @@ Respond in JSON format with:
     
     def _extract_employee_names(self, query_text: str) -> List[str]:
         """Extract potential employee names from query text."""
-        # Simple pattern for Cyrillic names
-        name_patterns = [
-            r'[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+',  # Имя Фамилия
-            r'[A-Z][a-z]+\s+[A-Z][a-z]+'        # Name Surname
-        ]
-        
         names = []
-        for pattern in name_patterns:
-            matches = re.findall(pattern, query_text)
-            names.extend(matches)
+        for pattern in NAME_PATTERNS:
+            names.extend(pattern.findall(query_text))
         
         return list(set(names))  # Remove duplicates
     
-    def _extract_keywords(self, query_text: str) -> List[str]:
-        """Extract key search terms from query text."""
-        # Remove common words and extract meaningful terms
-        stop_words = {
-            'кто', 'что', 'где', 'когда', 'как', 'какие', 'который', 'которая', 'которые',
-            'за', 'последние', 'месяца', 'недели', 'дней', 'года', 'сотрудники', 'сотрудник',
-            'who', 'what', 'where', 'when', 'how', 'which', 'last', 'months', 'weeks', 'days',
-            'years', 'employees', 'employee'
-        }
-        
-        # Split query into words and filter
-        words = re.findall(r'\w+', query_text.lower())
-        keywords = [word for word in words if len(word) > 3 and word not in stop_words]
-        
-        return keywords
+    def _extract_keywords(self, query_lower: str) -> List[str]:
+        """Extract key search terms from lowercased query text."""
+        # Split query into words and drop short and common words
+        return [word for word in _WORD_RE.findall(query_lower) if len(word) > 3 and word not in STOP_WORDS]
     
     async def _execute_search(self, query_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Execute database search based on query analysis."""
+        return await self._run_db(self._search, query_analysis)
+    
+    def _search(self, query_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Query documents and collect results for the detected intent."""
         
         results = []
         intent = query_analysis.get('intent', 'general')
@@ -307,9 +451,30 @@ Respond in JSON format with:
                 name_conditions.append(Document.employee_name.ilike(f"%{name}%"))
             query = query.filter(or_(*name_conditions))
         
+        # Only documents that can contribute results leave the database
+        if intent in INTENT_FIELDS:
+            query = query.filter(exists().where(
+                ExtractedItem.document_id == Document.id,
+                ExtractedItem.field.in_(INTENT_FIELDS[intent])
+            ))
+        elif intent == 'meetings':
+            query = query.filter(MeetingAnalysis.id.isnot(None))
+        
+        # Load only the columns the intent reads; document text and structure stay
+        # in the database (general queries fetch text only where they need it)
+        query = query.options(load_only(Document.id, Document.employee_name, Document.parsed_at, Document.file_path))
+        if intent != 'general':
+            fields = INTENT_FIELDS.get(intent, ())
+            query = query.options(load_only(ExtractedInformation.id, *(getattr(ExtractedInformation, field) for field in fields)))
+        if intent != 'meetings':
+            query = query.options(load_only(MeetingAnalysis.id))
+        
+        # Newest documents first; results keep this order, so no sorting afterwards
+        query = query.order_by(Document.parsed_at.desc(), Document.employee_name, Document.id)
+        
         # Execute query
-        db_results = query.all()
-        logger.info(f"Database query returned {len(db_results)} documents")
+        # Stream rows so only one batch of documents and their JSON columns is held at a time
+        db_results = query.yield_per(SEARCH_FETCH_SIZE)
         
         # Process results based on intent
         if intent == 'training':
@@ -328,7 +493,16 @@ Respond in JSON format with:
         logger.info(f"Search execution completed - Found {len(results)} results")
         return results
     
-    def _process_training_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _mentions_keyword(text: str, keywords: List[str]) -> bool:
+        """Whether lowercased text contains any keyword; always true without keywords."""
+        if not keywords:
+            return True
+        # Lowercase once rather than once per keyword
+        text_lower = text.lower()
+        return any(keyword in text_lower for keyword in keywords)
+    
+    def _process_training_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for training-related queries."""
         results = []
         
@@ -336,7 +510,7 @@ Respond in JSON format with:
             if extracted_info and extracted_info.training_development:
                 for item in extracted_info.training_development:
                     # Filter by keywords if provided
-                    if not keywords or any(keyword in item.get('content', '').lower() for keyword in keywords):
+                    if self._mentions_keyword(item.get('content', ''), keywords):
                         results.append({
                             'employee_name': doc.employee_name,
                             'date': doc.parsed_at.strftime('%d.%m.%Y'),
@@ -350,31 +524,24 @@ Respond in JSON format with:
         
         return results
     
-    def _process_feedback_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    def _process_feedback_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for feedback-related queries."""
         results = []
         
-        logger.info(f"Processing feedback results: {len(db_results)} documents, keywords: {keywords}")
-        
-        # Expanded search terms for better matching
-        discomfort_terms = ['дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает', 'беспокоит', 
-                           'волнует', 'тревожит', 'расстраивает', 'огорчает', 'не нравится', 'не устраивает']
+        logger.info(f"Processing feedback results, keywords: {keywords}")
+        keywords = [keyword.lower() for keyword in keywords]
         
         for doc, extracted_info, meeting_analysis in db_results:
             # Check feedback_motivation data
             if extracted_info and extracted_info.feedback_motivation:
                 logger.info(f"Found feedback data for {doc.employee_name}: {len(extracted_info.feedback_motivation)} items")
                 for item in extracted_info.feedback_motivation:
-                    # More flexible keyword matching
-                    content_lower = item.get('content', '').lower()
-                    context_lower = item.get('context', '').lower()
-                    combined_text = f"{content_lower} {context_lower}"
-                    
-                    # Check for keyword matches or discomfort-related terms
-                    keyword_match = not keywords or any(keyword.lower() in combined_text for keyword in keywords)
-                    discomfort_match = any(term in combined_text for term in discomfort_terms)
+                    # More flexible keyword matching, over content and context lowercased together
+                    combined_text = f"{item.get('content', '')} {item.get('context', '')}".lower()
                     
-                    if keyword_match or discomfort_match:
+                    # Check for keyword matches, then discomfort-related terms only if needed
+                    if (not keywords or any(keyword in combined_text for keyword in keywords)
+                            or any(term in combined_text for term in FEEDBACK_DISCOMFORT_TERMS)):
                         results.append({
                             'employee_name': doc.employee_name,
                             'date': doc.parsed_at.strftime('%d.%m.%Y'),
@@ -390,15 +557,11 @@ Respond in JSON format with:
                 logger.info(f"Found risks data for {doc.employee_name}: {len(extracted_info.risks_concerns)} items")
                 for item in extracted_info.risks_concerns:
                     # More flexible keyword matching for risks
-                    content_lower = item.get('content', '').lower()
-                    context_lower = item.get('context', '').lower()
-                    combined_text = f"{content_lower} {context_lower}"
+                    combined_text = f"{item.get('content', '')} {item.get('context', '')}".lower()
                     
-                    # Check for keyword matches or discomfort-related terms
-                    keyword_match = not keywords or any(keyword.lower() in combined_text for keyword in keywords)
-                    discomfort_match = any(term in combined_text for term in discomfort_terms)
-                    
-                    if keyword_match or discomfort_match:
+                    # Check for keyword matches, then discomfort-related terms only if needed
+                    if (not keywords or any(keyword in combined_text for keyword in keywords)
+                            or any(term in combined_text for term in FEEDBACK_DISCOMFORT_TERMS)):
                         results.append({
                             'employee_name': doc.employee_name,
                             'date': doc.parsed_at.strftime('%d.%m.%Y'),
@@ -412,7 +575,7 @@ Respond in JSON format with:
         logger.info(f"Feedback processing result: {len(results)} items found")
         return results
     
-    def _process_meeting_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    def _process_meeting_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for meeting-related queries."""
         results = []
         
@@ -431,14 +594,14 @@ Respond in JSON format with:
         
         return results
     
-    def _process_relocation_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    def _process_relocation_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for relocation-related queries."""
         results = []
         
         for doc, extracted_info, meeting_analysis in db_results:
             if extracted_info and extracted_info.location_relocation:
                 for item in extracted_info.location_relocation:
-                    if not keywords or any(keyword in item.get('content', '').lower() for keyword in keywords):
+                    if self._mentions_keyword(item.get('content', ''), keywords):
                         results.append({
                             'employee_name': doc.employee_name,
                             'date': doc.parsed_at.strftime('%d.%m.%Y'),
@@ -451,14 +614,14 @@ Respond in JSON format with:
         
         return results
     
-    def _process_hr_process_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    def _process_hr_process_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for HR process-related queries."""
         results = []
         
         for doc, extracted_info, meeting_analysis in db_results:
             if extracted_info and extracted_info.hr_processes:
                 for item in extracted_info.hr_processes:
-                    if not keywords or any(keyword in item.get('content', '').lower() for keyword in keywords):
+                    if self._mentions_keyword(item.get('content', ''), keywords):
                         results.append({
                             'employee_name': doc.employee_name,
                             'date': doc.parsed_at.strftime('%d.%m.%Y'),
@@ -471,62 +634,44 @@ Respond in JSON format with:
         
         return results
     
-    def _process_general_results(self, db_results: List[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
+    def _process_general_results(self, db_results: Iterable[Tuple], keywords: List[str]) -> List[Dict[str, Any]]:
         """Process results for general queries."""
         results = []
         
-        logger.info(f"Processing general results: {len(db_results)} documents, keywords: {keywords}")
+        logger.info(f"Processing general results, keywords: {keywords}")
+        keywords = [keyword.lower() for keyword in keywords]
+        search_terms = keywords + list(GENERAL_TEXT_TERMS)
+        search_terms_re = re.compile('|'.join(map(re.escape, search_terms)))
         
-        for doc, extracted_info, meeting_analysis in db_results:
+        for rows in _batched(db_results, SEARCH_FETCH_SIZE):
             # Search in extracted information first (more structured)
-            found_in_extracted = False
+            extracted_results = [
+                (doc, self._match_extracted_items(doc, extracted_info, keywords))
+                for doc, extracted_info, meeting_analysis in rows
+            ]
             
-            # Check all extracted categories for relevant content
-            if extracted_info:
-                categories_to_check = [
-                    ('feedback_motivation', 'Обратная связь'),
-                    ('risks_concerns', 'Риски и проблемы'),
-                    ('training_development', 'Обучение и развитие'),
-                    ('hr_processes', 'HR процессы'),
-                    ('community_engagement', 'Участие в сообществе'),
-                    ('location_relocation', 'Локация/Релокация')
-                ]
-                
-                for category_name, category_label in categories_to_check:
-                    category_data = getattr(extracted_info, category_name, [])
-                    if category_data:
-                        for item in category_data:
-                            content = item.get('content', '').lower()
-                            # Check if content matches keywords or discomfort-related terms
-                            if (not keywords or any(keyword.lower() in content for keyword in keywords) or 
-                                any(term in content for term in ['дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает', 'не нравится'])):
-                                
-                                results.append({
-                                    'employee_name': doc.employee_name,
-                                    'date': doc.parsed_at.strftime('%d.%m.%Y'),
-                                    'type': category_label,
-                                    'content': item.get('content', ''),
-                                    'context': item.get('context', ''),
-                                    'category': item.get('category', ''),
-                                    'document_link': doc.file_path
-                                })
-                                found_in_extracted = True
+            # Document text isn't loaded with the rows; fetch it in one query for the
+            # documents of this batch that had nothing in their extracted data
+            missing_ids = [doc.id for doc, doc_results in extracted_results if not doc_results]
+            full_texts = dict(
+                self.session.query(Document.id, Document.full_text).filter(Document.id.in_(missing_ids))
+            ) if missing_ids else {}
             
-            # If nothing found in extracted data, search full document text
-            if not found_in_extracted and doc.full_text:
-                full_text = doc.full_text.lower()
-                search_terms = keywords + ['дискомфорт', 'проблем', 'недовольств', 'стресс', 'вызывает']
+            for doc, doc_results in extracted_results:
+                if doc_results:
+                    results.extend(doc_results)
+                    continue
                 
-                if any(term.lower() in full_text for term in search_terms):
-                    # Find relevant sentences
-                    sentences = doc.full_text.split('.')
-                    relevant_sentences = []
-                    
-                    for sentence in sentences:
-                        if any(term.lower() in sentence.lower() for term in search_terms):
-                            relevant_sentences.append(sentence.strip())
-                        if len(relevant_sentences) >= 3:  # Limit to first 3 matches
-                            break
+                # If nothing found in extracted data, search full document text
+                document_text = full_texts.get(doc.id)
+                if not document_text:
+                    continue
+                
+                full_text = document_text.lower()
+                
+                if any(term in full_text for term in search_terms):
+                    # Find relevant sentences (first 3 matches)
+                    relevant_sentences = self._relevant_sentences(document_text, full_text, search_terms_re, 3)
                     
                     if relevant_sentences:
                         results.append({
@@ -540,20 +685,80 @@ Respond in JSON format with:
         logger.info(f"General processing result: {len(results)} items found")
         return results
     
+    @staticmethod
+    def _relevant_sentences(text: str, text_lower: str, terms_re: Pattern, limit: int) -> List[str]:
+        """
+        Find the first '.'-separated sentences of a text that contain a search term.
+        
+        Args:
+            text: Document text
+            text_lower: text.lower()
+            terms_re: Alternation of the lowercased search terms
+            limit: Maximum number of sentences
+            
+        Returns:
+            Stripped sentences in document order
+        """
+        if len(text_lower) != len(text):
+            # Lowercasing changed offsets (e.g. 'İ'), so test sentence by sentence
+            matching = (sentence.strip() for sentence in text.split('.') if terms_re.search(sentence.lower()))
+            return list(islice(matching, limit))
+        
+        # Jump from match to match in one scan instead of splitting the whole text
+        sentences = []
+        position = 0
+        while len(sentences) < limit:
+            match = terms_re.search(text_lower, position)
+            if not match:
+                break
+            start = text_lower.rfind('.', 0, match.start()) + 1
+            end = text_lower.find('.', match.end())
+            if end == -1:
+                end = len(text_lower)
+            sentences.append(text[start:end].strip())
+            position = end + 1
+        
+        return sentences
+    
+    def _match_extracted_items(self, doc: Document, extracted_info: Optional[ExtractedInformation],
+                               keywords: List[str]) -> List[Dict[str, Any]]:
+        """General-query results from a document's extracted categories."""
+        results = []
+        if not extracted_info:
+            return results
+        
+        # Check all extracted categories for relevant content
+        for category_name, category_label in GENERAL_CATEGORIES:
+            for item in getattr(extracted_info, category_name, None) or []:
+                content = item.get('content', '').lower()
+                # Check if content matches keywords or discomfort-related terms
+                if (not keywords or any(keyword in content for keyword in keywords) or 
+                    any(term in content for term in GENERAL_DISCOMFORT_TERMS)):
+                    
+                    results.append({
+                        'employee_name': doc.employee_name,
+                        'date': doc.parsed_at.strftime('%d.%m.%Y'),
+                        'type': category_label,
+                        'content': item.get('content', ''),
+                        'context': item.get('context', ''),
+                        'category': item.get('category', ''),
+                        'document_link': doc.file_path
+                    })
+        
+        return results
+    
     async def _format_response(self, query_analysis: Dict[str, Any], search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Format search results into structured response."""
         
         # Create summary
         summary = self._create_result_summary(query_analysis, search_results)
         
-        # Sort results by relevance (date, employee name)
-        sorted_results = sorted(search_results, key=lambda x: (x.get('date', ''), x.get('employee_name', '')), reverse=True)
-        
+        # Results arrive sorted by date (newest first), then employee name
         response = {
             'success': True,
             'query_analysis': query_analysis,
-            'total_results': len(sorted_results),
-            'results': sorted_results,
+            'total_results': len(search_results),
+            'results': search_results,
             'summary': summary,
             'timestamp': datetime.now().isoformat()
         }
@@ -598,53 +803,100 @@ Respond in JSON format with:
         return ' '.join(summary_parts)
     
     def _log_query(self, query_text: str, query_analysis: Dict[str, Any], response: Dict[str, Any], processing_time: float):
-        """Log query for analytics and improvement."""
-        try:
-            log_entry = QueryLog(
-                query_text=query_text,
-                query_type=query_analysis.get('intent', 'general'),
-                response_data=response,
-                response_summary=response.get('summary', ''),
-                documents_matched=response.get('total_results', 0),
-                processing_time=processing_time
-            )
+        """Log query for analytics and improvement; written in the background, off the request path."""
+        with self._log_writer_lock:
+            if self._log_writer is None:
+                self._log_writer = threading.Thread(target=self._write_logs, name='query-log-writer', daemon=True)
+                self._log_writer.start()
+        
+        self._log_queue.put({
+            'query_text': query_text,
+            'query_type': query_analysis.get('intent', 'general'),
+            # Copy so callers editing the response afterwards don't change the log
+            'response_data': copy.deepcopy(response),
+            'response_summary': response.get('summary', ''),
+            'documents_matched': response.get('total_results', 0),
+            'queried_at': datetime.utcnow(),
+            'processing_time': processing_time
+        })
+    
+    def _write_logs(self) -> None:
+        """Insert queued query logs until close(); rows queued during a commit share the next one."""
+        stopping = False
+        while not stopping:
+            row = self._log_queue.get()
+            if row is None:
+                return
             
-            self.session.add(log_entry)
-            self.session.commit()
+            batch = [row]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    row = self._log_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
             
-        except Exception as e:
-            logger.error(f"Error logging query: {str(e)}")
-            self.session.rollback()
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(insert(QueryLog), batch)
+            except Exception as e:
+                logger.error(f"Error logging {len(batch)} queries: {str(e)}")
+    
+    def _flush_logs(self) -> None:
+        """Write all queued query logs and stop the writer thread."""
+        with self._log_writer_lock:
+            if self._log_writer is None:
+                return
+            # The writer stays registered until it has drained the queue, so no
+            # second writer can start and take the stop marker meant for it
+            self._log_queue.put(None)
+            self._log_writer.join()
+            self._log_writer = None
     
     def get_popular_queries(self, days: int = 30, limit: int = 10) -> List[Dict[str, Any]]:
         """Get most popular queries from the last N days."""
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        logs = self.session.query(QueryLog).filter(
-            QueryLog.queried_at >= cutoff_date
-        ).order_by(QueryLog.queried_at.desc()).limit(limit * 2).all()
-        
-        # Group by similar queries (basic similarity)
-        query_groups = {}
-        for log in logs:
+        try:
+            # Only the columns used below; response_data is by far the largest
+            logs = self.session.query(
+                QueryLog.query_text, QueryLog.query_type, QueryLog.documents_matched
+            ).filter(
+                QueryLog.queried_at >= cutoff_date
+            ).order_by(QueryLog.queried_at.desc()).limit(limit * 2).all()
+        finally:
+            # End the read transaction so the next call sees newly written logs
+            self.session.close()
+        
+        # Group by similar queries (basic similarity), counted in one pass;
+        # the most recent query of a group is its example
+        counts = Counter()
+        total_results = Counter()
+        examples = {}
+        for query_text, query_type, documents_matched in logs:
             # Simple grouping by first few words
-            key_words = ' '.join(log.query_text.lower().split()[:3])
-            if key_words not in query_groups:
-                query_groups[key_words] = []
-            query_groups[key_words].append(log)
+            key_words = ' '.join(query_text.lower().split()[:3])
+            counts[key_words] += 1
+            total_results[key_words] += documents_matched
+            examples.setdefault(key_words, (query_text, query_type))
         
-        # Return most frequent groups
+        # Return most frequent groups (ties keep first-seen order)
         popular = []
-        for group_queries in sorted(query_groups.values(), key=len, reverse=True)[:limit]:
+        for key_words, count in counts.most_common(limit):
+            query_example, query_type = examples[key_words]
             popular.append({
-                'query_example': group_queries[0].query_text,
-                'count': len(group_queries),
-                'query_type': group_queries[0].query_type,
-                'avg_results': sum(q.documents_matched for q in group_queries) / len(group_queries)
+                'query_example': query_example,
+                'count': count,
+                'query_type': query_type,
+                'avg_results': total_results[key_words] / count
             })
         
         return popular
     
     def close(self):
-        """Close database session."""
+        """Write pending query logs and close database session."""
+        self._flush_logs()
         self.session.close()
\ No newline at end of file
@@ -2,13 +2,46 @@
 Database models for storing HR AI analysis results.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, ForeignKey, Index, delete, exists, func, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Any, Dict, List, Set
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# ExtractedInformation JSON columns flattened into extracted_items
+EXTRACTED_FIELDS = (
+    'training_development',
+    'feedback_motivation',
+    'hr_processes',
+    'community_engagement',
+    'location_relocation',
+    'risks_concerns'
+)
+
+# Indexes superseded by newer ones; dropped from databases created by an older schema
+RETIRED_INDEXES = (
+    'ix_documents_employee_name',  # Leading column of ix_documents_employee_name_parsed_at
+    'ix_meeting_analyses_document_id',  # Superseded by uq_meeting_analyses_document_id
+    'ix_extracted_information_document_id',  # Superseded by uq_extracted_information_document_id
+)
+
+# Extractions backfilled into extracted_items per transaction
+BACKFILL_BATCH_SIZE = 500
+
+# schema_meta key recording that the extracted_items backfill has completed
+BACKFILL_DONE_KEY = 'extracted_items_backfilled'
+
+# Databases brought up to date by prepare_database in this process
+_prepared_databases: Set[str] = set()
+_prepare_lock = threading.Lock()
+
 class Employee(Base):
     """Employee information extracted from documents."""
     __tablename__ = "employees"
@@ -25,12 +58,18 @@ class Employee(Base):
 class Document(Base):
     """Individual Development Plan documents."""
     __tablename__ = "documents"
+    __table_args__ = (
+        # Covers the employee name + time window filters, so per-employee counts and
+        # max(parsed_at) are answered from the index even for substring name matches
+        Index('ix_documents_employee_name_parsed_at', 'employee_name', 'parsed_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     employee_id = Column(Integer, ForeignKey('employees.id'), index=True)
     file_path = Column(String(500), unique=True, nullable=False)
     employee_name = Column(String(255), nullable=False)
     file_hash = Column(String(64), index=True)  # For detecting changes
+    text_hash = Column(String(64))  # Hash of the extracted text; unchanged text reuses the stored analysis
     file_size = Column(Integer)
     file_modified = Column(DateTime)
     
@@ -42,7 +81,7 @@ class Document(Base):
     meeting_sections = Column(JSON)  # Identified meeting sections
     
     # Processing metadata
-    parsed_at = Column(DateTime, default=datetime.utcnow)
+    parsed_at = Column(DateTime, default=datetime.utcnow, index=True)  # Summary time window
     last_analyzed = Column(DateTime)
     analysis_version = Column(String(50))  # Track analysis algorithm version
     
@@ -50,13 +89,18 @@ class Document(Base):
     employee = relationship("Employee", back_populates="documents")
     meeting_analyses = relationship("MeetingAnalysis", back_populates="document")
     extracted_info = relationship("ExtractedInformation", back_populates="document")
+    extracted_items = relationship("ExtractedItem", back_populates="document")
 
 class MeetingAnalysis(Base):
     """Results of meeting occurrence analysis."""
     __tablename__ = "meeting_analyses"
+    __table_args__ = (
+        # One analysis per document; target of the upsert in HRAnalyzer
+        Index('uq_meeting_analyses_document_id', 'document_id', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
-    document_id = Column(Integer, ForeignKey('documents.id'), index=True)
+    document_id = Column(Integer, ForeignKey('documents.id'))
     
     # Analysis results
     meeting_occurred = Column(Boolean, nullable=False)
@@ -79,7 +123,7 @@ class ExtractedInformation(Base):
     __tablename__ = "extracted_information"
     
     id = Column(Integer, primary_key=True)
-    document_id = Column(Integer, ForeignKey('documents.id'), index=True)
+    document_id = Column(Integer, ForeignKey('documents.id'))
     
     # Extracted categories (stored as JSON arrays)
     training_development = Column(JSON)
@@ -95,6 +139,44 @@ class ExtractedInformation(Base):
     
     # Relationship
     document = relationship("Document", back_populates="extracted_info")
+    
+    __table_args__ = (
+        # One extraction per document; target of the upsert in HRAnalyzer
+        Index('uq_extracted_information_document_id', 'document_id', unique=True),
+        # Partial indexes so "has feedback/risks" counts are index-only probes
+        Index(
+            'ix_ei_fb_nonempty', 'id',
+            sqlite_where=text("feedback_motivation IS NOT NULL AND feedback_motivation != '[]'"),
+            postgresql_where=text("feedback_motivation IS NOT NULL AND feedback_motivation::text != '[]'")
+        ),
+        Index(
+            'ix_ei_risks_nonempty', 'id',
+            sqlite_where=text("risks_concerns IS NOT NULL AND risks_concerns != '[]'"),
+            postgresql_where=text("risks_concerns IS NOT NULL AND risks_concerns::text != '[]'")
+        ),
+    )
+
+class ExtractedItem(Base):
+    """Individual extracted items, flattened from ExtractedInformation for filtering in SQL."""
+    __tablename__ = "extracted_items"
+    __table_args__ = (
+        Index('ix_extracted_items_field_status', 'field', 'status'),
+        Index('ix_extracted_items_field_sentiment', 'field', 'sentiment'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), index=True)
+    field = Column(String(50), nullable=False)  # ExtractedInformation column the item came from
+    
+    # Item attributes
+    category = Column(String(255))
+    status = Column(String(50))
+    sentiment = Column(String(50))
+    content = Column(Text)
+    context = Column(Text)
+    
+    # Relationship
+    document = relationship("Document", back_populates="extracted_items")
 
 class AnalysisReport(Base):
     """Weekly analysis reports sent to HR."""
@@ -150,4 +232,177 @@ class SystemLog(Base):
     # Metadata
     logged_at = Column(DateTime, default=datetime.utcnow)
     resolved = Column(Boolean, default=False)
-    resolved_at = Column(DateTime)
\ No newline at end of file
+    resolved_at = Column(DateTime)
+
+class SchemaMeta(Base):
+    """Completed one-time schema migrations, keyed by migration name."""
+    __tablename__ = "schema_meta"
+    
+    key = Column(String(100), primary_key=True)
+    value = Column(String(255))
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+def create_missing_columns(engine) -> None:
+    """Add nullable model columns that are missing from tables created by an older schema."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def create_missing_indexes(engine) -> None:
+    """Create model indexes that are missing from tables created by an older schema."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+def delete_duplicate_analyses(engine) -> None:
+    """
+    Keep only the newest row per document in tables that now have a unique document_id index.
+    
+    Older schemas allowed several analyses per document; they must be removed
+    before the unique index can be created. Tables that already have the
+    index are skipped.
+    """
+    inspector = inspect(engine)
+    for model in (MeetingAnalysis, ExtractedInformation):
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        if all(index.name in existing for index in table.indexes if index.unique):
+            continue
+        
+        newest_ids = select(func.max(table.c.id)).where(table.c.document_id.isnot(None)).group_by(table.c.document_id)
+        with engine.begin() as conn:
+            deleted = conn.execute(
+                delete(table).where(table.c.document_id.isnot(None), table.c.id.not_in(newest_ids))
+            ).rowcount
+        if deleted:
+            logger.info(f"Removed {deleted} duplicate rows from {table.name}")
+
+def drop_retired_indexes(engine) -> None:
+    """Drop indexes that older schemas created and the current models no longer define."""
+    with engine.begin() as conn:
+        for index_name in RETIRED_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+
+def extracted_item_rows(document_id: int, extracted: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten extracted category lists into extracted_items rows."""
+    rows = []
+    for field in EXTRACTED_FIELDS:
+        for item in extracted.get(field) or []:
+            if not isinstance(item, dict):
+                continue
+            rows.append({
+                'document_id': document_id,
+                'field': field,
+                'category': item.get('category'),
+                'status': item.get('status'),
+                'sentiment': item.get('sentiment'),
+                'content': item.get('content'),
+                'context': item.get('context', '')
+            })
+    return rows
+
+def backfill_extracted_items(engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Populate extracted_items for extractions that have no items yet.
+    
+    Extractions are read in id order and each batch is inserted in its own
+    transaction, so an interrupted backfill resumes where it stopped.
+    
+    Args:
+        engine: SQLAlchemy engine
+        batch_size: Extractions per transaction
+        
+    Returns:
+        Number of items inserted
+    """
+    info_table = ExtractedInformation.__table__
+    item_table = ExtractedItem.__table__
+    missing_items = ~exists().where(item_table.c.document_id == info_table.c.document_id)
+    
+    inserted = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            records = conn.execute(
+                select(info_table.c.id, info_table.c.document_id, *(info_table.c[field] for field in EXTRACTED_FIELDS))
+                .where(info_table.c.id > last_id, missing_items)
+                .order_by(info_table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not records:
+                break
+            
+            rows = []
+            for record in records:
+                rows.extend(extracted_item_rows(record.document_id, record._mapping))
+            if rows:
+                conn.execute(insert(item_table), rows)
+            inserted += len(rows)
+            last_id = records[-1].id
+    
+    if inserted:
+        logger.info(f"Backfilled {inserted} extracted items")
+    return inserted
+
+def ensure_schema(engine, backfill_batch_size: int = BACKFILL_BATCH_SIZE) -> None:
+    """
+    Bring a database up to the current schema.
+    
+    Creates missing tables and columns, removes duplicate analyses that would
+    violate the unique document_id indexes, creates missing indexes, drops
+    retired indexes, then backfills extracted_items for extractions stored
+    before that table existed. The backfill runs until it completes once
+    (resuming after interruptions) and is skipped afterwards, since every
+    extraction stored since then is written with its items.
+    
+    Args:
+        engine: SQLAlchemy engine
+        backfill_batch_size: Extractions per backfill transaction
+    """
+    Base.metadata.create_all(engine)
+    create_missing_columns(engine)
+    delete_duplicate_analyses(engine)
+    create_missing_indexes(engine)
+    drop_retired_indexes(engine)
+    
+    meta_table = SchemaMeta.__table__
+    with engine.connect() as conn:
+        backfilled = conn.execute(
+            select(meta_table.c.key).where(meta_table.c.key == BACKFILL_DONE_KEY)
+        ).first() is not None
+    if not backfilled:
+        backfill_extracted_items(engine, backfill_batch_size)
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(meta_table).values(key=BACKFILL_DONE_KEY, value='1'))
+        except IntegrityError:
+            pass  # Another process finished the backfill at the same time
+
+def prepare_database(engine) -> None:
+    """
+    Run ensure_schema once per database in this process.
+    
+    HRAnalyzer, RecommendationEngine and QueryProcessor all call this, so only
+    the first of them to open a database pays for the schema checks.
+    In-memory databases are distinct per engine and always prepared.
+    """
+    url = engine.url
+    if url.database in (None, '', ':memory:'):
+        ensure_schema(engine)
+        return
+    
+    key = url.render_as_string(hide_password=False)
+    with _prepare_lock:
+        if key not in _prepared_databases:
+            ensure_schema(engine)
+            _prepared_databases.add(key)
@@ -240,19 +240,14 @@ class DocumentParser:
             logger.warning(f"Documents directory does not exist: {self.docs_directory}")
             return files_info
         
-        for file_path in self.docs_directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                try:
-                    stat = file_path.stat()
-                    files_info.append({
-                        'file_path': str(file_path),
-                        'employee_name': self._extract_employee_name(file_path.name),
-                        'file_size': stat.st_size,
-                        'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        'extension': file_path.suffix.lower()
-                    })
-                except Exception as e:
-                    logger.warning(f"Could not get info for {file_path}: {str(e)}")
+        for entry, stat in self._scan_supported_files():
+            files_info.append({
+                'file_path': entry.path,
+                'employee_name': self._extract_employee_name(entry.name),
+                'file_size': stat.st_size,
+                'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                'extension': os.path.splitext(entry.name)[1].lower()
+            })
         
         return files_info
     
@@ -267,12 +262,41 @@ class DocumentParser:
             List of file paths
         """
         cutoff_time = datetime.now().timestamp() - (days * 24 * 60 * 60)
-        files_info = self.scan_directory()
         
-        recent_files = []
-        for file_info in files_info:
-            modified_timestamp = datetime.fromisoformat(file_info['modified_time']).timestamp()
-            if modified_timestamp >= cutoff_time:
-                recent_files.append(file_info['file_path'])
+        if not self.docs_directory.exists():
+            logger.warning(f"Documents directory does not exist: {self.docs_directory}")
+            return []
         
-        return recent_files
\ No newline at end of file
+        return [
+            entry.path for entry, stat in self._scan_supported_files()
+            if stat.st_mtime >= cutoff_time
+        ]
+    
+    def _scan_supported_files(self):
+        """
+        Walk the documents directory with os.scandir.
+        
+        File type checks use the directory entry, so each supported file
+        costs a single stat() call.
+        
+        Yields:
+            (os.DirEntry, os.stat_result) for every supported file
+        """
+        pending = [str(self.docs_directory)]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"Could not scan {directory}: {str(e)}")
+                continue
+            
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.supported_extensions:
+                        yield entry, entry.stat()
+                except OSError as e:
+                    logger.warning(f"Could not get info for {entry.path}: {str(e)}")
\ No newline at end of file
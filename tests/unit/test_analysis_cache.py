@@ -0,0 +1,183 @@
+"""
+Unit tests for HR AI analysis cache.
+"""
+
+import pytest
+import tempfile
+import os
+import sqlite3
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from hr_ai.analyzers.analysis_cache import AnalysisCache
+from hr_ai.analyzers.text_analyzer import MeetingAnalysis, ExtractedInformation
+
+class TestAnalysisCache:
+    """Test cases for AnalysisCache."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, 'cache.db')
+        self.cache = AnalysisCache(self.cache_path, 'v1:test-model')
+        
+        self.meeting_analysis = MeetingAnalysis(
+            meeting_occurred=True,
+            confidence_score=0.9,
+            evidence=['Обсудили прогресс'],
+            meeting_type='checkpoint'
+        )
+        self.extracted_info = ExtractedInformation(
+            training_development=[{'category': 'course', 'content': 'Python', 'status': 'completed'}],
+            feedback_motivation=[],
+            hr_processes=[],
+            community_engagement=[],
+            location_relocation=[{'category': 'relocation_plans', 'content': 'релокация'}],
+            risks_concerns=[]
+        )
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.cache.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_put_get_round_trip(self):
+        """Test that stored results are returned unchanged."""
+        content_hash = self.cache.content_hash('Текст документа')
+        self.cache.put(content_hash, self.meeting_analysis, self.extracted_info)
+        
+        cached = self.cache.get(content_hash)
+        
+        assert cached is not None
+        meeting_analysis, extracted_info = cached
+        assert meeting_analysis == self.meeting_analysis
+        assert extracted_info == self.extracted_info
+    
+    def test_get_miss(self):
+        """Test that unknown content returns None."""
+        assert self.cache.get(self.cache.content_hash('Другой текст')) is None
+    
+    def test_results_survive_reopen(self):
+        """Test that results are persisted to the cache file."""
+        content_hash = self.cache.content_hash('Текст документа')
+        self.cache.put(content_hash, self.meeting_analysis, self.extracted_info)
+        self.cache.close()
+        
+        self.cache = AnalysisCache(self.cache_path, 'v1:test-model')
+        
+        assert self.cache.get(content_hash) == (self.meeting_analysis, self.extracted_info)
+    
+    def test_version_change_misses(self):
+        """Test that a new analyzer version does not reuse old results."""
+        self.cache.put(self.cache.content_hash('Текст документа'), self.meeting_analysis, self.extracted_info)
+        self.cache.close()
+        
+        self.cache = AnalysisCache(self.cache_path, 'v2:test-model')
+        
+        assert self.cache.get(self.cache.content_hash('Текст документа')) is None
+
+    def test_response_round_trip(self):
+        """Test storing raw responses by request."""
+        request = {'model': 'test-model', 'messages': [{'role': 'user', 'content': 'Текст'}]}
+        request_hash = self.cache.request_hash(request)
+        
+        assert self.cache.get_response(request_hash) is None
+        self.cache.put_response(request_hash, '{"meeting_occurred": true}')
+        assert self.cache.get_response(request_hash) == '{"meeting_occurred": true}'
+        
+        # Argument order does not change the key
+        assert self.cache.request_hash(dict(reversed(list(request.items())))) == request_hash
+    
+    def _row_count(self, table):
+        """Count the rows actually stored in a cache table."""
+        conn = sqlite3.connect(self.cache_path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def test_row_cap_evicts_oldest(self):
+        """Test that tables stay within the cap plus slack and keep the most recently stored rows."""
+        self.cache.max_entries = 20
+        limit = 20 + 2  # EVICTION_SLACK of the cap
+        hashes = [self.cache.content_hash(f'Текст {i}') for i in range(100)]
+        for i, content_hash in enumerate(hashes):
+            with patch('hr_ai.analyzers.analysis_cache.time.time', return_value=1000.0 + i):
+                self.cache.put(content_hash, self.meeting_analysis, self.extracted_info)
+                self.cache.put_response(f'request-{i}', 'ответ')
+                # Rewriting an existing entry must not let the table creep past the cap
+                self.cache.put_response(f'request-{i}', 'ответ')
+            assert self._row_count('analysis_cache') <= limit
+            assert self._row_count('response_cache') <= limit
+        
+        assert self._row_count('analysis_cache') >= 20
+        assert all(self.cache.get(content_hash) is not None for content_hash in hashes[-20:])
+        assert self.cache.get(hashes[0]) is None
+        assert self.cache.get_response('request-99') == 'ответ'
+        assert self.cache.get_response('request-0') is None
+    
+    def test_age_limit(self):
+        """Test that entries not stored or reused within the age limit are deleted on put."""
+        self.cache.max_age_days = 30
+        old_hash = self.cache.content_hash('Старый текст')
+        with patch('hr_ai.analyzers.analysis_cache.time.time', return_value=1000.0):
+            self.cache.put(old_hash, self.meeting_analysis, self.extracted_info)
+            self.cache.put_response('old-request', 'ответ')
+            self.cache.put_response('reused-request', 'ответ')
+        # A hit renews the entry
+        assert self.cache.get_response('reused-request') == 'ответ'
+        
+        self.cache.put(self.cache.content_hash('Новый текст'), self.meeting_analysis, self.extracted_info)
+        self.cache.put_response('new-request', 'ответ')
+        
+        assert self.cache.get(old_hash) is None
+        assert self.cache.get_response('old-request') is None
+        assert self.cache.get_response('reused-request') == 'ответ'
+    
+    def test_prune_removes_entries_of_gone_documents(self):
+        """Test that entries are kept only for document texts that are still stored."""
+        live, gone = self.cache.text_hash('Текущий текст'), self.cache.text_hash('Удаленный текст')
+        self.cache.put(self.cache.content_hash('Текущий текст'), self.meeting_analysis, self.extracted_info, live)
+        self.cache.put(self.cache.content_hash('Удаленный текст'), self.meeting_analysis, self.extracted_info, gone)
+        self.cache.put_response('live-request', 'ответ', live)
+        self.cache.put_response('gone-request', 'ответ', gone)
+        self.cache.put_response('shared-request', 'ответ', gone)
+        # The edited document reuses a response; it now belongs to the live text
+        assert self.cache.get_response('shared-request', live) == 'ответ'
+        
+        assert self.cache.prune([live]) == 2
+        
+        assert self.cache.get(self.cache.content_hash('Текущий текст')) is not None
+        assert self.cache.get(self.cache.content_hash('Удаленный текст')) is None
+        assert self.cache.get_response('live-request') == 'ответ'
+        assert self.cache.get_response('shared-request') == 'ответ'
+        assert self.cache.get_response('gone-request') is None
+    
+    def test_upgrades_old_cache_file(self):
+        """Test that cache files without the eviction columns are upgraded in place."""
+        self.cache.close()
+        os.remove(self.cache_path)
+        conn = sqlite3.connect(self.cache_path)
+        conn.execute("CREATE TABLE response_cache (request_hash TEXT PRIMARY KEY, response TEXT NOT NULL)")
+        conn.execute("INSERT INTO response_cache VALUES ('old-request', 'ответ')")
+        conn.commit()
+        conn.close()
+        
+        self.cache = AnalysisCache(self.cache_path, 'v1:test-model', max_entries=1)
+        
+        for i in range(2):
+            with patch('hr_ai.analyzers.analysis_cache.time.time', return_value=1000.0 + i):
+                self.cache.put_response(f'new-request-{i}', 'ответ')
+        
+        # The old row counts as oldest and goes first once the cap is exceeded
+        assert self.cache.get_response('old-request') is None
+        assert self.cache.get_response('new-request-1') == 'ответ'
+        assert self._row_count('response_cache') == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Unit tests for HR AI database schema helpers.
+"""
+
+import pytest
+import tempfile
+import os
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import func, inspect, select, text
+
+from config.settings import make_engine
+from hr_ai.models.database import (
+    Base, Document, ExtractedInformation, ExtractedItem, MeetingAnalysis,
+    backfill_extracted_items, ensure_schema, extracted_item_rows, prepare_database
+)
+
+class TestDatabase:
+    """Test cases for schema setup and the extracted_items backfill."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine = make_engine(f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}")
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.engine.dispose()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _store_extractions(self, count):
+        """Store documents with extractions but no extracted_items, as older versions did."""
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            for i in range(count):
+                document_id = conn.execute(Document.__table__.insert().values(
+                    file_path=f'doc{i}.docx', employee_name=f'Сотрудник {i}'
+                )).inserted_primary_key[0]
+                conn.execute(ExtractedInformation.__table__.insert().values(
+                    document_id=document_id,
+                    training_development=[{'category': 'course', 'content': f'Курс {i}', 'status': 'planned'}],
+                    feedback_motivation=[{'content': 'усталость', 'sentiment': 'negative'}] if i % 2 else [],
+                    hr_processes=[],
+                    community_engagement=[],
+                    location_relocation=None,
+                    risks_concerns=['not a dict']
+                ))
+    
+    def _item_count(self):
+        """Count stored extracted_items rows."""
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(ExtractedItem.__table__)).scalar()
+    
+    def test_extracted_item_rows(self):
+        """Test flattening extracted categories into rows."""
+        rows = extracted_item_rows(7, {
+            'training_development': [{'category': 'course', 'content': 'Python', 'status': 'planned'}],
+            'feedback_motivation': [{'content': 'усталость', 'sentiment': 'negative', 'context': 'Чувствует усталость'}],
+            'risks_concerns': ['not a dict'],
+            'location_relocation': None
+        })
+        
+        assert rows == [
+            {'document_id': 7, 'field': 'training_development', 'category': 'course', 'status': 'planned',
+             'sentiment': None, 'content': 'Python', 'context': ''},
+            {'document_id': 7, 'field': 'feedback_motivation', 'category': None, 'status': None,
+             'sentiment': 'negative', 'content': 'усталость', 'context': 'Чувствует усталость'}
+        ]
+    
+    def test_ensure_schema_creates_tables(self):
+        """Test that ensure_schema creates every model table."""
+        ensure_schema(self.engine)
+        
+        tables = set(inspect(self.engine).get_table_names())
+        assert set(Base.metadata.tables) <= tables
+    
+    def test_ensure_schema_removes_duplicate_analyses(self):
+        """Test that upgrading a database with repeated analyses keeps the newest one per document."""
+        # Older schemas had a plain index on document_id and allowed duplicates
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            for table_name in ('meeting_analyses', 'extracted_information'):
+                conn.execute(text(f'DROP INDEX uq_{table_name}_document_id'))
+                conn.execute(text(f'CREATE INDEX ix_{table_name}_document_id ON {table_name} (document_id)'))
+            for i in range(2):
+                conn.execute(Document.__table__.insert().values(file_path=f'doc{i}.docx', employee_name=f'Сотрудник {i}'))
+            for document_id, confidence_score in ((1, 0.1), (1, 0.9), (2, 0.5)):
+                conn.execute(MeetingAnalysis.__table__.insert().values(
+                    document_id=document_id, meeting_occurred=True, confidence_score=confidence_score
+                ))
+                conn.execute(ExtractedInformation.__table__.insert().values(
+                    document_id=document_id,
+                    training_development=[{'category': 'course', 'content': f'Курс {confidence_score}'}]
+                ))
+        
+        ensure_schema(self.engine)
+        
+        with self.engine.connect() as conn:
+            meetings = conn.execute(
+                select(MeetingAnalysis.document_id, MeetingAnalysis.confidence_score).order_by(MeetingAnalysis.document_id)
+            ).all()
+            training = conn.execute(
+                select(ExtractedItem.content).where(ExtractedItem.document_id == 1)
+            ).scalars().all()
+        assert meetings == [(1, 0.9), (2, 0.5)]
+        assert training == ['Курс 0.9']
+        
+        inspector = inspect(self.engine)
+        for table_name in ('meeting_analyses', 'extracted_information'):
+            indexes = {index['name']: index['unique'] for index in inspector.get_indexes(table_name)}
+            assert indexes.get(f'uq_{table_name}_document_id')
+            assert f'ix_{table_name}_document_id' not in indexes
+    
+    def test_backfill_fills_missing_items(self):
+        """Test that extractions stored without items are backfilled across batches."""
+        self._store_extractions(5)
+        
+        inserted = backfill_extracted_items(self.engine, batch_size=2)
+        
+        # One training item each, plus feedback for odd documents
+        assert inserted == 7
+        assert self._item_count() == 7
+    
+    def test_backfill_is_idempotent(self):
+        """Test that a second backfill does not duplicate items."""
+        self._store_extractions(3)
+        backfill_extracted_items(self.engine)
+        
+        assert backfill_extracted_items(self.engine) == 0
+        assert self._item_count() == 4
+    
+    def test_backfill_resumes_after_partial_run(self):
+        """Test that extractions left without items by an interrupted backfill are filled later."""
+        self._store_extractions(4)
+        backfill_extracted_items(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(ExtractedItem.__table__.delete().where(ExtractedItem.document_id > 2))
+        
+        ensure_schema(self.engine)
+        
+        assert self._item_count() == 6
+    
+    def test_backfill_is_skipped_once_complete(self):
+        """Test that empty extractions are not rescanned after the backfill has completed."""
+        self._store_extractions(2)
+        ensure_schema(self.engine)
+        assert self._item_count() == 3
+        
+        with patch('hr_ai.models.database.backfill_extracted_items') as backfill:
+            ensure_schema(self.engine)
+        
+        backfill.assert_not_called()
+    
+    def test_prepare_database_runs_once(self):
+        """Test that the schema is brought up to date once per database and process."""
+        with patch('hr_ai.models.database.ensure_schema') as ensure:
+            prepare_database(self.engine)
+            prepare_database(self.engine)
+            assert ensure.call_count == 1
+            
+            # In-memory databases are separate per engine
+            memory_engine = make_engine("sqlite:///:memory:")
+            prepare_database(memory_engine)
+            prepare_database(memory_engine)
+            assert ensure.call_count == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Unit tests for HR AI analysis engine.
+"""
+
+import pytest
+import tempfile
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import get_settings
+from hr_ai.analyzers.hr_analyzer import HRAnalyzer, MMAP_HASH_THRESHOLD, _content_hasher
+from hr_ai.analyzers.text_analyzer import MeetingAnalysis, ExtractedInformation
+from hr_ai.models.database import (
+    Document, MeetingAnalysis as MeetingAnalysisDB,
+    ExtractedInformation as ExtractedInformationDB, ExtractedItem
+)
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that counts requests."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+    
+    def create(self, **request):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        if 'meetings' in request['messages'][0]['content']:
+            content = '{"meeting_occurred": true, "confidence_score": 0.95, "evidence": ["Обсудили цели"]}'
+        else:
+            content = '{"training_development": [{"category": "course", "content": "Python"}], "feedback_motivation": []}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class TestHRAnalyzer:
+    """Test cases for HRAnalyzer."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.analyzer = HRAnalyzer(f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}")
+        
+        self.document_data = {
+            'file_path': os.path.join(self.temp_dir, 'Иван Петров - Employee development plan.docx'),
+            'employee_name': 'Иван Петров',
+            'full_text': 'Прошел курс по Python. Планирует релокацию в Алматы.',
+            'sections': {},
+            'tables': [],
+            'dates_found': [],
+            'meeting_sections': []
+        }
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.analyzer.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _analysis(self, file_hash='hash-1', text_hash='text-1', **results):
+        """Build _parse_and_analyze output for the sample document."""
+        return {
+            'document_data': self.document_data,
+            'file_hash': file_hash,
+            'text_hash': text_hash,
+            'file_size': 100,
+            'file_modified': datetime(2025, 1, 15),
+            **results
+        }
+    
+    def _results(self, confidence_score=0.9, training=None):
+        """Build analyzer results for the sample document."""
+        meeting_analysis = MeetingAnalysis(
+            meeting_occurred=True,
+            confidence_score=confidence_score,
+            evidence=['Обсудили прогресс']
+        )
+        extracted_info = ExtractedInformation(
+            training_development=training if training is not None else [
+                {'category': 'course', 'content': 'Python', 'status': 'completed'}
+            ],
+            feedback_motivation=[{'category': 'concern', 'content': 'усталость', 'sentiment': 'negative'}],
+            hr_processes=[],
+            community_engagement=[],
+            location_relocation=[{'category': 'relocation_plans', 'content': 'релокация'}],
+            risks_concerns=[]
+        )
+        return {'meeting_analysis': meeting_analysis, 'extracted_info': extracted_info}
+    
+    def test_file_hash_without_file_digest(self):
+        """Test that file hashes are the same with and without hashlib.file_digest (Python < 3.11)."""
+        for size in (0, 1000, MMAP_HASH_THRESHOLD + 1):
+            path = os.path.join(self.temp_dir, f'file-{size}.bin')
+            data = bytes(range(256)) * (size // 256) + b'x' * (size % 256)
+            with open(path, 'wb') as f:
+                f.write(data)
+            expected = _content_hasher(data).hexdigest()
+            
+            assert self.analyzer._calculate_file_hash(path) == expected
+            # A hashlib without file_digest, as on Python 3.8-3.10
+            with patch('hr_ai.analyzers.hr_analyzer.hashlib', SimpleNamespace()):
+                assert self.analyzer._calculate_file_hash(path) == expected
+    
+    def test_store_writes_extracted_items(self):
+        """Test that extracted information is flattened into extracted_items."""
+        result = self.analyzer._persist_analysis(self._analysis(**self._results()), None)
+        
+        items = self.analyzer.session.query(ExtractedItem).filter_by(document_id=result['document_id']).all()
+        
+        assert sorted((item.field, item.content) for item in items) == [
+            ('feedback_motivation', 'усталость'),
+            ('location_relocation', 'релокация'),
+            ('training_development', 'Python')
+        ]
+    
+    def test_reanalysis_upserts_rows(self):
+        """Test that reanalysis updates the stored rows instead of adding new ones."""
+        result = self.analyzer._persist_analysis(self._analysis(**self._results()), None)
+        doc = self.analyzer.session.get(Document, result['document_id'])
+        
+        updated = self._results(confidence_score=0.4, training=[{'category': 'course', 'content': 'AWS'}])
+        self.analyzer._persist_analysis(self._analysis(file_hash='hash-2', text_hash='text-2', **updated), doc)
+        
+        session = self.analyzer.session
+        assert session.query(Document).count() == 1
+        assert session.query(MeetingAnalysisDB).count() == 1
+        assert session.query(ExtractedInformationDB).count() == 1
+        assert session.query(MeetingAnalysisDB.confidence_score).scalar() == 0.4
+        training = session.query(ExtractedItem.content).filter_by(field='training_development').all()
+        assert training == [('AWS',)]
+    
+    def test_batch_savepoint_keeps_other_documents(self):
+        """Test that a failing document in a batch only discards its own writes."""
+        self.analyzer._persist_analysis(self._analysis(**self._results()), None, commit=False)
+        
+        broken = self._results()
+        broken['extracted_info'] = None
+        with pytest.raises(Exception):
+            self.analyzer._persist_analysis(self._analysis(**broken), None, commit=False)
+        self.analyzer.session.commit()
+        
+        assert self.analyzer.session.query(Document).count() == 1
+        assert self.analyzer.session.query(MeetingAnalysisDB).count() == 1
+    
+    def test_unchanged_text_reuses_stored_analysis(self):
+        """Test that a re-saved document with the same text keeps its analysis."""
+        result = self.analyzer._persist_analysis(self._analysis(**self._results()), None)
+        doc = self.analyzer.session.get(Document, result['document_id'])
+        
+        result = self.analyzer._persist_analysis(self._analysis(file_hash='hash-2'), doc)
+        
+        assert result['confidence_score'] == 0.9
+        assert doc.file_hash == 'hash-2'
+    
+    def test_unchanged_text_without_stored_analysis_reanalyzes(self):
+        """Test that a document with no stored analysis is analyzed instead of failing."""
+        result = self.analyzer._persist_analysis(self._analysis(**self._results()), None)
+        doc = self.analyzer.session.get(Document, result['document_id'])
+        self.analyzer.session.query(MeetingAnalysisDB).delete()
+        self.analyzer.session.commit()
+        
+        result = self.analyzer._persist_analysis(self._analysis(file_hash='hash-2'), doc)
+        
+        assert isinstance(result['meeting_occurred'], bool)
+        assert self.analyzer.session.query(MeetingAnalysisDB).count() == 1
+
+class TestHRAnalyzerCache:
+    """Test cases for the AI analysis cache in HRAnalyzer."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        settings = get_settings()
+        self.patches = [
+            patch('hr_ai.analyzers.text_analyzer.OpenAI'),
+            patch.object(settings, 'openai_api_key', 'test-key'),
+            patch.object(settings, 'enable_analysis_cache', True),
+            patch.object(settings, 'analysis_cache_path', os.path.join(self.temp_dir, 'cache.db'))
+        ]
+        for p in self.patches:
+            p.start()
+        
+        self.analyzer = HRAnalyzer(f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}")
+        self.completions = FakeCompletions()
+        self.analyzer.text_analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        
+        self.document_data = {
+            'file_path': 'test.docx',
+            'employee_name': 'Иван Петров',
+            'full_text': 'Прошел курс по Python. Встреча состоялась.',
+            'sections': {},
+            'dates_found': [],
+            'meeting_sections': []
+        }
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.analyzer.close()
+        for p in reversed(self.patches):
+            p.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_ai_results_are_cached(self):
+        """Test that AI results are reused for identical text."""
+        meeting_analysis, extracted_info = self.analyzer._run_text_analysis(self.document_data)
+        calls = self.completions.calls
+        
+        cached_meeting, cached_info = self.analyzer._run_text_analysis(self.document_data)
+        
+        assert self.completions.calls == calls
+        assert meeting_analysis.confidence_score == 0.95
+        assert cached_meeting == meeting_analysis
+        assert cached_info == extracted_info
+    
+    def test_fallback_results_are_not_cached(self):
+        """Test that results produced after an API error are retried on the next run."""
+        self.completions.error = RuntimeError("429 rate limited")
+        meeting_analysis, _ = self.analyzer._run_text_analysis(self.document_data)
+        assert meeting_analysis.confidence_score != 0.95
+        
+        self.completions.error = None
+        calls = self.completions.calls
+        meeting_analysis, extracted_info = self.analyzer._run_text_analysis(self.document_data)
+        
+        assert self.completions.calls > calls
+        assert meeting_analysis.confidence_score == 0.95
+        assert extracted_info.training_development == [{'category': 'course', 'content': 'Python'}]
+    
+    def test_cache_is_pruned_to_stored_documents(self):
+        """Test that a full analysis run drops cached results of texts no longer stored."""
+        self.analyzer._run_text_analysis(self.document_data)
+        cache = self.analyzer.analysis_cache
+        content_hash = cache.content_hash(self.document_data['full_text'])
+        assert cache.get(content_hash) is not None
+        
+        with patch.object(HRAnalyzer, 'document_parser', SimpleNamespace(scan_directory=lambda: [])):
+            self.analyzer.analyze_all_documents()
+        
+        assert cache.get(content_hash) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
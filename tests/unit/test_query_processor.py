@@ -0,0 +1,145 @@
+"""
+Unit tests for HR AI query processor.
+"""
+
+import pytest
+import tempfile
+import asyncio
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import get_settings
+from hr_ai.analyzers.hr_analyzer import HRAnalyzer
+from hr_ai.analyzers.text_analyzer import MeetingAnalysis, ExtractedInformation
+from hr_ai.api.query_processor import QueryProcessor, LOG_BATCH_SIZE
+from hr_ai.models.database import QueryLog
+
+class TestQueryProcessor:
+    """Test cases for QueryProcessor."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.database_url = f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}"
+        self.settings_patch = patch.object(get_settings(), 'database_url', self.database_url)
+        self.settings_patch.start()
+        
+        self.analyzer = HRAnalyzer(self.database_url)
+        self._store_document('Иван Петров', 'Прошел обучение по Python')
+        self.processor = QueryProcessor()
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.processor.close()
+        self.analyzer.close()
+        self.settings_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _store_document(self, employee_name, training):
+        """Store an analyzed document with one training item."""
+        document_data = {
+            'file_path': os.path.join(self.temp_dir, f'{employee_name}.docx'),
+            'employee_name': employee_name,
+            'full_text': training,
+            'sections': {},
+            'tables': [],
+            'dates_found': [],
+            'meeting_sections': []
+        }
+        self.analyzer._persist_analysis({
+            'document_data': document_data,
+            'file_hash': employee_name,
+            'text_hash': employee_name,
+            'file_size': 100,
+            'file_modified': datetime(2025, 1, 15),
+            'meeting_analysis': MeetingAnalysis(meeting_occurred=True, confidence_score=0.9, evidence=[]),
+            'extracted_info': ExtractedInformation(
+                training_development=[{'category': 'course', 'content': training, 'status': 'completed'}],
+                feedback_motivation=[],
+                hr_processes=[],
+                community_engagement=[],
+                location_relocation=[],
+                risks_concerns=[]
+            )
+        }, None)
+    
+    def _query(self, query_text):
+        """Run a query and count the database searches it needed."""
+        with patch.object(self.processor, '_execute_search', wraps=self.processor._execute_search) as search:
+            result = asyncio.run(self.processor.process_query(query_text))
+        return result, search.call_count
+    
+    def test_repeated_query_uses_response_cache(self):
+        """Test that an identical query is answered without searching again."""
+        first, first_searches = self._query("Кто проходил обучение?")
+        second, second_searches = self._query("Кто  проходил обучение?")
+        
+        assert first_searches == 1
+        assert second_searches == 0
+        assert second['results'] == first['results']
+    
+    def test_cached_response_is_not_shared(self):
+        """Test that editing a returned response changes neither later cache hits nor the log."""
+        first, _ = self._query("Кто проходил обучение?")
+        expected_results = [dict(result) for result in first['results']]
+        first['results'][0]['employee_name'] = 'изменено'
+        first['query_analysis']['intent'] = 'изменено'
+        
+        second, searches = self._query("Кто проходил обучение?")
+        second['results'].clear()
+        third, _ = self._query("Кто проходил обучение?")
+        
+        assert searches == 0
+        assert third['results'] == expected_results
+        assert third['query_analysis']['intent'] != 'изменено'
+        
+        self.processor._flush_logs()
+        session = self.processor.session
+        logged = [row.response_data for row in session.query(QueryLog).order_by(QueryLog.id)]
+        session.close()
+        assert [len(response['results']) for response in logged] == [1, 1, 1]
+    
+    def test_response_cache_invalidated_by_new_documents(self):
+        """Test that stored documents changing makes the cached response stale."""
+        first, _ = self._query("Кто проходил обучение?")
+        
+        self._store_document('Мария Иванова', 'Планирует обучение по AWS')
+        second, searches = self._query("Кто проходил обучение?")
+        
+        assert first['total_results'] == 1
+        assert searches == 1
+        assert second['total_results'] == 2
+    
+    def test_flush_logs_writes_every_row(self):
+        """Test that closing writes all queued query logs, across several batches."""
+        count = LOG_BATCH_SIZE * 2 + 5
+        for i in range(count):
+            self.processor._log_query(f"запрос {i}", {'intent': 'training'}, {'summary': '', 'total_results': i}, 0.01)
+        
+        self.processor._flush_logs()
+        
+        session = self.processor.session
+        assert session.query(QueryLog).count() == count
+        assert session.query(QueryLog).filter_by(query_text=f"запрос {count - 1}").one().documents_matched == count - 1
+        session.close()
+    
+    def test_logging_restarts_after_flush(self):
+        """Test that queries logged after a flush are still written."""
+        self.processor._log_query("первый", {'intent': 'general'}, {}, 0.01)
+        self.processor._flush_logs()
+        self.processor._log_query("второй", {'intent': 'general'}, {}, 0.01)
+        self.processor._flush_logs()
+        
+        session = self.processor.session
+        assert sorted(text for text, in session.query(QueryLog.query_text)) == ["второй", "первый"]
+        session.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
\ No newline at end of file
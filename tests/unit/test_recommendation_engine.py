@@ -0,0 +1,232 @@
+"""
+Unit tests for HR AI recommendation engine.
+"""
+
+import pytest
+import tempfile
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import get_settings
+from hr_ai.analyzers.hr_analyzer import HRAnalyzer
+from hr_ai.analyzers.recommendation_engine import RecommendationEngine
+from hr_ai.analyzers.text_analyzer import MeetingAnalysis, ExtractedInformation
+from hr_ai.models.database import Document
+
+class TestRecommendationEngine:
+    """Test cases for RecommendationEngine over a seeded SQLite database."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.database_url = f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}"
+        self.settings_patch = patch.object(get_settings(), 'database_url', self.database_url)
+        self.settings_patch.start()
+        
+        self.analyzer = HRAnalyzer(self.database_url)
+        self._store_document(
+            'Иван Петров', 'plan-1',
+            sections={'Checkpoint': ['Итог: meeting occurred, обсудили цели']},
+            meeting_occurred=True,
+            training_development=[
+                {'category': 'course', 'content': 'Python', 'status': 'planned'},
+                {'category': 'certification', 'content': 'AWS', 'status': 'interested'}
+            ],
+            feedback_motivation=[{'category': 'concern', 'content': 'Высокая нагрузка и усталость', 'sentiment': 'negative'}],
+            risks_concerns=[{'category': 'risk_concern', 'content': 'усталость'}],
+            location_relocation=[{'category': 'relocation_plans', 'content': 'Планирует переезд в Алматы'}]
+        )
+        self._store_document(
+            'Иван Петров', 'plan-2',
+            meeting_occurred=False,
+            training_development=[{'category': 'course', 'content': 'Go', 'status': 'completed'}],
+            feedback_motivation=[{'category': 'motivation', 'content': 'Хочет развитие и карьера', 'sentiment': 'positive'}],
+            risks_concerns=[{'category': 'risk_concern', 'content': 'стресс'}]
+        )
+        self._store_document(
+            'Мария Иванова', 'plan-1',
+            meeting_occurred=True,
+            training_development=[{'category': 'conference', 'content': 'PyCon', 'status': 'planned'}],
+            feedback_motivation=[{'category': 'concern', 'content': 'Мало общение в команде', 'sentiment': 'negative'}],
+            location_relocation=[{'category': 'relocation_plans', 'content': 'Релокация в Ташкент или Алматы'}]
+        )
+        
+        self.engine = RecommendationEngine()
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        self.engine.close()
+        self.engine.engine.dispose()
+        self.analyzer.close()
+        self.settings_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _store_document(self, employee_name, plan, sections=None, meeting_occurred=True, **extracted):
+        """Store an analyzed document with the given extracted items."""
+        document_data = {
+            'file_path': os.path.join(self.temp_dir, f'{employee_name} - {plan}.docx'),
+            'employee_name': employee_name,
+            'full_text': plan,
+            'sections': sections or {},
+            'tables': [],
+            'dates_found': [],
+            'meeting_sections': []
+        }
+        self.analyzer._persist_analysis({
+            'document_data': document_data,
+            'file_hash': f'{employee_name}-{plan}',
+            'text_hash': f'{employee_name}-{plan}',
+            'file_size': 100,
+            'file_modified': datetime(2025, 1, 15),
+            'meeting_analysis': MeetingAnalysis(meeting_occurred=meeting_occurred, confidence_score=0.9, evidence=[]),
+            'extracted_info': ExtractedInformation(**{
+                field: extracted.get(field, [])
+                for field in ExtractedInformation.model_fields
+            })
+        }, None)
+    
+    def _recent(self):
+        """Document filters for everything stored by setup."""
+        return [Document.parsed_at >= datetime.now() - timedelta(days=1)]
+    
+    def test_employee_patterns(self):
+        """Test the per-employee aggregation over extracted items."""
+        patterns = self.engine._analyze_employee_patterns([Document.employee_name.ilike('%Иван Петров%')])
+        
+        assert patterns['training_interests'] == [
+            {'category': 'course', 'frequency': 2},
+            {'category': 'certification', 'frequency': 1}
+        ]
+        assert patterns['risk_factors'] == ['усталость', 'стресс']
+        assert patterns['consistent_themes'] == ['нагрузка', 'развитие']
+        assert patterns['meeting_consistency'] == 0.5
+    
+    def test_company_patterns(self):
+        """Test the company-wide aggregation over extracted items and meeting analyses."""
+        insights = self.engine._analyze_company_patterns(self._recent())
+        
+        # Ties keep first-seen order
+        assert insights['common_training_requests'] == [
+            {'category': 'course', 'requests': 2},
+            {'category': 'certification', 'requests': 1},
+            {'category': 'conference', 'requests': 1}
+        ]
+        # Only negative feedback counts towards recurring themes
+        assert insights['recurring_feedback_themes'] == ['коммуникация', 'нагрузка']
+        assert insights['meeting_compliance'] == pytest.approx(2 / 3)
+        assert insights['risk_patterns'] == [
+            {'keyword': 'усталость', 'frequency': 1},
+            {'keyword': 'стресс', 'frequency': 1}
+        ]
+        # The first listed city wins when several are mentioned
+        assert insights['relocation_trends'] == [{'location': 'Алматы', 'mentions': 2}]
+    
+    def test_merged_risk_items_count_each_word(self):
+        """Test that risk items merged by the text analyzer are counted per word."""
+        self._store_document(
+            'Мария Иванова', 'plan-2',
+            risks_concerns=[{'category': 'risk_concern', 'content': 'Усталость; стресс'}]
+        )
+        
+        insights = self.engine._analyze_company_patterns(self._recent())
+        
+        assert insights['risk_patterns'] == [
+            {'keyword': 'усталость', 'frequency': 2},
+            {'keyword': 'стресс', 'frequency': 2}
+        ]
+    
+    def test_employee_recommendations(self):
+        """Test that employee data is selected by name and time window."""
+        result = self.engine.generate_employee_recommendations('Иван Петров')
+        
+        assert result['data_points'] == 2
+        assert result['patterns']['training_interests'][0] == {'category': 'course', 'frequency': 2}
+        assert {r['type'] for r in result['recommendations']} == {'training', 'process', 'wellbeing', 'development'}
+        
+        missing = self.engine.generate_employee_recommendations('Неизвестный Сотрудник')
+        assert missing['recommendations'] == []
+        assert missing['message'] == 'Недостаточно данных для анализа'
+    
+    def test_result_cache_hit_and_invalidation(self):
+        """Test that results are reused until the employee's documents change."""
+        with patch.object(
+            self.engine, '_analyze_employee_patterns', wraps=self.engine._analyze_employee_patterns
+        ) as analyze:
+            first = self.engine.generate_employee_recommendations('Иван Петров')
+            # Editing a returned result must not leak into later cache hits
+            first['recommendations'].clear()
+            first['patterns']['risk_factors'].append('изменено')
+            
+            second = self.engine.generate_employee_recommendations('Иван Петров')
+            assert analyze.call_count == 1
+            assert len(second['recommendations']) == 4
+            assert second['patterns']['risk_factors'] == ['усталость', 'стресс']
+            
+            self._store_document(
+                'Иван Петров', 'plan-3',
+                training_development=[{'category': 'course', 'content': 'Rust', 'status': 'planned'}]
+            )
+            third = self.engine.generate_employee_recommendations('Иван Петров')
+            assert analyze.call_count == 2
+            assert third['data_points'] == 3
+            assert third['patterns']['training_interests'][0] == {'category': 'course', 'frequency': 3}
+    
+    def test_bulk_matches_serial_calls(self):
+        """Test that concurrent bulk generation returns what one call per employee returns."""
+        for i in range(6):
+            self._store_document(
+                f'Сотрудник {i}', 'plan-1',
+                meeting_occurred=bool(i % 2),
+                training_development=[{'category': f'course-{i % 3}', 'content': 'Python', 'status': 'planned'}],
+                risks_concerns=[{'category': 'risk_concern', 'content': 'усталость'}] if i % 3 else []
+            )
+        names = ['Иван Петров', 'Мария Иванова', 'Неизвестный Сотрудник'] + [f'Сотрудник {i}' for i in range(6)]
+        
+        bulk = self.engine.generate_bulk_employee_recommendations(names + ['Иван Петров'])
+        
+        # A separate engine, so serial calls are not answered from the bulk run's cache
+        serial_engine = RecommendationEngine()
+        try:
+            serial = {name: serial_engine.generate_employee_recommendations(name) for name in names}
+        finally:
+            serial_engine.close()
+            serial_engine.engine.dispose()
+        
+        assert list(bulk) == names
+        for name in names:
+            assert 'error' not in bulk[name], bulk[name]
+            bulk[name].pop('generated_at', None)
+            serial[name].pop('generated_at', None)
+            assert bulk[name] == serial[name], name
+    
+    def test_company_insights(self):
+        """Test company insights, including the relocation recommendation text."""
+        result = self.engine.generate_company_insights()
+        
+        assert result['total_documents'] == 3
+        assert result['total_employees'] == 2
+        relocation = next(r for r in result['recommendations'] if r['type'] == 'employee_support')
+        assert relocation['description'] == 'Планы релокации: Алматы (2 упоминаний)'
+    
+    def test_recommendation_summary(self):
+        """Test the counts reported by the recommendation summary."""
+        summary = self.engine.get_recommendation_summary()
+        
+        assert summary['total_documents'] == 3
+        assert summary['employees_with_data'] == 2
+        assert summary['insights'] == {
+            'training_mentions': 4,
+            'risk_indicators': 2,
+            'relocation_discussions': 2
+        }
+        assert sorted(summary['top_employees_for_attention']) == ['Иван Петров', 'Мария Иванова']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
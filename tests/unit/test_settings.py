@@ -0,0 +1,169 @@
+"""
+Unit tests for HR AI settings.
+"""
+
+import pytest
+import tempfile
+import os
+from unittest.mock import patch
+
+# Add src to path for testing
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+import config.settings
+from config.settings import Settings, get_settings, make_engine
+
+class TestSettings:
+    """Test cases for the Settings dataclass and its environment parsing."""
+    
+    def test_from_env_parses_field_types(self):
+        """Test that environment strings are converted to the declared field types."""
+        environ = {
+            'PORT': '9000',
+            'Debug': 'yes',
+            'TEMPERATURE': '0.5',
+            'GOOGLE_DRIVE_FOLDER_ID': 'folder-1',
+            'HR_EMAIL_RECIPIENTS': 'hr@example.com, lead@example.com,',
+            'SUPPORTED_FORMATS': '[".docx", ".pdf"]'
+        }
+        with patch.dict(os.environ, environ):
+            settings = Settings._from_env()
+        
+        assert settings.port == 9000
+        assert settings.debug is True
+        assert settings.temperature == 0.5
+        assert settings.google_drive_folder_id == 'folder-1'
+        assert settings.hr_email_recipients == ['hr@example.com', 'lead@example.com']
+        assert settings.supported_formats == ['.docx', '.pdf']
+    
+    def test_defaults(self):
+        """Test that unset fields keep their defaults and list defaults are not shared."""
+        first, second = Settings(), Settings()
+        
+        assert first.port == 8000
+        assert first.openai_api_key is None
+        first.training_keywords.append('новое')
+        assert 'новое' not in second.training_keywords
+    
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass slots need Python 3.10+")
+    def test_slots(self):
+        """Test that settings instances have no per-instance __dict__."""
+        settings = Settings()
+        
+        assert not hasattr(settings, '__dict__')
+        with pytest.raises(AttributeError):
+            settings.unknown_setting = True
+    
+    def test_validate(self):
+        """Test the optional pydantic validation entry point."""
+        validated = Settings(port='8001').validate()
+        
+        assert isinstance(validated, Settings)
+        assert validated.port == 8001
+
+class TestGetSettings:
+    """Test cases for the lazily built global settings."""
+    
+    def test_get_settings_is_cached(self):
+        """Test that the environment is read once and the same instance is returned."""
+        assert get_settings() is get_settings()
+    
+    def test_module_settings_is_lazy(self):
+        """Test that the module-level settings attribute resolves to get_settings()."""
+        assert 'settings' not in vars(config.settings)
+        assert config.settings.settings is get_settings()
+        with pytest.raises(AttributeError):
+            config.settings.unknown_setting
+
+class TestKeywordAutomaton:
+    """Test cases for keyword category matching."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.settings = Settings(
+            training_keywords=['Курс', 'meetup'],
+            community_keywords=['meetup', 'форум'],
+            location_keywords=['переезд']
+        )
+        self.text = 'Обсудили КУРС по Python и Meetup в офисе'
+    
+    def test_match_keyword_categories(self):
+        """Test that matching is case-insensitive and shared keywords hit every category."""
+        assert self.settings.keyword_automaton is not None
+        assert self.settings.match_keyword_categories(self.text) == {'training', 'community'}
+        assert self.settings.match_keyword_categories('Без ключевых слов') == set()
+    
+    def test_keyword_index_is_built_once(self):
+        """Test that the keyword table is built once per instance and rebuilt for replaced lists."""
+        with patch.object(Settings, '_keyword_table', autospec=True, side_effect=Settings._keyword_table) as build:
+            automaton = self.settings.keyword_automaton
+            self.settings.match_keyword_categories(self.text)
+            assert self.settings.keyword_automaton is automaton
+            assert build.call_count == 1
+            
+            self.settings.location_keywords = ['курс']
+            assert self.settings.match_keyword_categories(self.text) == {'training', 'community', 'location'}
+            assert build.call_count == 2
+    
+    def test_match_keyword_categories_without_automaton(self):
+        """Test the substring fallback used when pyahocorasick is not installed."""
+        config.settings._build_keyword_automaton.cache_clear()
+        try:
+            with patch('config.settings.Automaton', None):
+                assert self.settings.keyword_automaton is None
+                assert self.settings.match_keyword_categories(self.text) == {'training', 'community'}
+        finally:
+            config.settings._build_keyword_automaton.cache_clear()
+
+class TestMakeEngine:
+    """Test cases for make_engine."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Clean up test environment."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_file_database_is_pooled_with_pragmas(self):
+        """Test that file-backed SQLite engines pool connections and apply the WAL pragmas."""
+        engine = make_engine(f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}")
+        try:
+            assert isinstance(engine.pool, QueuePool)
+            with engine.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+                assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+                assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        finally:
+            engine.dispose()
+    
+    def test_savepoint_rollback(self):
+        """Test that a rolled back nested transaction keeps the outer transaction's writes."""
+        engine = make_engine(f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}")
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE TABLE items (name TEXT)"))
+                conn.execute(text("INSERT INTO items VALUES ('kept')"))
+                savepoint = conn.begin_nested()
+                conn.execute(text("INSERT INTO items VALUES ('discarded')"))
+                savepoint.rollback()
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT name FROM items")).scalars().all() == ['kept']
+        finally:
+            engine.dispose()
+    
+    def test_memory_database(self):
+        """Test that in-memory databases work without the file pragmas."""
+        engine = make_engine("sqlite:///:memory:")
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -3,6 +3,11 @@ Unit tests for HR AI text analyzer.
 """
 
 import pytest
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from unittest.mock import Mock, patch
 from datetime import datetime
 
@@ -11,7 +16,11 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from hr_ai.analyzers.text_analyzer import TextAnalyzer, MeetingAnalysis, ExtractedInformation
+from config.settings import settings
+from hr_ai.analyzers.text_analyzer import (
+    TextAnalyzer, MeetingAnalysis, ExtractedInformation,
+    RISK_PATTERNS, _find_keywords, _keyword_spans, _merged_matches
+)
 
 class TestTextAnalyzer:
     """Test cases for TextAnalyzer."""
@@ -140,5 +149,110 @@ class TestTextAnalyzer:
         assert isinstance(result.location_relocation, list)
         assert isinstance(result.risks_concerns, list)
 
+class TestKeywordMatching:
+    """Test cases for the shared keyword and pattern matchers."""
+    
+    texts = [
+        "Сотрудник прошел курс по Python и планирует сертификацию AWS. Хочет участвовать в митапе.",
+        "Курс, курсы и КУРС: workshop/Workshop, training-course, обучение_команды.",
+        "Удовлетворен работой, но чувствует усталость. Мотивация высокая, усталость растет.",
+        "İstanbul: курс по Go, сертификат получен, meetup посещен.",
+        ""
+    ]
+    
+    @staticmethod
+    def _regex_keywords(text, keywords):
+        """One whole-word regex scan per keyword, as the matcher replaced."""
+        return [
+            (keyword, match.start(), match.end())
+            for keyword in keywords
+            for match in re.finditer(rf'\b{re.escape(keyword)}\b', text, re.IGNORECASE)
+        ]
+    
+    @pytest.mark.parametrize('keywords_field', ['training_keywords', 'feedback_keywords'])
+    def test_find_keywords_matches_regex_scan(self, keywords_field):
+        """Test that _find_keywords reports the same spans as per-keyword regexes."""
+        keywords = getattr(settings, keywords_field)
+        for text in self.texts:
+            expected = self._regex_keywords(text, keywords)
+            assert _find_keywords(text, keywords, _keyword_spans(text)) == expected, text
+            # Without spans (no pyahocorasick) the regex fallback is used
+            assert _find_keywords(text, keywords, None) == expected, text
+    
+    def test_training_and_feedback_share_one_scan(self):
+        """Test that the combined keyword extraction scans the text once."""
+        analyzer = TextAnalyzer()
+        text = self.texts[2]
+        
+        with patch('hr_ai.analyzers.text_analyzer._keyword_spans', wraps=_keyword_spans) as scan:
+            training, feedback = analyzer._keyword_extract_training_and_feedback(text)
+        
+        assert scan.call_count == 1
+        assert training == analyzer._keyword_extract_training(text)
+        assert feedback == analyzer._keyword_extract_feedback(text)
+    
+    def test_merged_matches_without_overlap(self):
+        """Test that distant matches are reported exactly as per-regex scanning would."""
+        text = "Чувствует усталость." + " Все хорошо." * 30 + " Есть стресс."
+        expected = sorted(
+            (match.start(), match.group(), text[max(0, match.start() - 100):match.end() + 100].strip())
+            for pattern in RISK_PATTERNS
+            for match in pattern.finditer(text)
+        )
+        
+        result = _merged_matches(text, RISK_PATTERNS, 100)
+        
+        assert result == [(content, context) for _, content, context in expected]
+    
+    def test_merged_matches_cover_every_match(self):
+        """Test that overlapping matches are merged without losing any of them."""
+        text = "Усталость и выгорание, стресс и перегрузка. Burnout, STRESS, stress. " * 3
+        matches = [match for pattern in RISK_PATTERNS for match in pattern.finditer(text)]
+        
+        result = _merged_matches(text, RISK_PATTERNS, 50)
+        
+        assert len(result) < len(matches)
+        for match in matches:
+            assert any(
+                match.group().lower() in content.lower() and match.group() in context
+                for content, context in result
+            ), match.group()
+        # Case variants of the same word are reported once per span
+        for content, _ in result:
+            parts = [part.lower() for part in content.split('; ')]
+            assert len(parts) == len(set(parts))
+
+class TestRequestLimit:
+    """Test cases for the limit on concurrent OpenAI requests."""
+    
+    def test_requests_in_flight_are_bounded(self):
+        """Test that threads sharing an analyzer never exceed the configured request slots."""
+        with patch('hr_ai.analyzers.text_analyzer.OpenAI'), \
+                patch.object(settings, 'openai_api_key', 'test-key'), \
+                patch.object(settings, 'openai_max_concurrent_requests', 2):
+            analyzer = TextAnalyzer()
+        
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+        
+        def create(**request):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{}'))])
+        
+        analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: analyzer._chat_completion('', model='test-model', messages=[]), range(8)
+            ))
+        
+        assert results == [('{}', None)] * 8
+        assert peak[0] == 2
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file